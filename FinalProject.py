@@ -1,7 +1,28 @@
-from pytesseract import pytesseract
-import cv2
-import numpy as np
-from mtgsdk import Card
+import argparse
+import glob
+import os
+import re
+import sys
+import threading
+from lazy_import import lazy_import
+cv2 = lazy_import("cv2")		# OpenCV and numpy load the first time an image is read, not at startup, so a lookup
+np = lazy_import("numpy")		# that never reads an image doesn't wait for them (see lazy_import.py)
+from api_resolver import APIError, CardResolver
+from card_sheet import card_mask, find_cards, warp_card
+from card_store import CardStore
+from card_table import CardRecord, CardTable
+from checkpoint import Checkpoint
+from collection_index import CollectionIndex
+from deck_stats import deck_statistics, statistics_lines
+from lookup_cache import LookupCache, normalize_name
+from name_index import NameIndex
+from ocr_cache import OCRCache, image_key
+import ocr_backend
+from pipeline import Stage, run_pipeline
+from report_writer import FORMATS, check_formats, write_report
+from review_queue import ReviewQueue, read_answers
+from telemetry import Telemetry
+from video_scan import card_frames, is_video, read_frames
 
 """
 William Dacey
@@ -9,6 +30,35 @@ ENAE 380 0203
 Final Project
 """
 
+# the databases are opened the first time they are needed (see get_card_store()), so importing this file creates no
+# files; set them before that to keep them somewhere else
+card_store = None		# local card database, checked before the API
+api = CardResolver()		# MTG API client: pooled connections, rate limit, retries, and batched lookups
+lookup_cache = None		# memoized get_data() results, shared by every deck and collection
+ocr_cache = None		# names already read from each photo, keyed by a hash of the image file
+name_index = None				# fuzzy index of every name in card_store, built the first time it is needed (see get_name_index())
+name_index_lock = threading.Lock()
+stores_lock = threading.Lock()
+telemetry = Telemetry(os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry.jsonl"))	# per-card timing log, see telemetry.py
+
+# ways of reading a card's name tried by text_detect(), cheapest first: (top, bottom, left, right) of the window of
+# the cropped card, how the window is cleaned up (see title_strip()), and how much it is enlarged
+OCR_ATTEMPTS = [((50, 100, 65, 550), "binary", 2),	# the title window, black and white
+	((50, 100, 65, 550), "plain", 1),				# the title window as it is
+	((25, 125, 30, 685), "adaptive", 3)]			# a wider window, for crops that are a little off
+
+# settings used by crop_image() and text_detect(); part of every OCR cache key, so change this string whenever they change
+OCR_PARAMS = "crop:reduced4,blur11,thresh100,715x1000;title:" + str(OCR_ATTEMPTS) + ";" + ocr_backend.BACKEND
+
+LOOKUP_THREADS = 8	# number of card lookups allowed in flight at once
+QUEUE_SIZE = 16		# number of cards allowed to wait between two pipeline stages
+OCR_BATCH = 1		# title strips read per OCR call by default; --ocr-batch 16 or so speeds up bulk jobs, see ocr_batch_stage()
+FETCH_BATCH = 64	# most cards whose names are looked up in the API together, see fetch_stage()
+MATCH_CONFIDENCE = 0.8	# lowest name_index confidence accepted without asking the user, see resolve_stage()
+TRUSTED_INDEX_SIZE = 20000	# names name_index needs before text_detect() takes a name it doesn't know for a misread
+REVIEW_STATUS = 3	# exit status of a command line run that stopped before writing its output (see command_line())
+
+NAME_JUNK = re.compile(r"[^\w ,'-]|_")	# anything but letters, digits, spaces, hyphens, commas, and apostrophes
 
 
 """
@@ -16,76 +66,198 @@ Parameters
 ----------
  filename: string
 
+Returns 
+----------
+ img: Image
+
+Reads the image file at filename at a quarter of its full size. Decoding at reduced size (which JPEG supports
+directly) is much faster and uses a sixteenth of the memory of decoding the full photo and then shrinking it.
+"""
+def load_image(filename):
+	return cv2.imread(filename, cv2.IMREAD_REDUCED_COLOR_4)
+
+"""
+Parameters
+----------
+ image_bytes: bytes
+
+Returns 
+----------
+ img: Image
+
+Same as load_image(), for the contents of an image file that has already been read.
+"""
+def decode_image(image_bytes):
+	return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_REDUCED_COLOR_4)
+
+"""
+Parameters
+----------
+ img: Image (already reduced in size by load_image() or decode_image())
+
+ thresh_gray: Image from card_mask(img), or None to make it here
+
 Returns 
 ----------
  final: Image
 
-This function takes in the path of an image file at filename. It then blurs the image to
+This function takes in a photo of a card. It then blurs the image to
 remove noise from the photo, and then thresholds the blurred image to find the outer edges
-of the image. The function then crops the original image and resizes it to a specific size.
+of the image (see card_sheet.card_mask()). The function then crops the original image and resizes it to a specific size.
 The function returns the cropped image.
 """
-def crop_thresh(filename):
-	# the following code was taken from https://stackoverflow.com/questions/44383209/how-to-detect-edge-and-crop-an-image-in-python
-
-	img = cv2.imread(filename)
-	rsz_img = cv2.resize(img, None, fx = 0.25, fy = 0.25)	# resize image
-	blur1 = cv2.GaussianBlur(rsz_img, (11,11), 0, 0)		# blur and grayscale
-	gray = cv2.cvtColor(blur1, cv2.COLOR_BGR2GRAY)
+def crop_image(img, thresh_gray = None):
+	# the following code was based on https://stackoverflow.com/questions/44383209/how-to-detect-edge-and-crop-an-image-in-python
 
-	retval, thresh_gray = cv2.threshold(gray, thresh = 100, maxval = 255, type = cv2.THRESH_BINARY) # threshold
+	if thresh_gray is None:	# crop_stage() passes in the mask it already made to look for cards
+		thresh_gray = card_mask(img)	# blur, grayscale, and threshold, dark pixels become white
 
-	# detect bounds of thresholded image
-	points = np.argwhere(thresh_gray == 0)
-	points = np.fliplr(points)
+	# obtain boundary of card in image; boundingRect() reads the white pixels of the mask directly,
+	# so no array of pixel coordinates is built
+	x,y,w,h = cv2.boundingRect(thresh_gray)
 
-	# obtain boundary of card in image
-	x,y,w,h = cv2.boundingRect(points)
+	if w == 0 or h == 0:	# nothing dark enough was found, use the whole photo
+		x, y, h, w = 0, 0, img.shape[0], img.shape[1]
 
 	# crop image
-	crop = rsz_img[y:y + h, x:x + w]
+	crop = img[y:y + h, x:x + w]
 
 	# resize final image
 	final = cv2.resize(crop, (715, 1000))
 
 	return final
 
+"""
+Parameters
+----------
+ filename: string
+
+Returns 
+----------
+ final: Image
+
+Loads the image at filename and crops it with crop_image().
+"""
+def crop_thresh(filename):
+	return crop_image(load_image(filename))
+
 """
 Parameters
 -----------
  image: Image
 
-Returns:
+Returns
 -----------
- cards: tuple
+ title: Image
 
-----------
+Returns the window of a cropped card image where the card name is printed.
+"""
+def title_region(image):
+	return image[50:100, 65:550]
 
-This function extracts data from the cropped image. The function crops the image to a 
-region around the card name. Using the pytesseract library, the function reads the text
-within the cropped image and stores it as the card name. It then returns the card name. 
 """
-def text_detect(image):
-	# the basis of this code was taken from https://www.geeksforgeeks.org/how-to-extract-text-from-images-with-python/
+Parameters
+-----------
+ image: Image
+ attempt: one of OCR_ATTEMPTS
 
-	path_to_tesseract = "C:\\Program Files\\Tesseract-OCR\\tesseract.exe"	# file path to tesseract executable
+Returns
+-----------
+ strip: Image
 
-	title = image[50:100, 65:550]		# window of where to find card name
+Cuts the window of attempt out of a cropped card image and gets it ready for OCR. "plain" leaves it as it is; "binary"
+turns it black and white with Otsu's threshold, which leaves Tesseract clean letters to read and is the fastest for it
+to read; "adaptive" thresholds each part of the window against its surroundings, for titles in uneven light.
+"""
+def title_strip(image, attempt):
+	(top, bottom, left, right), cleanup, scale = attempt
+	strip = image[top:bottom, left:right]
+	if cleanup == "plain":
+		return strip
+
+	gray = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY)
+	gray = cv2.resize(gray, None, fx = scale, fy = scale, interpolation = cv2.INTER_CUBIC)
+	if cleanup == "binary":
+		retval, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+	else:
+		gray = cv2.adaptiveThreshold(cv2.medianBlur(gray, 3), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10)
+	return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)	# the OCR backend takes 3 channel images
 
-	pytesseract.tesseract_cmd = path_to_tesseract	# initialize the pytesseract OCR tool
+"""
+Parameters
+-----------
+ image: Image
+ first: string or None (the name already read with the first of OCR_ATTEMPTS, see ocr_batch_stage())
 
-	reversed_text = pytesseract.image_to_string(title)	# get card name string
+Returns:
+-----------
+ card_name: string
 
-	text = reversed_text[:-1]	# reverse the text so it reads properly
+----------
 
-	card_name = ''.join(ch for ch in text if ch.isalnum() or ch == ' ' or ch == '-' or ch == ',' or ch == "'") # remove characters other than letters, spaces, heiphens, commas, and apostraphes
+This function extracts data from the cropped image. Using Tesseract (thru ocr_backend.py, which keeps a recognizer
+loaded between cards when tesserocr is installed), it reads the card name from the title window of the card, trying
+each of OCR_ATTEMPTS in turn and stopping as soon as one gives a name it can trust: one that matches a known card
+name in name_index with at least MATCH_CONFIDENCE, or that an earlier attempt read the same way. Most cards are read
+by the first, cheapest attempt; the others only run when it reads something that isn't a card. A read that matches
+a known name is returned as that name, spelled the way the card is ("Lightnig Bolt" comes back as "Lightning Bolt"),
+so the stages after it find the card by exact lookup. If no attempt can be trusted, the name that came closest to a
+known card is returned. It then returns the card name.
+
+Judging a read by name_index only works once the index holds nearly every card, as it does after card_store is
+filled from a bulk export (about 30,000 names). Until it holds TRUSTED_INDEX_SIZE names, a name it doesn't know is
+more likely a card that hasn't been seen yet than a misread, so the first read is kept unless it is empty; a misread
+is still matched to a known name, or reviewed, in resolve_stage().
+"""
+def text_detect(image, first = None):
+	# the basis of this code was taken from https://www.geeksforgeeks.org/how-to-extract-text-from-images-with-python/
 
-	card_name = card_name.rstrip().lstrip()	# strip ends of card name
+	tried = []
+	best_name, best_confidence = "", -1.0
+	for k in range(len(OCR_ATTEMPTS)):
+		if k == 0 and first != None:
+			card_name = first
+		else:
+			reversed_text = ocr_backend.image_to_string(title_strip(image, OCR_ATTEMPTS[k]))	# get card name string (see ocr_backend.py for which OCR tool is used)
+			card_name = clean_name(reversed_text[:-1])	# drop the extra character the backend ends the text with
+
+		if card_name and card_name in tried:	# read the same way twice
+			break
+
+		match, confidence = get_name_index().best(card_name) if card_name else (None, 0.0)
+		if confidence >= MATCH_CONFIDENCE:
+			card_name = match	# the known name it was read as
+			break
+		if card_name and len(get_name_index()) < TRUSTED_INDEX_SIZE:	# too few known names to call this a misread
+			break
+		if confidence > best_confidence:
+			best_name, best_confidence = card_name, confidence
+		tried.append(card_name)
+	else:
+		card_name = best_name	# no attempt could be trusted, use the one closest to a known name
+
+	telemetry.note("ocr_attempts", k + 1)
 
 	print(card_name)	# print name of card
 
 	return card_name
 
+"""
+Parameters
+-----------
+ text: string
+
+Returns
+-----------
+ card_name: string
+
+Cleans up text read by OCR so it can be used as a card name.
+"""
+def clean_name(text):
+	card_name = NAME_JUNK.sub("", text)	# remove characters other than letters, spaces, heiphens, commas, and apostraphes
+
+	return card_name.strip()	# strip ends of card name
+
 """
 Parameters
 -----------
@@ -97,18 +269,129 @@ Returns
 
 
 
-Using the Magic: The Gathering API and the MTG API Python SDK, the function performs an HTTP request 
+The function first looks the card name up in the local card store (see card_store.py), which is an indexed
+lookup and doesn't touch the network. If the store doesn't have the card, it falls back to the
+Magic: The Gathering API thru api (see api_resolver.py), performing an HTTP request
 to acquire the corresponding card objects to the card name it read earlier. Cards can have multiple
-reprints, and thus multiple objects, the http request returns multiple card objects. Since
-reprinted cards never change in what they do in-game, the function just takes the first card object
-in the returned array, searches it for relevant data, and returns that data
+reprints, and thus multiple objects. Since
+reprinted cards never change in what they do in-game, the function just takes the first exact match, saves it to the
+local store, and returns that data
+"""
+def lookup_card(card_name):
+	data = get_card_store().lookup(card_name)	# check local store first
+	if data:
+		telemetry.note("lookup", "store")
+		return data
+
+	telemetry.note("lookup", "api")
+	requests, retries = api.stats["requests"], api.stats["retries"]
+	data = api.resolve([card_name])[card_name]	# find the card with specified name in the API
+	telemetry.count("api_requests", api.stats["requests"] - requests)
+	telemetry.count("api_retries", api.stats["retries"] - retries)
+
+	if data:
+		remember_card(data)	# save card so the next lookup is local
+	return data
+
+"""
+Parameters
+-----------
+ data: tuple
+
+Saves card data found in the API to card_store, and adds its name to name_index so misreads of it can be matched.
+"""
+def remember_card(data):
+	get_card_store().add(data)
+	if name_index != None:
+		name_index.add(data[0])
+
+"""
+Parameters
+-----------
+ card_name: string
+
+Returns
+-----------
+ tuple or None
+
+Cached front end to lookup_card(). Decks repeat the same cards (basic lands, four-ofs) over and over, so results
+are memoized by card name in lookup_cache, including names that weren't found. Hit and miss counts are kept in
+lookup_cache.stats (see get_lookup_cache()). An empty name (OCR read nothing) is not found, without touching the
+cache or the API.
 """
 def get_data(card_name):
-	cards = [(card.name, card.mana_cost, card.cmc, card.type, card.colors, card.color_identity, card.power, card. toughness, card.loyalty) for card in Card.where(name = card_name).all()] # find cards with specified name in the API
+	if not normalize_name(card_name):
+		return None
+	return get_lookup_cache().get(card_name, lookup_card)
 
-	for i in cards:				# find an exact match in array of tuples
-		if card_name == i[0]:	# check name
-			return i
+"""
+Returns
+-----------
+ card_store: CardStore
+
+Returns the local card database, opening (or creating) cards.db next to this file the first time it is called unless
+card_store was already set to another CardStore.
+"""
+def get_card_store():
+	global card_store
+	with stores_lock:
+		if card_store == None:
+			card_store = CardStore()
+	return card_store
+
+"""
+Returns
+-----------
+ lookup_cache: LookupCache
+
+Same as get_card_store(), for the lookup cache in lookup_cache.db.
+"""
+def get_lookup_cache():
+	global lookup_cache
+	with stores_lock:
+		if lookup_cache == None:
+			lookup_cache = LookupCache()
+	return lookup_cache
+
+"""
+Returns
+-----------
+ ocr_cache: OCRCache
+
+Same as get_card_store(), for the OCR cache in ocr_cache.db.
+"""
+def get_ocr_cache():
+	global ocr_cache
+	with stores_lock:
+		if ocr_cache == None:
+			ocr_cache = OCRCache()
+	return ocr_cache
+
+"""
+Ends a deck or collection run: writes what lookup_cache and ocr_cache held back during the run (see
+LookupCache.flush() and OCRCache.flush()) and finishes the telemetry run.
+"""
+def finish_run():
+	if lookup_cache != None:
+		lookup_cache.flush()
+	if ocr_cache != None:
+		ocr_cache.flush()
+	telemetry.finish_run()
+
+"""
+Returns
+-----------
+ name_index: NameIndex
+
+Returns the fuzzy index of card names (see name_index.py), building it from every name in card_store the first time
+it is called. lookup_card() adds names to it as they are found.
+"""
+def get_name_index():
+	global name_index
+	with name_index_lock:
+		if name_index == None:
+			name_index = NameIndex(get_card_store().names())
+	return name_index
 
 """
 Paramters
@@ -125,63 +408,447 @@ This function encapsulates the functionality of crop_thresh(), text_detect(), an
 def process_card(filename):
 	return get_data(text_detect(crop_thresh(filename)))
 
+"""
+Parameters
+----------
+ card: dictionary
+
+Returns
+----------
+ card: dictionary
+
+These functions are the stages of the streaming pipeline used by process_cards(). Each card moves thru the pipeline
+as a dictionary that starts out holding only its "filename". Each stage adds what it produces and removes what later
+stages don't need, so large images are only kept in memory while they are being worked on.
+
+ load:    "filename" -> "key", and either "name" (from the OCR cache) or "image"
+ crop:    "image" -> "crop", or "sheet" if the image has more than one card in it
+ ocr:     "crop" -> "name"
+ fetch:   (looks up every new name of a batch of cards in one go, see fetch_stage())
+ resolve: "name" -> "data", and "candidates" if no card was found
+
+The load stage hashes the image file (see ocr_cache.py). If the same file has been read before with the same
+OCR_PARAMS, the name is taken from ocr_cache and the crop and OCR stages pass the card thru untouched.
+
+When no card has the name that was read, the resolve stage looks for the closest known name in name_index. A match
+with at least MATCH_CONFIDENCE is used in place of the misread name; otherwise the closest names are kept in
+"candidates" so the user can pick one when the card is reviewed (see resolve_cards()).
+"""
+def load_stage(card):
+	if "image" in card:	# a frame of a video, already decoded (see process_cards())
+		image_bytes = card["image"].tobytes()
+	else:
+		with open(card["filename"], 'rb') as file:
+			image_bytes = file.read()
+
+	card["key"] = image_key(image_bytes, OCR_PARAMS)
+	telemetry.note("image_bytes", len(image_bytes))
+
+	cached = get_ocr_cache().get(card["key"])
+	if cached:
+		card.pop("image", None)
+		card["name"] = cached[0]
+		telemetry.note("ocr_cached", True)
+		print(card["name"])	# print name of card, like text_detect() does
+		return card
+
+	if "image" not in card:
+		card["image"] = decode_image(image_bytes)	# decode the bytes already read instead of reading the file again
+	telemetry.note("image_shape", list(card["image"].shape[:2]))
+	return card
+
+"""
+The crop stage looks for every card in the image (see card_sheet.py). A photo of one card is cropped with
+crop_image() as always; a photo of a page of cards gets the straightened crop of each of them in "sheet", and
+process_cards() splits it into one card per crop. The image is blurred and thresholded once, for both.
+"""
+def crop_stage(card):
+	if "image" in card:
+		image = card.pop("image")
+		mask = card_mask(image)
+		corners = find_cards(image, mask)
+		if len(corners) > 1:
+			card["sheet"] = [warp_card(image, c) for c in corners]
+		else:
+			card["crop"] = crop_image(image, mask)
+	return card
+
+def ocr_stage(card):
+	if "crop" in card:
+		crop = card.pop("crop")
+		card["name"] = text_detect(crop)
+
+		retval, title = cv2.imencode(".png", title_region(crop))	# save the title strip along with the name
+		get_ocr_cache().put(card["key"], card["name"], title.tobytes())
+	return card
+
+"""
+Parameters
+----------
+ cards: [dictionary]
+
+Returns
+----------
+ cards: [dictionary]
+
+Batch version of ocr_stage(), used instead of it when process_cards() is given an ocr_batch of more than 1. The
+title strips of every card in the batch that still needs reading are stacked into one image and read with one OCR
+call (see ocr_backend.images_to_strings()), instead of one call per card. That read is the first of OCR_ATTEMPTS;
+cards it doesn't give a trusted name for go on to the other attempts one at a time in text_detect().
+"""
+def ocr_batch_stage(cards):
+	todo = [card for card in cards if "crop" in card]
+	crops = [card.pop("crop") for card in todo]
+	texts = ocr_backend.images_to_strings([title_strip(crop, OCR_ATTEMPTS[0]) for crop in crops])
+
+	for card, crop, text in zip(todo, crops, texts):
+		with telemetry.active(card["span"]):	# so text_detect() notes its OCR attempts in this card's span
+			card["name"] = text_detect(crop, clean_name(text))	# only reads the card again if the batch read wasn't a name
+
+		retval, title = cv2.imencode(".png", title_region(crop))
+		get_ocr_cache().put(card["key"], card["name"], title.tobytes())
+	return cards
+
+"""
+Parameters
+----------
+ cards: [dictionary]
+
+Returns
+----------
+ cards: [dictionary]
+
+Batch stage run before the resolve stage. Names of the batch that aren't in lookup_cache or card_store are looked up
+in the API together with api.resolve(), which takes a few requests for the whole batch instead of one per card. Cards
+found are saved to card_store and names that aren't cards are cached as not found, so resolve_stage() then finds
+every name locally. Names are looked up the way lookup_cache keys them (see normalize_name()), so a misread with
+extra spaces is looked up, and cached, as the name it was meant to be. A name card_store doesn't have but name_index
+matches with at least MATCH_CONFIDENCE (a misread, or a name kept in ocr_cache by an earlier run) is changed to the
+name it matched instead of being sent to the API.
+"""
+def fetch_stage(cards):
+	todo = [card for card in cards if "data" not in card and normalize_name(card["name"])]
+	for card in todo:
+		if get_card_store().lookup(normalize_name(card["name"])) == None:
+			match, confidence = get_name_index().best(card["name"])
+			if confidence >= MATCH_CONFIDENCE:	# a misread of a known card, nothing to ask the API
+				card["name"] = match
+				card["span"]["confidence"] = round(confidence, 3)
+
+	names = [name for name in dict.fromkeys(normalize_name(card["name"]) for card in todo)
+		if not get_lookup_cache().cached(name) and get_card_store().lookup(name) == None]
+	if not names:
+		return cards
+
+	requests, retries = api.stats["requests"], api.stats["retries"]
+	found = api.resolve(names)
+	for name in names:
+		if found[name]:
+			remember_card(found[name])
+		else:
+			get_lookup_cache().put(name, None)
+
+	for card in todo:
+		if normalize_name(card["name"]) in found:
+			card["span"]["fetched"] = True
+	todo[0]["span"]["api_requests"] = api.stats["requests"] - requests	# counted once for the whole batch
+	todo[0]["span"]["api_retries"] = api.stats["retries"] - retries
+	return cards
+
+def resolve_stage(card):
+	telemetry.note("lookup", "cache")	# lookup_card() changes this if the lookup cache missed
+	card["data"] = get_data(card["name"])
+	if card["data"]:
+		return card
+
+	match, confidence = get_name_index().best(card["name"])	# the name was probably misread, find the closest real one
+	telemetry.note("confidence", round(confidence, 3))
+	if confidence >= MATCH_CONFIDENCE:
+		card["data"] = get_data(match)
+		telemetry.note("lookup", "fuzzy")
+
+	if not card["data"]:
+		card["candidates"] = [name for name, confidence in get_name_index().search(card["name"])]
+		telemetry.note("lookup", "not_found")
+	return card
+
+"""
+Parameters
+----------
+ function: stage function
+
+Returns
+----------
+ stage function
+
+Wraps a stage so that cards which already have "data" (because they were resumed from a checkpoint) pass thru
+without being loaded, cropped, read, or looked up again.
+"""
+def skip_resolved(function):
+	def stage(card):
+		if "data" in card:
+			return card
+		return function(card)
+	return stage
+
+"""
+Parameters
+----------
+ filenames: iterable of strings
+
+ workers: int
+
+ checkpoint: Checkpoint or None
+
+Returns
+----------
+ generator of card dictionaries (see load_stage()), in the same order as filenames
+
+Streams a list of card images thru the load -> crop -> OCR -> fetch -> resolve stages. Each stage runs in its own
+threads and stages are connected by queues holding at most QUEUE_SIZE cards, so memory use stays flat no matter how
+long filenames is, and each card comes out as soon as it (and every card before it) is finished. workers is the
+number of threads given to each of the image stages; OpenCV and Tesseract do their work outside of Python's global
+interpreter lock, so these threads can run on separate cores (run_benchmarks.py --scaling measures how images per
+second grow with workers). Card lookups get LOOKUP_THREADS threads.
+
+If a checkpoint is given, cards it already has data for are marked "resumed" and pass thru every stage untouched.
+When ocr_batch (OCR_BATCH if None) is more than 1, the OCR stage reads that many title strips per call (see
+ocr_batch_stage()).
+Names are looked up in the API FETCH_BATCH cards at a time (see fetch_stage()).
+Every stage is timed into the card's telemetry span, card["span"] (see telemetry.py).
+
+filenames can also name videos of cards being put under a camera one at a time (see video_scan.py). One frame is
+picked for each card in the video and sent thru the pipeline as its own card, with "filename" set to the video's
+name followed by "#" and the frame number.
+
+Photos can hold more than one card (a binder page, say). The load and crop stages run as one pipeline and the rest
+as a second one; in between, a photo the crop stage found several cards in is split into one card per crop, named
+after the photo followed by "#card " and the card's number in reading order (see split_sheet()). The photo is read
+and decoded once for all its cards, and the time spent on it is shared between them.
+"""
+def process_cards(filenames, workers = 1, checkpoint = None, ocr_batch = None):
+	if ocr_batch == None:
+		ocr_batch = OCR_BATCH
+	ocr = Stage("ocr", telemetry.timed("ocr", skip_resolved(ocr_stage)), workers)
+	if ocr_batch > 1:
+		ocr = Stage("ocr", telemetry.timed_batch("ocr", ocr_batch_stage), workers, ocr_batch)	# ocr_batch_stage() already skips cards without a "crop"
+
+	images = [Stage("load", telemetry.timed("load", skip_resolved(load_stage)), workers),
+		Stage("crop", telemetry.timed("crop", skip_resolved(crop_stage)), workers)]
+	names = [ocr,
+		Stage("fetch", telemetry.timed_batch("fetch", fetch_stage), 1, FETCH_BATCH),
+		Stage("resolve", telemetry.timed("resolve", skip_resolved(resolve_stage)), LOOKUP_THREADS)]
+
+	def start(filename, frame = None):
+		card = {"filename" : filename, "span" : telemetry.new_span(filename)}
+		data = checkpoint.lookup(filename) if checkpoint else None
+		if data:
+			card["data"] = data
+			card["resumed"] = True
+			card["span"]["resumed"] = True
+		elif frame is not None:
+			card["image"] = frame
+		return card
+
+	def cards():
+		for filename in filenames:
+			if is_video(filename):
+				for number, frame in card_frames(read_frames(filename)):
+					yield start(filename + "#" + str(number), frame)
+			else:
+				yield start(filename)
+
+	def split(cards):
+		for card in cards:
+			if "sheet" in card:
+				for part in split_sheet(card, start):
+					yield part
+			else:
+				yield card
+
+	return run_pipeline(split(run_pipeline(cards(), images, QUEUE_SIZE)), names, QUEUE_SIZE)
+
+"""
+Parameters
+----------
+ card: dictionary (a photo with a "sheet" of crops, see crop_stage())
+
+ start: function making a new card dictionary from a filename (see process_cards())
+
+Returns
+----------
+ generator of card dictionaries
+
+Splits a photo of several cards into one card per crop. Each one is looked up in the checkpoint under its own name,
+and gets its own OCR cache key (the hash of its crop), so a card that was read before skips OCR even if the photo it
+is in has changed. Its telemetry span gets an even share of the photo's load and crop time.
+"""
+def split_sheet(card, start):
+	crops = card.pop("sheet")
+	for number in range(len(crops)):
+		part = start(card["filename"] + "#card " + str(number + 1))
+		for name in card["span"]["ms"]:
+			part["span"]["ms"][name] = card["span"]["ms"][name] / len(crops)
+		part["span"]["sheet"] = True
+		if "data" in part:
+			yield part
+			continue
+
+		part["key"] = image_key(crops[number].tobytes(), OCR_PARAMS)
+		cached = get_ocr_cache().get(part["key"])
+		if cached:
+			part["name"] = cached[0]
+			part["span"]["ocr_cached"] = True
+			print(part["name"])	# print name of card, like text_detect() does
+		else:
+			part["crop"] = crops[number]
+		yield part
+
+"""
+Parameters
+----------
+ card: dictionary
+
+Returns
+----------
+ data: tuple, or None if the user typed 'quit'
+
+Asks the user for the name of a card that couldn't be found, showing the closest known names (if any) so one can be
+picked by number, and where the thumbnail of its title is saved. Keeps asking until a name is found.
+"""
+def ask_for_card(card):
+	print("Error processing card in file \"" + card["filename"] + "\". Program read \"" + card["name"] + "\" as name of card.")
+	if card.get("thumbnail"):
+		print("Title image: " + card["thumbnail"])
+	candidates = card.get("candidates", [])
+	for k in range(len(candidates)):
+		print(" " + str(k + 1) + ": " + candidates[k])
+
+	while True:
+		name = str(input("Please enter the number of a suggestion or the name of the card (ensure that spelling and punctuation are correct): "))
+
+		if name == "quit":
+			return None
+
+		if name.isdigit() and 0 < int(name) <= len(candidates):	# picked a suggestion
+			name = candidates[int(name) - 1]
+
+		data = get_data(name)
+		if data:
+			return data
+		print("No card named \"" + name + "\" was found.")
+
+"""
+Parameters
+----------
+ cards: iterable of card dictionaries (see process_cards())
+
+ review: ReviewQueue
+
+ answers: {string: string} (image file -> card name, see review_queue.read_answers()) or None
+
+ interactive: bool
+
+Returns
+----------
+ generator of card dictionaries, each with "data", and then None if the run can't be finished
+
+Passes on every card that was resolved and holds back the ones that weren't in review, along with the thumbnail of
+their title strip, so a misread card doesn't stop the cards behind it. Cards named in answers are resolved with that
+name instead of being held back.
+
+Once every other card is done, the held back cards are reviewed one at a time with ask_for_card(); if the user types
+'quit', None is yielded and nothing more. When interactive is False nobody is there to ask, so the review list is
+written out (see ReviewQueue.write()) and None is yielded; running again with the filled in list as answers finishes
+the run, with every card already written skipped thru the checkpoint journal.
+"""
+def resolve_cards(cards, review, answers = None, interactive = True):
+	for card in cards:
+		if not card["data"] and answers and card["filename"] in answers:	# the name was given ahead of time
+			card["data"] = get_data(answers[card["filename"]])
+			if card["data"]:
+				card["span"]["reviewed"] = True
+
+		if card["data"]:
+			yield card
+		else:
+			cached = get_ocr_cache().get(card["key"])	# the OCR stage saved the title strip here
+			review.add(card, cached[1] if cached else None)
+			print("Could not find \"" + card["name"] + "\" (file \"" + card["filename"] + "\"), it will be reviewed at the end.")
+
+	if not interactive:
+		if len(review):
+			print(str(len(review)) + " card(s) need review. Type their names into " + review.write() + " and run again with it as the answers file.")
+			yield None
+		return
+
+	for card in review:
+		data = ask_for_card(card)
+		if data == None:
+			yield None
+			return
+		card["data"] = data
+		card["span"]["reviewed"] = True
+		yield card
+
 
 """
 Parameters
 -----------
- data: tuple
+ data: tuple or CardRecord
 
 Returens
 -----------
  string: string
 
 
-This function takes a tuple passed in the contains card data. It then parses thru that data,forms the desired string of card data
+This function takes a tuple or CardRecord (see card_table.py) passed in the contains card data. It then parses thru that data,forms the desired string of card data
 to be written into the text file, and returns that string.
 """
 def get_card_string(data):
-		if("Land" in data[3]):	# check if card is a Land card
-			string = "Card Name: \"" + data[0] + "\", Type: " + data[3]	# Begin forming string, add name and type
+		card = CardRecord.of(data)	# named fields instead of tuple positions
+		if("Land" in card.type):	# check if card is a Land card
+			string = "Card Name: \"" + card.name + "\", Type: " + card.type	# Begin forming string, add name and type
 
 			string += ", Color Identity(s): "
 			color_id = ""
-			if(data[5] == None):	# Add "None" to string if the card has no color data
+			if(card.color_identity == None):	# Add "None" to string if the card has no color data
 				string += "None"
 			else:					# Add color data
-				for k in data[5]:	# color ID data is in form of array
+				for k in card.color_identity:	# color ID data is in form of array
 					color_id += "/" + k
 				color_id = color_id.strip("/")
 			string += color_id
 		
 			return string
 		else:	# when card is not a land
-			string = "Card Name: \"" + data[0] + "\", Type: " + data[3] + ", Mana Cost: " + data[1] + ", Converted Mana Cost: " + str(data[2])	# begin string, add card name, type, mana cost, and converted mana cost
+			string = "Card Name: \"" + card.name + "\", Type: " + card.type + ", Mana Cost: " + card.mana_cost + ", Converted Mana Cost: " + str(card.cmc)	# begin string, add card name, type, mana cost, and converted mana cost
 		
 			string += ", Color(s): "	# add card colors
 			colors = ""
-			if(data[4] == None):		# add 'none' if card has no color
+			if(card.colors == None):		# add 'none' if card has no color
 				string += "None"
 			else:
-				for j in data[4]:
+				for j in card.colors:
 					colors += "/" + j
 				colors = colors.strip("/")
 			string += colors
 
 			string += ", Color Identity(s): "	# same thing for color ID as adding color
 			color_id = ""
-			if(data[5] == None):
+			if(card.color_identity == None):
 				string += "None"
 			else:
-				for k in data[5]:
+				for k in card.color_identity:
 					color_id += "/" + k
 				color_id = color_id.strip("/")
 			string += color_id
 
-			if("Creature" in data[3]):	# add power and toughness data if card is a creature card
-				string += ", Power: " + str(data[6]) + " Toughness: " + str(data[7])
+			if("Creature" in card.type):	# add power and toughness data if card is a creature card
+				string += ", Power: " + str(card.power) + " Toughness: " + str(card.toughness)
 
-			if("Planeswalker" in data[3]):	# add loyalty counter data if card is Planeswalker card
-				string += ", Loyalty: " + str(data[8])
+			if("Planeswalker" in card.type):	# add loyalty counter data if card is Planeswalker card
+				string += ", Loyalty: " + str(card.loyalty)
 
 			return string
 
@@ -200,160 +867,110 @@ deck_format: string
 
 summary: string
 
+formats: [string]
+
 
 This function takes a list of filenames, the name of a file to save the deck to, the name of the deck, the competition format the deck is for, and a summary of the deck.
-It processes the files contained in filenames, formats, and writes the data it obtains to deck_file. It also calculates other related statistics from the data it obtains and writes
-that to deck_file as well.
+It processes the files contained in filenames, formats, and writes the data it obtains to deck_file. It also calculates other related statistics from the data it obtains (see deck_stats.py) and writes
+that to deck_file as well. workers is the number of threads used for each image stage, and ocr_batch the number of
+title strips read per OCR call (see process_cards()).
+
+Cards are collected in a CardTable (see card_table.py), a few dozen bytes per card, and the deck is written from it
+in one go once every card is resolved (see report_writer.py): the file is written to a temporary file first and
+renamed over deck_file, so deck_file is never left half written. formats lists the reports to write, "text" (the
+usual deck file), "json", and "csv"; the JSON and CSV files are named after deck_file with their own extension.
+Every resolved card is also journaled to deck_file + ".journal" (see checkpoint.py).
+If the run crashes or the user quits, running it again with the same images skips every card in the journal. The
+journal is deleted once the deck is finished.
+
+Cards that can't be found are reviewed after every other card is resolved (see resolve_cards()). answers is the path
+of an answers file naming them ahead of time. With interactive set to False the run never waits for input: if any
+cards are left to review, their list is written to deck_file + ".review" and the deck is left unfinished until it is
+run again with that list, filled in, as answers.
+
+Returns True once deck_file is written, or False if the run stopped before that (the user quit, or cards were left
+for review).
 """
-def create_deck(filenames, deck_file, deck_name, deck_format, summary):
-	deck = open(deck_file, 'w')
-
-	deck.write("=============================" + "\n")	# write deck information to file
-	deck.write("Deck Information" + "\n")
-	deck.write("=============================" + "\n")
-	deck.write("Deck Name: " + deck_name + "\n")
-	deck.write("Summary: " + summary + "\n")
-	deck.write("Format: " + deck_format + "\n" + "\n")
-
-	deck_comp = {"ld" : 0, "c" : 0, "tcc" : 0, "e" : 0, "tec" : 0, "a" : 0, "tac" : 0, 					# initialize dicitonary to track amounts of card types, and total mana costs for those card types
-	"p" : 0, "tpc" : 0, "i" : 0, "tic" : 0, "s" : 0, "tsc" : 0, "total_cards" : 0, "total_cost" : 0}
-
-	cards = []
-	lands = []
-	data = []
+def create_deck(filenames, deck_file, deck_name, deck_format, summary, workers = 1, answers = None, interactive = True, formats = ("text",), ocr_batch = None):
+	check_formats(formats, deck_file)
+
+	table = CardTable()		# every card of the run, in the order it was resolved
+	telemetry.start_run("deck", deck_file)
+	checkpoint = Checkpoint(deck_file + ".journal")	# cards resolved by an earlier, unfinished run
+	review = ReviewQueue(deck_file + ".review")		# cards that couldn't be found, and thumbnails of their titles
+
+	# iterate thru cards as they come out of the pipeline; cards that couldn't be found are asked about at the end
+	for card in resolve_cards(process_cards(filenames, workers, checkpoint, ocr_batch), review, read_answers(answers) if answers else None, interactive):
+		if card == None:	# quit if user types 'quit'; the journal keeps every card so far, deck_file isn't touched
+			checkpoint.close()
+			finish_run()
+			return False
+
+		table.append(card["data"])
+		with telemetry.stage(card["span"], "write"):
+			if not card.get("resumed"):	# journal the card so a rerun can skip it
+				checkpoint.record(card["filename"], card["data"])
+		telemetry.record(card["span"])
+
+	# write the deck, statistics included, all at once from the table (see report_writer.py and deck_stats.py)
+	stats = deck_statistics(table)
+	cards, lines = report_cards(table)
+	write_report(deck_file, formats, "Deck", [("Deck Name", deck_name), ("Summary", summary), ("Format", deck_format)],
+		cards, lines, (stats, statistics_lines(stats)))
+
+	checkpoint.finish()	# the deck is written, so the journal and review list are no longer needed
+	review.finish()
+	finish_run()
+	return True
 
-	# iterate thru array
-	for i in filenames:
 
-		data = process_card(i)	# process a card
-	
-		# if tuple is empty, meaning no data was found, print error message, ask for user input of correct card name
-		while not data:
-			print("Error processing card in file \"" + i + "\". Program read \"" + text_detect(crop_thresh(i)) + "\" as name of card.")
-			name = str(input("Please enter the name of the card that was unable to be processed (ensure that spelling and punctuation are correct): "))
-
-			if name == "quit":	# quit if user types 'quit'
-				deck.close()
-				return
-
-			data = get_data(name)
-
-		key1 = ""
-		key2 = ""
-
-
-		# get keys for dictionary to add to values
-		if(("Creature" in data[3] and "Artifact" in data[3]) or "Creature" in data[3]):
-			key1 = "c"
-			key2 = "tcc"
-		elif("Enchant" in data[3]):
-			key1 = "e"
-			key2 = "tec"
-		elif("Artifact" in data[3]):
-			key1 = "a"
-			key2 = "tac"
-		elif("Planeswalker" in data[3]):
-			key1 = "p"
-			key2 = "tpc"
-		elif("Instant" in data[3]):
-			key1 = "i"
-			key2 = "tic"
-		elif("Sorcery" in data[3]):
-			key1 = "s"
-			key2 = "tsc"
-		elif("Land" in data[3]):
-			key1 = "ld"
-
-		# add 1 to the specific card type value in dictionary
-		deck_comp[key1] += 1.0
-		deck_comp["total_cards"] += 1.5
-		deck_comp["total_cost"] += data[2]
-
-		# If card is not a land, add mana cost to key containing total mana cost of a card type
-		if(key1 != "ld"):
-			deck_comp[key2] += data[2]
-
-		string = get_card_string(data)	# get the string of data to be written to file
-
-		# add string to either lands or cards array
-		if("Land" in data[3]):
-			lands.append(string)
-		else:
-			cards.append(string)
-
-	# write cards to file
-	deck.write("=============================" + "\n")
-	deck.write("Cards" + "\n")
-	deck.write("=============================" + "\n")
-
-	# write non-land cards first
-	for i in cards:
-		deck.write(i + "\n")
-
-	# write land cards last
-	for j in lands:
-		deck.write(j + "\n")
-
-	# write deck statistics to file
-	deck.write("\n" + "=============================" + "\n")
-	deck.write("Deck Statistics " + "\n")
-	deck.write("=============================" + "\n")
-	deck.write("Total Cards: " + str(deck_comp["total_cards"]) + "\n")
-	deck.write("Total Mana Cost: " + str(deck_comp["total_cost"]) + "\n")
-	deck.write("Average Mana Cost: ")
-
-	# try to calculate average mana costs, if there's a divide by zero error, write 0.0 to file instead
-	# Do this for all card types
-	try: 
-		deck.write(str(deck_comp["total_cost"]/(deck_comp["total_cards"] - deck_comp["ld"])) + "\n")
-	except:
-		deck.write("0.0" + "\n")
-
-	deck.write("Total Creature Count: " + str(deck_comp["c"]) + "\n")
-	deck.write("Average Creature Cost: ")
-	try:
-		deck.write(str(deck_comp["tcc"]/deck_comp["c"]) + "\n")
-	except:
-		deck.write("0.0" + "\n")
+"""
+Parameters:
+--------------
+filenames: [string]
 
-	deck.write("Total Enchantment Count: " + str(deck_comp["e"]) + "\n")
-	deck.write("Average Enchantment Cost: ")
-	try:
-		deck.write(str(deck_comp["tec"]/deck_comp["e"]) + "\n")
-	except:
-		deck.write("0.0" + "\n")
+collection_file: string
 
-	deck.write("Total Instant Count: " + str(deck_comp["i"]) + "\n")
-	deck.write("Average Instant Count: ")
-	try:
-		deck.write(str(deck_comp["tic"]/deck_comp["i"]) + "\n")
-	except:
-		deck.write("0.0" + "\n")
+collection_name: string
 
-	deck.write("Total Sorcery Count: " + str(deck_comp["s"]) + "\n")
-	deck.write("Average Sorcery Cost: ")
-	try:
-		deck.write(str(deck_comp["tsc"]/deck_comp["s"]) + "\n")
-	except:
-		deck.write("0.0" + '\n')
-
-	deck.write("Total Artifact Count: " + str(deck_comp["a"]) + "\n")
-	deck.write("Average Artifact Cost: ")
-	try: 
-		deck.write(str(deck_comp["tac"]/deck_comp["a"]) + "\n")
-	except:
-		deck.write("0.0" + "\n")
-
-	deck.write("Total Planeswalker Count: " + str(deck_comp["p"]) + "\n")
-	deck.write("Average Planeswalker Cost: ")
-	try:
-		deck.write(str(deck_comp["tpc"]/deck_comp["p"]) + "\n")
-	except:
-		deck.write("0.0" + "\n")
+summary: string
 
-	deck.write("Total Lands: " + str(deck_comp["ld"]) + "\n")
-	deck.close()
+formats: [string]
 
+This function is similar to create_deck(). It takes a list of file names, a file name to save the collectin to, the name of the collection, and a summary of 
+the collection. This function does everything the create_deck() function does except calculate any statistics for the collection.
+workers is the number of threads used for each image stage (see process_cards()). Like create_deck(), resolved cards
+are journaled to collection_file + ".journal" so an unfinished run can be resumed, and answers, interactive,
+formats, and ocr_batch work the same way. Returns True once collection_file is written, as create_deck() does.
+"""
+def create_collection(filenames, collection_file, collection_name, summary, workers = 1, answers = None, interactive = True, formats = ("text",), ocr_batch = None):
+	check_formats(formats, collection_file)
+
+	table = CardTable()		# every card of the run, in the order it was resolved
+	telemetry.start_run("collection", collection_file)
+	checkpoint = Checkpoint(collection_file + ".journal")	# cards resolved by an earlier, unfinished run
+	review = ReviewQueue(collection_file + ".review")		# cards that couldn't be found, and thumbnails of their titles
+
+	# iterate thru cards as they come out of the pipeline; cards that couldn't be found are asked about at the end
+	for card in resolve_cards(process_cards(filenames, workers, checkpoint, ocr_batch), review, read_answers(answers) if answers else None, interactive):
+		if card == None:
+			checkpoint.close()
+			finish_run()
+			return False
+
+		table.append(card["data"])
+		with telemetry.stage(card["span"], "write"):
+			if not card.get("resumed"):	# journal the card so a rerun can skip it
+				checkpoint.record(card["filename"], card["data"])
+		telemetry.record(card["span"])
+
+	cards, lines = report_cards(table)
+	write_report(collection_file, formats, "Collection", [("Collection Name", collection_name), ("Summary", summary)], cards, lines)
+
+	checkpoint.finish()
+	review.finish()
+	finish_run()
+	return True
 
 """
 Parameters:
@@ -366,58 +983,116 @@ collection_name: string
 
 summary: string
 
-This function is similar to create_deck(). It takes a list of file names, a file name to save the collectin to, the name of the collection, and a summary of 
-the collection. This function does everything the create_deck() function does except calculate any statistics for the collection.
+removed: [string]
+
+formats: [string]
+
+Incremental version of create_collection(). The collection is kept in an index next to the report,
+collection_file + ".index.db" (see collection_index.py), which remembers every image already added, the card it
+was, and how many of each card there are. Only images in filenames that aren't in the index yet (or have changed
+since) go thru the pipeline, and images in removed are taken out, so adding ten cards to a collection of twenty
+thousand only reads ten images. collection_file is then written again from the index, one line per card with its
+quantity. workers, answers, interactive, formats, and ocr_batch work the same as in create_collection(); if the user quits,
+the cards added so far stay in the index. Returns True once collection_file is written, as create_deck() does.
 """
-def create_collection(filenames, collection_file, collection_name, summary):
-	collection = open(collection_file, 'w')
+def update_collection(filenames, collection_file, collection_name, summary, workers = 1, removed = (), answers = None, interactive = True, formats = ("text",), ocr_batch = None):
+	check_formats(formats, collection_file)
+	index = CollectionIndex(collection_file + ".index.db")
+	for filename in removed:
+		if not index.remove(filename):
+			print("\"" + filename + "\" is not in the collection.")
+
+	telemetry.start_run("update", collection_file)
+	review = ReviewQueue(collection_file + ".review")
+
+	# images already in the index come out of the pipeline as "resumed" without being read again
+	for card in resolve_cards(process_cards(filenames, workers, index, ocr_batch), review, read_answers(answers) if answers else None, interactive):
+		if card == None:
+			index.close()
+			finish_run()
+			return False
+
+		if not card.get("resumed"):
+			with telemetry.stage(card["span"], "write"):
+				index.add(card["filename"], card.get("key"), card["data"])
+		telemetry.record(card["span"])
+
+	review.finish()
+	write_collection_report(index, collection_file, collection_name, summary, formats)
+	index.close()
+	finish_run()
+	return True
 
-	# write collection information
-	collection.write("=============================" + "\n")
-	collection.write("Collection Information" + "\n")
-	collection.write("=============================" + "\n")
-	collection.write("Collection Name: " + collection_name + "\n")
-	collection.write("Summary: " + summary + "\n" + "\n")
+"""
+Parameters
+-----------
+ index: CollectionIndex
 
-	cards = []
-	lands = []
-	data = []
-
-	# iterate thru list of filenames
-	for i in filenames:
-		data = process_card(i)
-	
-		# if no data in tuple, print error message,continuously asks user for correct card name while it cannot find data for the given card name
-		while not data:
-			print("Error processing card in file \"" + i + "\". Program read \"" + text_detect(crop_thresh(i)) + "\" as name of card.")
-			name = str(input("Please enter the name of the card that was unable to be processed (ensure that spelling and punctuation are correct): "))
+ collection_file: string
 
-			if name == "quit":
-				collection.close()
-				return
+ collection_name: string
 
-			data = get_data(name)
+ summary: string
 
-		string = get_card_string(data)	# get string of card data
+ formats: [string]
 
-		# append string to correct list
-		if("Land" in data[3]):
-			lands.append(string)
-		else:
-			cards.append(string)
+Writes the collection report for everything in index in each of formats: the same header and card lines as
+create_collection(), with each distinct card listed once with its quantity, and land cards last.
+"""
+def write_collection_report(index, collection_file, collection_name, summary, formats = ("text",)):
+	table = CardTable()
+	quantities = []
+	for data, quantity in index.cards():
+		table.append(data)
+		quantities.append(quantity)
+
+	cards, lines = report_cards(table, quantities)
+	write_report(collection_file, formats, "Collection", [("Collection Name", collection_name), ("Summary", summary)], cards, lines)
 
-	# write cards to file
-	collection.write("=============================" + "\n")
-	collection.write("Cards" + "\n")
-	collection.write("=============================" + "\n")
+"""
+Parameters
+-----------
+ table: CardTable
 
-	for i in cards:
-		collection.write(i + "\n")
+ quantities: [int] or None (quantity of the card in each row)
 
-	for j in lands:
-		collection.write(j + "\n")
+Returns
+-----------
+ cards: [(CardRecord, int or None)]
 
-	collection.close()
+ lines: [string]
+
+The cards of table in the order they are listed in a report (land cards last, see CardTable.lands_last()), and
+the text line of each.
+"""
+def report_cards(table, quantities = None):
+	cards = []
+	lines = []
+	for row in table.lands_last():
+		record = table.record(row)
+		quantity = quantities[row] if quantities else None
+		cards.append((record, quantity))
+		lines.append(get_card_string(record) + (", Quantity: " + str(quantity) if quantity != None else ""))
+	return cards, lines
+
+"""
+Parameters
+-----------
+ image_file: string
+
+Returns
+-----------
+ generator of strings
+
+Reads image file paths from image_file, one per line, without loading the whole file into memory. Blank lines are
+skipped and new line characters are stripped.
+"""
+def read_image_list(image_file):
+	with open(image_file, 'r') as file:
+		for line in file:
+			line = line.strip()
+			if line:
+				yield line
 
 """
 main() function provides means for user to interact with program thru the terminal. The program will run until the user types 
@@ -489,10 +1164,12 @@ def main():
 				print("===============")
 				print("Cards Processed")
 				print("===============")
-				create_deck(cards, file_name, name, form, summary)
+				create_deck(cards, file_name, name, form, summary, os.cpu_count())
 				print("======================================================================")
 				print("Deck creation finished! Check " + file_name)
 				print("======================================================================")
+				print("Card lookups: " + str(get_lookup_cache().stats["hits"]) + " cached, " + str(get_lookup_cache().stats["negative_hits"]) + " cached not found, " + str(get_lookup_cache().stats["misses"]) + " looked up")
+				print(telemetry.summary())
 			elif "text" in choice:
 				# get text file with image file paths
 				image_file = str(input("Input file path with image file paths or 'quit' to quit the program: "))
@@ -500,12 +1177,8 @@ def main():
 				if image_file == "quit":
 					return
 
-				# read file paths into an array
-				file = open(image_file, 'r')
-				card_list = file.readlines()
-				file.close()
-				for i in range(len(card_list) - 1):
-					card_list[i] = card_list[i].strip()	# strip new line character from each element
+				# read file paths one line at a time as the deck is created
+				card_list = read_image_list(image_file)
 
 				# create deck
 				print("=============================================================================================")
@@ -513,10 +1186,12 @@ def main():
 				print("===============")
 				print("Cards Processed")
 				print("===============")
-				create_deck(card_list, file_name, name, form, summary)
+				create_deck(card_list, file_name, name, form, summary, os.cpu_count())
 				print("======================================================================")
 				print("Deck creation finished! Check " + file_name)
 				print("======================================================================")
+				print("Card lookups: " + str(get_lookup_cache().stats["hits"]) + " cached, " + str(get_lookup_cache().stats["negative_hits"]) + " cached not found, " + str(get_lookup_cache().stats["misses"]) + " looked up")
+				print(telemetry.summary())
 		elif choice == "collection":	# make collection if user wants a collection
 			cards = []
 			name = str(input("Input name of collection or 'quit' to quit the program: ")) # get collection name
@@ -559,21 +1234,19 @@ def main():
 				print("===============")
 				print("Cards Processed")
 				print("===============")
-				create_collection(cards, file_name, name, summary)
+				create_collection(cards, file_name, name, summary, os.cpu_count())
 				print("======================================================================")
 				print("Colleciton creation finished! Check " + file_name)
 				print("======================================================================")
+				print("Card lookups: " + str(get_lookup_cache().stats["hits"]) + " cached, " + str(get_lookup_cache().stats["negative_hits"]) + " cached not found, " + str(get_lookup_cache().stats["misses"]) + " looked up")
+				print(telemetry.summary())
 			elif "text" in choice:	# text file image file path entry
 				image_file = str(input("Input file path with image file names or 'quit' to quit the program: "))
 
 				if image_file == "quit":
 					return
 
-				file = open(image_file, 'r')
-				card_list = file.readlines()
-				file.close()
-				for i in range(len(card_list) - 1):
-					card_list[i] = card_list[i].strip()
+				card_list = read_image_list(image_file)
 
 				# create collection
 				print("===================================================================================================")
@@ -581,10 +1254,135 @@ def main():
 				print("===============")
 				print("Cards Processed")
 				print("===============")
-				create_collection(card_list, file_name, name, summary)
+				create_collection(card_list, file_name, name, summary, os.cpu_count())
 				print("======================================================================")
 				print("Collection creation finished! Check " + file_name)
 				print("======================================================================")
+				print("Card lookups: " + str(get_lookup_cache().stats["hits"]) + " cached, " + str(get_lookup_cache().stats["negative_hits"]) + " cached not found, " + str(get_lookup_cache().stats["misses"]) + " looked up")
+				print(telemetry.summary())
+
+"""
+Parameters
+-----------
+ images: [string] (image paths, glob patterns, or '-')
+ lists: [string] (files of image paths, one per line, see read_image_list())
+
+Returns
+-----------
+ generator of strings
+
+Image paths for a command line run. Patterns such as "photos/*.jpg" are expanded here, so they work the same in
+shells that don't expand them (like the Windows command prompt), and '-' reads paths from standard input, one per line.
+"""
+def image_paths(images, lists):
+	for image in images:
+		if image == "-":
+			for line in sys.stdin:
+				if line.strip():
+					yield line.strip()
+		elif glob.has_magic(image):
+			for filename in sorted(glob.glob(image)):
+				yield filename
+		else:
+			yield image
 
-main()
+	for image_file in lists:
+		for filename in read_image_list(image_file):
+			yield filename
 
+"""
+Returns
+-----------
+ parser: argparse.ArgumentParser
+"""
+def argument_parser():
+	parser = argparse.ArgumentParser(prog = "FinalProject.py", description = "MTG Cataloger: turns photos of Magic: The "
+		"Gathering cards into deck and collection files. Run without arguments for the interactive prompt.")
+	commands = parser.add_subparsers(dest = "command", required = True)
+
+	scan = argparse.ArgumentParser(add_help = False)	# options shared by deck and collection
+	scan.add_argument("output", help = "file to save the deck or collection to")
+	scan.add_argument("images", nargs = "*", help = "image or video paths or glob patterns; '-' reads paths from standard input")
+	scan.add_argument("--list", action = "append", default = [], metavar = "FILE", help = "file of image paths, one per line")
+	scan.add_argument("--name", default = "", help = "deck or collection name")
+	scan.add_argument("--summary", default = "", help = "deck or collection summary")
+	scan.add_argument("--workers", type = int, default = os.cpu_count(), help = "threads for each image stage")
+	scan.add_argument("--ocr-batch", type = int, default = OCR_BATCH, metavar = "N", help = "title strips read per OCR call (default " + str(OCR_BATCH) + "; 16 or so speeds up bulk jobs)")
+	scan.add_argument("--answers", metavar = "FILE", help = "review list with the names of cards that couldn't be read")
+	scan.add_argument("--batch", action = "store_true", help = "never ask for input; save cards that couldn't be read for review")
+	scan.add_argument("--report", action = "append", choices = FORMATS, help = "report format to write (repeat for more than one; default text)")
+
+	deck = commands.add_parser("deck", parents = [scan], help = "create a deck file")
+	deck.add_argument("--format", default = "", dest = "deck_format", help = "deck format, e.g. Standard")
+
+	collection = commands.add_parser("collection", parents = [scan], help = "create or update a collection file")
+	collection.add_argument("--update", action = "store_true", help = "add the images to the collection kept next to output")
+	collection.add_argument("--remove", action = "append", default = [], metavar = "IMAGE", help = "image to take out of the collection (with --update)")
+
+	lookup = commands.add_parser("lookup", help = "print the card data of card names")
+	lookup.add_argument("names", nargs = "+", help = "card names")
+
+	return parser
+
+"""
+Parameters
+-----------
+ argv: [string] (command line arguments, without the program name)
+
+Returns
+-----------
+ status: int (0 if everything worked, 1 if a card name wasn't found or couldn't be looked up, REVIEW_STATUS if the
+ deck or collection wasn't written because cards are left for review or the user quit)
+
+Runs one command from the command line (see argument_parser() or "python FinalProject.py --help"):
+
+ python FinalProject.py deck deck.txt photos/*.jpg --name "Mono Red" --format Standard
+ python FinalProject.py collection binder.txt --list images.txt --update --batch --report text --report csv
+ python FinalProject.py collection binder.txt photos/*.jpg --batch --ocr-batch 16
+ python FinalProject.py lookup "Lightning Bolt" "Counterspell"
+"""
+def command_line(argv):
+	parser = argument_parser()
+	args = parser.parse_args(argv)
+
+	if args.command == "lookup":
+		status = 0
+		for name in args.names:
+			try:
+				data = get_data(name)
+			except APIError as error:
+				print("Could not look up \"" + name + "\": " + str(error), file = sys.stderr)
+				return 1
+			if data:
+				print(get_card_string(data))
+			else:
+				print("Card \"" + name + "\" not found.", file = sys.stderr)
+				status = 1
+		return status
+
+	if "-" in args.images and not args.batch:	# standard input is the list of paths, so there is nobody to ask about cards
+		parser.error("reading image paths from standard input ('-') needs --batch")
+
+	filenames = image_paths(args.images, args.list)
+	options = {"answers" : args.answers, "interactive" : not args.batch, "formats" : args.report or ["text"], "ocr_batch" : args.ocr_batch}
+	try:
+		check_formats(options["formats"], args.output)	# before any image is read
+	except ValueError as error:
+		parser.error(str(error))
+	if args.command == "deck":
+		finished = create_deck(filenames, args.output, args.name, args.deck_format, args.summary, args.workers, **options)
+	elif args.update:
+		finished = update_collection(filenames, args.output, args.name, args.summary, args.workers, args.remove, **options)
+	else:
+		finished = create_collection(filenames, args.output, args.name, args.summary, args.workers, **options)
+
+	print("Card lookups: " + str(get_lookup_cache().stats["hits"]) + " cached, " + str(get_lookup_cache().stats["negative_hits"]) + " cached not found, " + str(get_lookup_cache().stats["misses"]) + " looked up")
+	print(telemetry.summary())
+	return 0 if finished else REVIEW_STATUS
+
+# only start when run as a script, so this file can be imported as a library (and by worker processes) without
+# starting anything; with arguments, run one command, otherwise the interactive prompt
+if __name__ == "__main__":
+	if len(sys.argv) > 1:
+		sys.exit(command_line(sys.argv[1:]))
+	main()
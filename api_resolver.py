@@ -0,0 +1,243 @@
+import json
+import random
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from lazy_import import lazy_import
+
+futures = lazy_import("concurrent.futures")		# both are only loaded once the first request is sent
+http_client = lazy_import("http.client")
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - batched MTG API resolver
+"""
+
+API_URL = "https://api.magicthegathering.io/v1/cards"
+
+NAMES_PER_QUERY = 50	# card names ORed together in one request; keeps the URL well under common length limits
+PAGE_SIZE = 100			# most cards the API returns per page
+
+# fields of the API's card objects, in the order of the tuples used everywhere else (see get_card_string())
+FIELDS = ["name", "manaCost", "cmc", "type", "colors", "colorIdentity", "power", "toughness", "loyalty"]
+
+
+"""
+Raised when a request still fails after every retry.
+"""
+class APIError(Exception):
+	pass
+
+
+"""
+The TokenBucket class limits how often requests are sent. It holds up to burst tokens and gains rate tokens per
+second; every request takes one, waiting if there are none. The MTG API allows 5000 requests an hour, so the
+defaults stay under that even with a burst at the start of a run.
+"""
+class TokenBucket:
+
+	"""
+	Parameters
+	-----------
+	 rate: float (tokens per second)
+	 burst: int
+	"""
+	def __init__(self, rate = 1.2, burst = 10):
+		self.rate = rate
+		self.burst = burst
+		self.tokens = burst
+		self.updated = time.monotonic()
+		self.lock = threading.Lock()
+
+	"""
+	Takes one token, sleeping until one is available.
+	"""
+	def acquire(self):
+		while True:
+			with self.lock:
+				now = time.monotonic()
+				self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+				self.updated = now
+				if self.tokens >= 1:
+					self.tokens -= 1
+					return
+				wait = (1 - self.tokens) / self.rate
+			time.sleep(wait)
+
+
+"""
+Parameters
+-----------
+ card: dictionary (a card object from the API)
+
+Returns
+-----------
+ data: tuple
+"""
+def card_tuple(card):
+	return tuple(card.get(field) for field in FIELDS)
+
+
+"""
+The CardResolver class looks up many card names in a few requests to the MTG API. Names are split into groups of
+NAMES_PER_QUERY and each group is sent as one query, the exact names ORed together:
+
+ GET /v1/cards?name="Lightning Bolt"|"Counterspell"|...&pageSize=100&page=1
+
+A name can have many printings, so a group may need more than one page; paging stops as soon as every name in the
+group has been seen, or the API runs out of cards. Only the fields in FIELDS are kept from each card, and only the
+first printing of each name.
+
+Groups are sent from a pool of workers threads, so at most workers requests are in flight at once. Each thread keeps
+its own keep-alive connection open between requests instead of connecting again every time. Every request first
+takes a token from a TokenBucket, and a failed request (a dropped connection, a 429 "too many requests", or a 5xx
+error) is tried again up to retries times, waiting backoff seconds and doubling the wait each time (or waiting as
+long as the server asks with Retry-After). Request and retry counts are kept in the stats dictionary.
+
+url can point at any server that answers the same way, such as the local mock API in benchmarks/mock_api.py.
+"""
+class CardResolver:
+
+	"""
+	Parameters
+	-----------
+	 url: string
+	 workers: int
+	 rate: float (requests per second)
+	 burst: int
+	 retries: int
+	 backoff: float (seconds)
+	 timeout: float (seconds)
+	"""
+	def __init__(self, url = API_URL, workers = 4, rate = 1.2, burst = 10, retries = 5, backoff = 0.5, timeout = 30):
+		parts = urlsplit(url)
+		self.scheme = parts.scheme
+		self.host = parts.netloc
+		self.path = parts.path
+		self.retries = retries
+		self.backoff = backoff
+		self.timeout = timeout
+		self.bucket = TokenBucket(rate, burst)
+		self.workers = workers
+		self.pool = None	# thread pool, started by the first resolve()
+		self.local = threading.local()
+		self.connections = []	# every thread's connection, so close() can close them all
+		self.lock = threading.Lock()
+		self.stats = {"requests" : 0, "retries" : 0}
+
+	def _connection(self):
+		conn = getattr(self.local, "conn", None)
+		if conn == None:
+			if self.scheme == "https":
+				conn = http_client.HTTPSConnection(self.host, timeout = self.timeout)
+			else:
+				conn = http_client.HTTPConnection(self.host, timeout = self.timeout)
+			self.local.conn = conn
+			with self.lock:
+				self.connections.append(conn)
+		return conn
+
+	"""
+	Parameters
+	-----------
+	 query: string
+
+	Returns
+	-----------
+	 cards: [dictionary]
+
+	Sends one GET request, retrying as described above, and returns the "cards" list of the response.
+	"""
+	def _get(self, query):
+		for attempt in range(self.retries + 1):
+			self.bucket.acquire()
+			with self.lock:
+				self.stats["requests"] += 1
+				if attempt:
+					self.stats["retries"] += 1
+
+			wait = self.backoff * 2 ** attempt * random.uniform(0.5, 1)	# random part keeps threads from retrying in step
+			conn = self._connection()
+			try:
+				conn.request("GET", self.path + "?" + query, headers = {"Accept" : "application/json"})
+				response = conn.getresponse()
+				body = response.read()	# read all of it, so the connection can be used again
+			except (OSError, http_client.HTTPException) as error:
+				conn.close()	# http.client reconnects on the next request
+				failure = error
+			else:
+				if response.status == 200:
+					return json.loads(body)["cards"]
+				failure = APIError("HTTP " + str(response.status) + " from " + self.host)
+				if response.status != 429 and response.status < 500:	# the request itself is wrong, retrying won't help
+					raise failure
+				if response.getheader("Retry-After", "").isdigit():
+					wait = int(response.getheader("Retry-After"))
+
+			if attempt < self.retries:
+				time.sleep(wait)
+
+		raise APIError("request failed after " + str(self.retries) + " retries: " + str(failure))
+
+	"""
+	Parameters
+	-----------
+	 names: [string]
+
+	Returns
+	-----------
+	 found: {string: tuple}
+
+	Looks up one group of names, reading pages until each of them has been found.
+	"""
+	def _resolve_group(self, names):
+		wanted = set(names)
+		found = {}
+		name_query = quote("|".join("\"" + name + "\"" for name in names), safe = "")
+
+		page = 1
+		while wanted:
+			cards = self._get("name=" + name_query + "&pageSize=" + str(PAGE_SIZE) + "&page=" + str(page))
+			for card in cards:
+				if card.get("name") in wanted:	# the API matches loosely, keep exact matches only
+					wanted.discard(card["name"])
+					found[card["name"]] = card_tuple(card)
+			if len(cards) < PAGE_SIZE:	# last page
+				break
+			page += 1
+
+		return found
+
+	"""
+	Parameters
+	-----------
+	 names: iterable of strings
+
+	Returns
+	-----------
+	 found: {string: tuple or None}
+
+	Looks up every name, returning its card data, or None for names that aren't cards. Empty names are never sent.
+	"""
+	def resolve(self, names):
+		names = list(dict.fromkeys(names))	# drop repeats, keep order
+		wanted = [name for name in names if name.strip()]
+		groups = [wanted[k:k + NAMES_PER_QUERY] for k in range(0, len(wanted), NAMES_PER_QUERY)]
+
+		with self.lock:
+			if self.pool == None:
+				self.pool = futures.ThreadPoolExecutor(self.workers)
+
+		found = dict((name, None) for name in names)
+		for result in self.pool.map(self._resolve_group, groups):
+			found.update(result)
+		return found
+
+	def close(self):
+		if self.pool != None:
+			self.pool.shutdown()
+		with self.lock:
+			for conn in self.connections:
+				conn.close()
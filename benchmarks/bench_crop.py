@@ -0,0 +1,101 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))	# import modules from the project folder
+
+import FinalProject
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - crop benchmark
+
+Measures crop_thresh() against the original version (full decode, 0.25 resize, np.argwhere bounding box) on synthetic
+phone-sized photos of a card. Reports the time per image and the peak memory allocated thru numpy/OpenCV arrays, and
+checks that both versions find the same crop:
+
+ python benchmarks/bench_crop.py [number of photos]
+"""
+
+
+"""
+The original crop_thresh(), kept here as the baseline.
+"""
+def crop_thresh_original(filename):
+	img = cv2.imread(filename)
+	rsz_img = cv2.resize(img, None, fx = 0.25, fy = 0.25)
+	blur1 = cv2.GaussianBlur(rsz_img, (11,11), 0, 0)
+	gray = cv2.cvtColor(blur1, cv2.COLOR_BGR2GRAY)
+
+	retval, thresh_gray = cv2.threshold(gray, thresh = 100, maxval = 255, type = cv2.THRESH_BINARY)
+
+	points = np.argwhere(thresh_gray == 0)
+	points = np.fliplr(points)
+
+	x,y,w,h = cv2.boundingRect(points)
+
+	crop = rsz_img[y:y + h, x:x + w]
+
+	return cv2.resize(crop, (715, 1000))
+
+
+"""
+Parameters
+-----------
+ filename: string
+ seed: int
+
+Writes a 4032x3024 JPEG (a 12 megapixel phone photo) of a dark card on a light, slightly noisy table.
+"""
+def make_photo(filename, seed):
+	rng = np.random.default_rng(seed)
+	photo = rng.integers(180, 230, (3024, 4032, 3), dtype = np.uint8)
+	left, top = 900 + int(rng.integers(0, 200)), 300 + int(rng.integers(0, 200))
+	cv2.rectangle(photo, (left, top), (left + 1800, top + 2500), (30, 30, 30), -1)
+	cv2.rectangle(photo, (left + 100, top + 150), (left + 1700, top + 350), (200, 200, 200), -1)	# title bar
+	cv2.imwrite(filename, photo, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+def measure(function, filenames):
+	times = []
+	tracemalloc.start()
+	results = []
+	for filename in filenames:
+		start = time.perf_counter()
+		results.append(function(filename))
+		times.append(time.perf_counter() - start)
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return sorted(times), peak, results
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+	folder = tempfile.mkdtemp()
+	filenames = [os.path.join(folder, str(k) + ".jpg") for k in range(count)]
+	for k in range(count):
+		make_photo(filenames[k], k)
+
+	for label, function in (("original", crop_thresh_original), ("crop_thresh", FinalProject.crop_thresh)):
+		times, peak, results = measure(function, filenames)
+		print(label.ljust(14) + "median " + str(round(1000 * times[len(times) // 2], 1)).rjust(7) + " ms   max " +
+			str(round(1000 * times[-1], 1)).rjust(7) + " ms   peak memory " + str(round(peak / 1024 / 1024, 1)).rjust(7) + " MB")
+
+		if label == "original":
+			baseline = results
+		else:
+			# the two versions decode at slightly different scales, so compare the crops loosely
+			error = max(float(np.mean(np.abs(a.astype(np.int16) - b.astype(np.int16)))) for a, b in zip(baseline, results))
+			print("largest mean pixel difference from original: " + str(round(error, 2)))
+
+	for filename in filenames:
+		os.remove(filename)
+	os.rmdir(folder)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))	# import modules from the project folder
+
+import ocr_backend
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - OCR batching benchmark
+
+Compares reading card title strips one OCR call per card (ocr_backend.image_to_string()) against stacking them into
+pages of several strips (ocr_backend.images_to_strings()). Title strips are drawn with OpenCV, so Tesseract is the only
+thing needed to run it:
+
+ python benchmarks/bench_ocr_batch.py [number of strips] [batch size]
+"""
+
+NAMES = ["Lightning Bolt", "Counterspell", "Llanowar Elves", "Serra Angel", "Dark Ritual", "Giant Growth",
+	"Wrath of God", "Birds of Paradise", "Shivan Dragon", "Swords to Plowshares", "Sol Ring", "Brainstorm",
+	"Forest", "Island", "Mountain", "Plains", "Swamp", "Grizzly Bears", "Hill Giant", "Opt"]
+
+
+"""
+Parameters
+-----------
+ name: string
+
+Returns
+-----------
+ strip: Image
+
+Draws name in black on a light 485x50 strip, the same size as the window text_detect() reads.
+"""
+def make_strip(name):
+	strip = np.full((50, 485, 3), 225, np.uint8)
+	cv2.putText(strip, name, (8, 36), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2, cv2.LINE_AA)
+	return strip
+
+def clean(text):
+	return " ".join("".join(ch for ch in text if ch.isalnum() or ch in " -,'").split())
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+	batch = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+	names = [NAMES[k % len(NAMES)] for k in range(count)]
+	strips = [make_strip(name) for name in names]
+
+	print("OCR backend: " + ocr_backend.BACKEND + ", " + str(count) + " strips")
+
+	start = time.perf_counter()
+	single = [clean(ocr_backend.image_to_string(strip)) for strip in strips]
+	single_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	batched = []
+	for k in range(0, count, batch):
+		batched += [clean(text) for text in ocr_backend.images_to_strings(strips[k:k + batch])]
+	batched_time = time.perf_counter() - start
+
+	for label, seconds, texts in (("one call per card", single_time, single), ("batches of " + str(batch), batched_time, batched)):
+		correct = sum(1 for k in range(count) if texts[k] == names[k])
+		print(label.ljust(20) + str(round(1000 * seconds / count, 1)).rjust(8) + " ms/card" +
+			str(round(count / seconds, 1)).rjust(10) + " cards/s" + str(correct).rjust(8) + "/" + str(count) + " correct")
+
+if __name__ == "__main__":
+	main()
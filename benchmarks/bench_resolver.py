@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))	# import modules from the project folder
+
+from api_resolver import CardResolver
+from mock_api import MockAPI
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - API resolver benchmark
+
+Looks up a list of card names in the local mock API (mock_api.py) one request per name, the way lookup_card() used
+to, and then all at once with CardResolver.resolve(). Reports the time and number of requests of each, and checks
+that both found the same cards. A tenth of the names aren't cards, and every 25th request fails, so not-found names
+and retries are part of the run:
+
+ python benchmarks/bench_resolver.py [number of names] [API latency in ms]
+"""
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+	latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+
+	cards = [("Card " + str(k).zfill(4), "{" + str(k % 7) + "}", float(k % 7), "Creature — Test", None, None, "1", "1", None)
+		for k in range(count)]
+	names = [cards[k][0] if k % 10 else "Not A Card " + str(k) for k in range(count)]
+
+	mock = MockAPI(cards, latency, printings = 4, fail_every = 25)
+	results = {}
+	for label, batched in (("one per name", False), ("batched", True)):
+		resolver = CardResolver(mock.url, rate = 1000, burst = 1000, backoff = 0.01)	# the mock has no rate limit
+		start = time.perf_counter()
+		if batched:
+			found = resolver.resolve(names)
+		else:
+			found = {}
+			for name in names:
+				found.update(resolver.resolve([name]))
+		seconds = time.perf_counter() - start
+		resolver.close()
+
+		results[label] = found
+		print(label.ljust(14) + str(round(seconds, 2)).rjust(8) + " s" + str(resolver.stats["requests"]).rjust(8) + " requests" +
+			str(resolver.stats["retries"]).rjust(6) + " retries" + str(sum(1 for name in found if found[name])).rjust(8) + " found")
+
+	mock.close()
+	print("same results: " + str(results["one per name"] == results["batched"]))
+
+if __name__ == "__main__":
+	main()
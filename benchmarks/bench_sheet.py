@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))	# import modules from the project folder
+
+import FinalProject
+from card_sheet import find_cards, warp_card
+from corpus import CARDS, draw_photo, draw_sheet
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - card sheet benchmark
+
+Compares photographing a 3x3 page of cards in one shot with photographing each card on its own. Both are phone-sized
+JPEGs; for each card, the benchmark reports the time to load the photo and crop the card out of it (load_image(),
+then find_cards() and warp_card() for a page, crop_image() for a single card), and checks that every card on every
+page is found:
+
+ python benchmarks/bench_sheet.py [number of pages]
+"""
+
+SIZE = (4032, 3024)		# a 12 megapixel phone photo, portrait
+
+
+def per_card(function, filenames, cards):
+	start = time.perf_counter()
+	found = sum(function(filename) for filename in filenames)
+	return 1000 * (time.perf_counter() - start) / cards, found
+
+def crop_single(filename):
+	FinalProject.crop_image(FinalProject.load_image(filename))
+	return 1
+
+def crop_sheet(filename):
+	img = FinalProject.load_image(filename)
+	corners = find_cards(img)
+	for c in corners:
+		warp_card(img, c)
+	return len(corners)
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+	folder = tempfile.mkdtemp()
+	pages = []
+	singles = []
+	for k in range(count):
+		names = [CARDS[(9 * k + j) % len(CARDS)][0] for j in range(9)]
+		pages.append(os.path.join(folder, "page" + str(k) + ".jpg"))
+		cv2.imwrite(pages[-1], draw_sheet(names, k, 3, 3, SIZE), [cv2.IMWRITE_JPEG_QUALITY, 90])
+		for j in range(9):
+			singles.append(os.path.join(folder, str(k) + "-" + str(j) + ".jpg"))
+			cv2.imwrite(singles[-1], draw_photo(names[j], 9 * k + j, SIZE), [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+	single_ms, found = per_card(crop_single, singles, len(singles))
+	sheet_ms, found = per_card(crop_sheet, pages, 9 * count)
+	print("one card per photo   " + str(round(single_ms, 1)).rjust(7) + " ms per card")
+	print("3x3 page per photo   " + str(round(sheet_ms, 1)).rjust(7) + " ms per card (" + str(round(single_ms / sheet_ms, 1)) + "x faster)")
+	print("cards found on pages: " + str(found) + " of " + str(9 * count))
+
+	for filename in pages + singles:
+		os.remove(filename)
+	os.rmdir(folder)
+
+if __name__ == "__main__":
+	main()
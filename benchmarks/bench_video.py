@@ -0,0 +1,104 @@
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))	# import modules from the project folder
+
+from video_scan import card_frames, frame_hash, hash_distance, read_frames
+from corpus import CARDS, draw_photo
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - video scanning benchmark
+
+Records a synthetic video of cards being dealt under a fixed camera: each card slides in, sits still for a moment
+(with camera noise), and slides out, sometimes leaving the table empty in between. Two copies of a card are dealt
+in a row with the table emptied between them. The video is then scanned with video_scan.card_frames(), and the
+benchmark reports how many frames were read, how many were picked, whether one was picked for each card dealt, and
+how fast:
+
+ python benchmarks/bench_video.py [number of cards]
+"""
+
+SIZE = (960, 720)	# recorded frame size, height x width; portrait, like the photos the corpus draws
+FPS = 30
+
+
+"""
+Parameters
+-----------
+ filename: string
+ names: [string]
+
+Returns
+-----------
+ stills: [Image] (one still frame of each card, in the order they were dealt)
+
+Writes the video to filename (Motion JPEG in an AVI file, which every OpenCV build can write).
+"""
+def record(filename, names):
+	rng = np.random.default_rng(0)
+	height, width = SIZE
+	table = rng.integers(185, 235, (height, width, 3), dtype = np.uint8)	# empty table, same background as draw_photo()
+
+	video = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (width, height))
+	stills = []
+
+	def write(frame, count):
+		for k in range(count):
+			noise = rng.integers(-3, 4, frame.shape, dtype = np.int16)
+			video.write(np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+
+	for k in range(len(names)):
+		card = draw_photo(names[k], 1000 + k, SIZE)
+		stills.append(card)
+
+		for step in range(8, 0, -1):	# slide in from the right, over the table
+			shift = np.float32([[1, 0, step * width / 10], [0, 1, 0]])
+			write(cv2.warpAffine(card, shift, (width, height), table.copy(), borderMode = cv2.BORDER_TRANSPARENT), 1)
+		write(card, 20)		# two thirds of a second sitting still
+		if k + 1 < len(names) and (names[k + 1] == names[k] or k % 3 == 2):	# clear the table now and then
+			write(table, 10)
+
+	video.release()
+	return stills
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+
+	names = [CARDS[(k * 5) % len(CARDS)][0] for k in range(count)]
+	names[count // 2] = names[count // 2 - 1]	# two copies in a row
+	filename = os.path.join(tempfile.mkdtemp(), "cards.avi")
+	stills = record(filename, names)
+
+	frames = [0]
+	def counted(stream):	# counts the frames read on the way thru
+		for number, frame in stream:
+			frames[0] += 1
+			yield number, frame
+
+	start = time.perf_counter()
+	picked = list(card_frames(counted(read_frames(filename))))
+	seconds = time.perf_counter() - start
+
+	# match each picked frame to the card it shows by its hash
+	stills = [frame_hash(cv2.resize(still, None, fx = 0.5, fy = 0.5, interpolation = cv2.INTER_AREA)) for still in stills]
+	found = [min(range(len(stills)), key = lambda k: hash_distance(frame_hash(frame), stills[k])) for number, frame in picked]
+
+	video_seconds = cv2.VideoCapture(filename).get(cv2.CAP_PROP_FRAME_COUNT) / FPS
+	print(str(count) + " cards, " + str(round(video_seconds, 1)) + " s of video, " + str(frames[0]) + " frames decoded, " +
+		str(len(picked)) + " picked")
+	print("every card picked once: " + str(found == list(range(count))))
+	print("scan time: " + str(round(seconds, 2)) + " s (" + str(round(frames[0] / seconds, 1)) + " frames/s, " +
+		str(round(len(picked) / seconds, 1)) + " cards/s)")
+
+	os.remove(filename)
+	os.rmdir(os.path.dirname(filename))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,142 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - benchmark corpus
+
+Synthetic card photos with known names, and the card data for those names, used by run_benchmarks.py. The photos are
+drawn with OpenCV from a fixed seed, so every machine gets the same corpus without image files being kept in the
+repository. The card is placed so that its title lands in the window text_detect() reads after crop_thresh().
+"""
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+# card data in the same tuple layout get_data() returns, used as the local stand-in for the MTG API
+CARDS = [
+	("Lightning Bolt", "{R}", 1.0, "Instant", ["R"], ["R"], None, None, None),
+	("Counterspell", "{U}{U}", 2.0, "Instant", ["U"], ["U"], None, None, None),
+	("Llanowar Elves", "{G}", 1.0, "Creature — Elf Druid", ["G"], ["G"], "1", "1", None),
+	("Serra Angel", "{3}{W}{W}", 5.0, "Creature — Angel", ["W"], ["W"], "4", "4", None),
+	("Dark Ritual", "{B}", 1.0, "Instant", ["B"], ["B"], None, None, None),
+	("Giant Growth", "{G}", 1.0, "Instant", ["G"], ["G"], None, None, None),
+	("Wrath of God", "{2}{W}{W}", 4.0, "Sorcery", ["W"], ["W"], None, None, None),
+	("Shivan Dragon", "{4}{R}{R}", 6.0, "Creature — Dragon", ["R"], ["R"], "5", "5", None),
+	("Sol Ring", "{1}", 1.0, "Artifact", None, None, None, None, None),
+	("Pacifism", "{1}{W}", 2.0, "Enchantment — Aura", ["W"], ["W"], None, None, None),
+	("Divination", "{2}{U}", 3.0, "Sorcery", ["U"], ["U"], None, None, None),
+	("Grizzly Bears", "{1}{G}", 2.0, "Creature — Bear", ["G"], ["G"], "2", "2", None),
+	("Liliana Vess", "{3}{B}{B}", 5.0, "Legendary Planeswalker — Liliana", ["B"], ["B"], None, None, "5"),
+	("Forest", None, 0.0, "Basic Land — Forest", None, ["G"], None, None, None),
+	("Island", None, 0.0, "Basic Land — Island", None, ["U"], None, None, None),
+	("Mountain", None, 0.0, "Basic Land — Mountain", None, ["R"], None, None, None),
+]
+
+
+"""
+Parameters
+-----------
+ name: string
+ seed: int
+ size: (int, int)
+
+Returns
+-----------
+ photo: Image
+
+Draws a photo of a card named name lying on a light, noisy table. The card is a dark rectangle with a light title bar,
+and its position and size change with seed.
+"""
+def draw_photo(name, seed, size = (2400, 1800)):
+	rng = np.random.default_rng(seed)
+	height, width = size
+
+	photo = rng.integers(185, 235, (height, width, 3), dtype = np.uint8)
+
+	card_w = int(width * rng.uniform(0.45, 0.55))
+	card_h = int(card_w * 1000 / 715)	# same shape as the crop_thresh() output
+	left = int(rng.integers(40, width - card_w - 40))
+	top = int(rng.integers(40, height - card_h - 40))
+
+	cv2.rectangle(photo, (left, top), (left + card_w, top + card_h), (25, 25, 25), -1)
+
+	# title bar and name, placed where text_detect() looks once the card is cropped and resized to 715x1000
+	sx, sy = card_w / 715, card_h / 1000
+	cv2.rectangle(photo, (left + int(55 * sx), top + int(45 * sy)), (left + int(660 * sx), top + int(105 * sy)), (215, 215, 215), -1)
+	cv2.putText(photo, name, (left + int(75 * sx), top + int(88 * sy)), cv2.FONT_HERSHEY_SIMPLEX, 1.25 * sy, (0, 0, 0),
+		max(1, round(2 * sy)), cv2.LINE_AA)
+
+	return photo
+
+"""
+Parameters
+-----------
+ names: [string] (up to columns * rows of them)
+ seed: int
+ columns: int
+ rows: int
+ size: (int, int)
+
+Returns
+-----------
+ photo: Image
+
+Draws a photo of a page of cards laid out columns x rows, in reading order, like a binder page. Each card is drawn
+the same way as in draw_photo() and then turned by up to a few degrees, as cards in a page or on a table are.
+"""
+def draw_sheet(names, seed, columns = 3, rows = 3, size = (2400, 1800)):
+	rng = np.random.default_rng(seed)
+	height, width = size
+
+	photo = rng.integers(185, 235, (height, width, 3), dtype = np.uint8)
+
+	cell_w, cell_h = width / columns, height / rows
+	card_w = int(min(cell_w * 0.8, cell_h * 0.8 * 715 / 1000))
+	card_h = int(card_w * 1000 / 715)
+
+	for k in range(len(names)):
+		card = np.full((card_h, card_w, 3), 25, np.uint8)
+		sx, sy = card_w / 715, card_h / 1000
+		cv2.rectangle(card, (int(55 * sx), int(45 * sy)), (int(660 * sx), int(105 * sy)), (215, 215, 215), -1)
+		cv2.putText(card, names[k], (int(75 * sx), int(88 * sy)), cv2.FONT_HERSHEY_SIMPLEX, 1.25 * sy, (0, 0, 0),
+			max(1, round(2 * sy)), cv2.LINE_AA)
+
+		center = ((k % columns + 0.5) * cell_w, (k // columns + 0.5) * cell_h)
+		turn = cv2.getRotationMatrix2D((card_w / 2, card_h / 2), rng.uniform(-4, 4), 1)
+		turn[:, 2] += (center[0] - card_w / 2, center[1] - card_h / 2)
+		cv2.warpAffine(card, turn, (width, height), photo, borderMode = cv2.BORDER_TRANSPARENT)
+
+	return photo
+
+
+"""
+Parameters
+-----------
+ count: int
+
+Returns
+-----------
+ corpus: [(string, string)]
+
+Makes sure the first count photos of the corpus exist in CORPUS_DIR, drawing any that are missing, and returns
+(filename, true card name) pairs. Names repeat in a fixed order, the same way real decks repeat cards.
+"""
+def build_corpus(count):
+	os.makedirs(CORPUS_DIR, exist_ok = True)
+
+	corpus = []
+	for k in range(count):
+		name = CARDS[(k * 7) % len(CARDS)][0]
+		filename = os.path.join(CORPUS_DIR, str(k).zfill(4) + ".jpg")
+		if not os.path.exists(filename):
+			cv2.imwrite(filename, draw_photo(name, k), [cv2.IMWRITE_JPEG_QUALITY, 90])
+		corpus.append((filename, name))
+
+	with open(os.path.join(CORPUS_DIR, "truth.json"), 'w') as truth:	# ground truth, for reference
+		json.dump(dict((os.path.basename(f), n) for f, n in corpus), truth, indent = 1)
+
+	return corpus
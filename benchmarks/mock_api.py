@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - local mock of the MTG API
+
+Serves GET /v1/cards on 127.0.0.1 the way api_resolver.CardResolver uses the real API: name is a list of quoted
+names ORed with '|', matched exactly, and results are paged by pageSize and page. Every card is returned printings
+times, as the real API returns every reprint. Each response waits latency seconds, and fail_every makes every n-th
+request fail with a 503 so retries can be checked. Used by run_benchmarks.py and bench_resolver.py:
+
+ mock = MockAPI(cards, latency = 0.1)
+ resolver = CardResolver(mock.url)
+ ...
+ mock.close()
+"""
+
+
+"""
+Parameters
+-----------
+ data: tuple (see corpus.CARDS)
+
+Returns
+-----------
+ card: dictionary, laid out like a card object from the real API
+"""
+def card_object(data):
+	card = {"name" : data[0], "manaCost" : data[1], "cmc" : data[2], "type" : data[3], "colors" : data[4],
+		"colorIdentity" : data[5], "power" : data[6], "toughness" : data[7], "loyalty" : data[8]}
+	card = dict((key, card[key]) for key in card if card[key] != None)	# the API leaves out fields a card doesn't have
+	card.update({"set" : "MOCK", "text" : "Rules text the resolver doesn't need.", "imageUrl" : "http://example.com/card.png"})
+	return card
+
+
+class MockAPI:
+
+	"""
+	Parameters
+	-----------
+	 cards: [tuple]
+	 latency: float (seconds)
+	 printings: int
+	 fail_every: int, or 0 to never fail
+	"""
+	def __init__(self, cards, latency = 0.0, printings = 3, fail_every = 0):
+		self.cards = dict((data[0], card_object(data)) for data in cards)
+		self.latency = latency
+		self.printings = printings
+		self.fail_every = fail_every
+		self.requests = 0
+		self.lock = threading.Lock()
+
+		mock = self
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"	# keep-alive
+			disable_nagle_algorithm = True	# headers and body are written separately, don't hold the body back
+
+			def do_GET(self):
+				mock.handle(self)
+
+			def log_message(self, format, *args):	# don't print every request
+				pass
+
+		self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+		self.server.daemon_threads = True
+		self.url = "http://127.0.0.1:" + str(self.server.server_address[1]) + "/v1/cards"
+		threading.Thread(target = self.server.serve_forever, daemon = True).start()
+
+	def handle(self, request):
+		with self.lock:
+			self.requests += 1
+			count = self.requests
+		time.sleep(self.latency)
+
+		if self.fail_every and count % self.fail_every == 0:
+			self.send(request, 503, {"error" : "Service Unavailable"})
+			return
+
+		url = urlsplit(request.path)
+		query = parse_qs(url.query)
+		names = [name.strip("\"") for name in query.get("name", [""])[0].split("|")]
+		page_size = int(query.get("pageSize", ["100"])[0])
+		page = int(query.get("page", ["1"])[0])
+
+		matches = [self.cards[name] for name in names if name in self.cards for k in range(self.printings)]
+		self.send(request, 200, {"cards" : matches[(page - 1) * page_size:page * page_size]}, {"Total-Count" : str(len(matches))})
+
+	def send(self, request, status, body, headers = {}):
+		body = json.dumps(body).encode()
+		request.send_response(status)
+		request.send_header("Content-Type", "application/json")
+		request.send_header("Content-Length", str(len(body)))
+		for key in headers:
+			request.send_header(key, headers[key])
+		request.end_headers()
+		request.wfile.write(body)
+
+	def close(self):
+		self.server.shutdown()
+		self.server.server_close()
@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))	# import modules from the project folder
+
+import FinalProject
+import ocr_backend
+from api_resolver import CardResolver
+from card_store import CardStore
+from lookup_cache import LookupCache
+from ocr_cache import OCRCache
+from telemetry import Telemetry
+from corpus import CARDS, build_corpus
+from mock_api import MockAPI
+
+try:
+	import resource		# not available on Windows
+except ImportError:
+	resource = None
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - scan-to-catalog benchmark
+
+Runs the synthetic corpus (corpus.py) thru the real pipeline and reports:
+
+ - latency percentiles for each stage (load, crop, OCR, lookup, format) with one card processed at a time
+ - images per second for a whole create_collection() run with several workers, and with --scaling, for 1, 2, 4, ...
+   workers up to --workers, to show how the threaded pipeline scales with the number of cores
+ - peak resident memory
+ - OCR accuracy: how many names text_detect() read exactly right, and how many OCR calls it made per card
+
+The MTG API is replaced by MockAPI (mock_api.py), a local server answering with the corpus card data after a set
+delay, and the card store and caches are pointed at a temporary folder, so every run starts cold and doesn't touch
+the network:
+
+ python benchmarks/run_benchmarks.py --images 64 --workers 4 --save results.json
+ python benchmarks/run_benchmarks.py --images 64 --workers 4 --compare results.json
+"""
+
+STAGES = ["load", "crop", "ocr", "lookup", "format"]
+
+
+"""
+Parameters
+-----------
+ folder: string
+ mock: MockAPI
+
+Points FinalProject at an empty card store and empty caches inside a new folder, and at mock instead of the MTG API.
+"""
+def reset(folder, mock):
+	os.makedirs(folder)
+	FinalProject.api = CardResolver(mock.url, rate = 1000, burst = 1000)	# the mock has no rate limit
+	FinalProject.card_store = CardStore(os.path.join(folder, "cards.db"))
+	FinalProject.lookup_cache = LookupCache(None)
+	FinalProject.ocr_cache = OCRCache(os.path.join(folder, "ocr.db"))
+	FinalProject.telemetry = Telemetry(os.path.join(folder, "telemetry.jsonl"))
+	FinalProject.name_index = None
+	mock.requests = 0
+
+def percentile(values, p):
+	values = sorted(values)
+	return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def peak_rss_mb():
+	if resource == None:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024	# bytes on macOS, kilobytes on Linux
+
+
+"""
+Parameters
+-----------
+ corpus: [(string, string)]
+
+Returns
+-----------
+ times: {stage: [seconds]}
+ correct: int
+ ocr_calls: int
+
+Processes each image one stage at a time, timing every stage and counting the OCR calls text_detect() makes.
+"""
+def run_single(corpus):
+	times = dict((stage, []) for stage in STAGES)
+	correct = 0
+
+	ocr_calls = [0]
+	read = ocr_backend.image_to_string
+	def image_to_string(image):
+		ocr_calls[0] += 1
+		return read(image)
+
+	ocr_backend.image_to_string = image_to_string
+	try:
+		for filename, truth in corpus:
+			correct += single_card(filename, truth, times)
+	finally:
+		ocr_backend.image_to_string = read
+
+	return times, correct, ocr_calls[0]
+
+def single_card(filename, truth, times):
+	start = time.perf_counter()
+	image = FinalProject.load_image(filename)
+	times["load"].append(time.perf_counter() - start)
+
+	start = time.perf_counter()
+	crop = FinalProject.crop_image(image)
+	times["crop"].append(time.perf_counter() - start)
+
+	start = time.perf_counter()
+	name = FinalProject.text_detect(crop)
+	times["ocr"].append(time.perf_counter() - start)
+
+	start = time.perf_counter()
+	data = FinalProject.get_data(name)
+	times["lookup"].append(time.perf_counter() - start)
+
+	start = time.perf_counter()
+	if data:
+		FinalProject.get_card_string(data)
+	times["format"].append(time.perf_counter() - start)
+
+	return name == truth
+
+
+"""
+Parameters
+-----------
+ corpus: [(string, string)]
+ folder: string
+ workers: int
+
+Returns
+-----------
+ seconds: float
+ misread: int
+
+Times create_collection() on the whole corpus. A card the pipeline can't resolve is looked up again by its true name
+(and counted as misread), so the run never stops to ask for input.
+"""
+def run_batch(corpus, folder, workers):
+	truth = dict(corpus)
+	misread = []
+
+	resolve = FinalProject.resolve_stage
+	def resolve_stage(card):
+		card = resolve(card)
+		if not card["data"]:
+			misread.append(card["filename"])
+			card["data"] = FinalProject.get_data(truth[card["filename"]])
+		return card
+
+	FinalProject.resolve_stage = resolve_stage
+	try:
+		start = time.perf_counter()
+		FinalProject.create_collection([f for f, n in corpus], os.path.join(folder, "collection.txt"), "Benchmark", "", workers)
+		return time.perf_counter() - start, len(misread)
+	finally:
+		FinalProject.resolve_stage = resolve
+
+def main():
+	parser = argparse.ArgumentParser(description = "Benchmark the scan-to-catalog pipeline on a synthetic corpus.")
+	parser.add_argument("--images", type = int, default = 32, help = "number of corpus images to use")
+	parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "workers for the batch run")
+	parser.add_argument("--api-latency", type = float, default = 100, help = "milliseconds per stand-in API request")
+	parser.add_argument("--save", help = "save results to this JSON file")
+	parser.add_argument("--compare", help = "compare results with a JSON file saved by --save")
+	parser.add_argument("--scaling", action = "store_true", help = "also time the batch run with 1, 2, 4, ... workers")
+	args = parser.parse_args()
+
+	mock = MockAPI(CARDS, args.api_latency / 1000)
+	corpus = build_corpus(args.images)
+	folder = tempfile.mkdtemp()
+	results = {"images" : args.images, "workers" : args.workers, "cores" : os.cpu_count()}
+
+	with contextlib.redirect_stdout(io.StringIO()):	# text_detect() prints every name
+		reset(os.path.join(folder, "single"), mock)
+		times, correct, ocr_calls = run_single(corpus)
+
+	print("Single card (" + str(args.images) + " images, API latency " + str(args.api_latency) + " ms)")
+	print("stage".ljust(10) + "p50 ms".rjust(10) + "p90 ms".rjust(10) + "p99 ms".rjust(10))
+	for stage in STAGES:
+		row = [1000 * percentile(times[stage], p) for p in (50, 90, 99)]
+		results[stage + "_p50_ms"] = row[0]
+		print(stage.ljust(10) + "".join(str(round(value, 1)).rjust(10) for value in row))
+
+	total = sum(sum(times[stage]) for stage in STAGES)
+	results["single_images_per_s"] = args.images / total
+	results["ocr_accuracy"] = correct / args.images
+	results["ocr_calls_per_card"] = ocr_calls / args.images
+	print("images/s: " + str(round(results["single_images_per_s"], 2)) + "   OCR accuracy: " + str(correct) + "/" + str(args.images) +
+		"   OCR calls per card: " + str(round(results["ocr_calls_per_card"], 2)))
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		reset(os.path.join(folder, "batch"), mock)
+		seconds, misread = run_batch(corpus, os.path.join(folder, "batch"), args.workers)
+
+	scaling = []
+	workers = 1
+	while args.scaling and workers <= args.workers:	# every run starts cold, so each one reads every image again
+		with contextlib.redirect_stdout(io.StringIO()):
+			reset(os.path.join(folder, "scaling" + str(workers)), mock)
+			scaling.append((workers, args.images / run_batch(corpus, os.path.join(folder, "scaling" + str(workers)), workers)[0]))
+		results["batch_images_per_s_" + str(workers) + "_workers"] = scaling[-1][1]
+		workers *= 2
+	mock.close()
+
+	results["batch_images_per_s"] = args.images / seconds
+	results["api_requests"] = mock.requests
+	results["peak_rss_mb"] = peak_rss_mb()
+	print("\nBatch (" + str(args.workers) + " workers): " + str(round(seconds, 2)) + " s, " + str(round(results["batch_images_per_s"], 2)) +
+		" images/s, " + str(mock.requests) + " API requests, " + str(misread) + " misread")
+	print("peak RSS: " + (str(round(results["peak_rss_mb"], 1)) + " MB" if results["peak_rss_mb"] else "not available on this platform"))
+
+	if scaling:
+		print("\nScaling (" + str(os.cpu_count()) + " cores)")
+		for workers, images_per_s in scaling:
+			print(str(workers).rjust(4) + " workers" + str(round(images_per_s, 2)).rjust(10) + " images/s" +
+				str(round(images_per_s / scaling[0][1], 2)).rjust(8) + "x")
+
+	if args.save:
+		with open(args.save, 'w') as file:
+			json.dump(results, file, indent = 1)
+
+	if args.compare:
+		with open(args.compare, 'r') as file:
+			baseline = json.load(file)
+
+		print("\nCompared with " + args.compare + ":")
+		regressed = False
+		for key in sorted(results):
+			if key in ("images", "workers", "cores") or results[key] == None or baseline.get(key) == None:
+				continue
+			change = (results[key] - baseline[key]) / baseline[key] * 100 if baseline[key] else 0.0
+			if key == "ocr_accuracy":	# any drop in accuracy counts
+				worse = change < 0
+			elif key.endswith("_ms") or key.endswith("_mb") or key in ("api_requests", "ocr_calls_per_card"):	# lower is better, allow 10% noise
+				worse = change > 10
+			else:
+				worse = change < -10
+			regressed = regressed or worse
+			print(key.ljust(24) + str(round(baseline[key], 3)).rjust(12) + " -> " + str(round(results[key], 3)).ljust(12) + ("REGRESSION" if worse else ""))
+
+		if regressed:
+			sys.exit(1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,135 @@
+from lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - multi-card sheet detection
+"""
+
+CARD_SIZE = (715, 1000)		# width x height of a cropped card, the size text_detect() reads
+CARD_RATIO = 1000 / 715		# height / width of a card
+RATIO_TOLERANCE = 0.2		# a shape is a card if its height / width is within this fraction of CARD_RATIO
+MIN_AREA = 0.01				# smallest card, as a fraction of the photo's area
+APPROX_EPSILON = 0.02		# outline simplification, as a fraction of the outline's length (see cv2.approxPolyDP())
+
+
+"""
+Parameters
+-----------
+ corners: array of 4 (x, y) points
+
+Returns
+-----------
+ corners: float32 array of 4 (x, y) points
+
+Puts the corners of a card in the order top left, top right, bottom right, bottom left. The top left corner has the
+smallest x + y and the bottom right the largest; the top right has the smallest y - x and the bottom left the largest.
+"""
+def order_corners(corners):
+	corners = np.float32(corners).reshape(4, 2)
+	total = corners.sum(axis = 1)
+	difference = corners[:, 1] - corners[:, 0]
+	return np.float32([corners[np.argmin(total)], corners[np.argmin(difference)], corners[np.argmax(total)],
+		corners[np.argmax(difference)]])
+
+"""
+Parameters
+-----------
+ img: Image
+
+Returns
+-----------
+ mask: Image (white where img is dark)
+
+Blurs img to remove noise, grayscales it, and thresholds it so dark pixels (the cards) become white. crop_image() and
+find_cards() both work from this mask, so crop_stage() makes it once and gives it to both.
+"""
+def card_mask(img):
+	blur = cv2.GaussianBlur(img, (11,11), 0, 0)
+	gray = cv2.cvtColor(blur, cv2.COLOR_BGR2GRAY)
+	retval, mask = cv2.threshold(gray, thresh = 100, maxval = 255, type = cv2.THRESH_BINARY_INV)
+	return mask
+
+"""
+Parameters
+-----------
+ img: Image
+ mask: Image from card_mask(img), or None to make it here
+
+Returns
+-----------
+ cards: [float32 array of 4 (x, y) points]
+
+Finds every card in a photo of several cards (a binder page, or cards laid out on a table), the same way crop_image()
+finds one: the photo is blurred and thresholded so dark pixels become white (see card_mask()). Each separate white
+shape's outline is simplified to a polygon; those with four corners, a card's height / width, and at least MIN_AREA
+of the photo are cards. Cards lying sideways are left out. The cards are returned in reading order, row by row from
+the top, left to right in each row.
+"""
+def find_cards(img, mask = None):
+	if mask is None:
+		mask = card_mask(img)
+
+	contours, hierarchy = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)	# outer outlines only, so the title bar of a card isn't a shape of its own
+
+	cards = []
+	for contour in contours:
+		if cv2.contourArea(contour) < MIN_AREA * mask.size:
+			continue
+
+		outline = cv2.approxPolyDP(contour, APPROX_EPSILON * cv2.arcLength(contour, True), True)
+		if len(outline) != 4 or not cv2.isContourConvex(outline):
+			continue
+
+		corners = order_corners(outline)
+		width = (np.linalg.norm(corners[1] - corners[0]) + np.linalg.norm(corners[2] - corners[3])) / 2
+		height = (np.linalg.norm(corners[3] - corners[0]) + np.linalg.norm(corners[2] - corners[1])) / 2
+		if abs(height / width - CARD_RATIO) <= RATIO_TOLERANCE * CARD_RATIO:
+			cards.append(corners)
+
+	return reading_order(cards)
+
+"""
+Parameters
+-----------
+ cards: [float32 array of 4 (x, y) points]
+
+Returns
+-----------
+ cards: [float32 array of 4 (x, y) points]
+
+Sorts cards into rows from the top, then left to right in each row. A card starts a new row when its center is
+lower than the center of the row's first card by more than half that card's height.
+"""
+def reading_order(cards):
+	cards = sorted(cards, key = lambda corners: corners[:, 1].mean())
+
+	rows = []
+	for corners in cards:
+		if rows and corners[:, 1].mean() - rows[-1][0][:, 1].mean() <= (rows[-1][0][3, 1] - rows[-1][0][0, 1]) / 2:
+			rows[-1].append(corners)
+		else:
+			rows.append([corners])
+
+	return [corners for row in rows for corners in sorted(row, key = lambda corners: corners[:, 0].mean())]
+
+"""
+Parameters
+-----------
+ img: Image
+ corners: float32 array of 4 (x, y) points, in order (see order_corners())
+
+Returns
+-----------
+ card: Image
+
+Cuts the card with the given corners out of img and straightens it to CARD_SIZE, so a card photographed at an angle
+comes out the same as one photographed straight on.
+"""
+def warp_card(img, corners):
+	width, height = CARD_SIZE
+	square = np.float32([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]])
+	return cv2.warpPerspective(img, cv2.getPerspectiveTransform(corners, square), CARD_SIZE)
@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - local card store
+"""
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cards.db")	# card database lives next to the script
+
+
+"""
+Parameters
+-----------
+ colors: [string] or None
+
+Returns
+-----------
+ string or None
+
+Color and color identity data comes in as a list of letters. SQLite can't store lists, so the list is
+saved as a JSON string. None is kept as None so colorless cards still print as "None".
+"""
+def _pack_colors(colors):
+	if not colors:
+		return None
+	return json.dumps(list(colors))
+
+def _unpack_colors(text):
+	if text == None:
+		return None
+	return json.loads(text)
+
+
+"""
+The CardStore class keeps a local copy of card data in an SQLite database. Card names are the primary key,
+so looking up a card by its exact name is an index lookup instead of an HTTP request. Rows are returned as the
+same 9 element tuple get_data() builds from the API:
+
+ (name, mana_cost, cmc, type, colors, color_identity, power, toughness, loyalty)
+"""
+class CardStore:
+
+	"""
+	Parameters
+	-----------
+	 path: string
+
+	Opens (or creates) the card database at path. The connection is shared between threads, so every query
+	holds self.lock.
+	"""
+	def __init__(self, path = DEFAULT_PATH):
+		self.path = path
+		self.lock = threading.Lock()
+		self.conn = sqlite3.connect(path, check_same_thread = False)
+
+		# cmc has no declared type so ints and floats come back the same way they went in
+		self.conn.execute("CREATE TABLE IF NOT EXISTS cards (name TEXT PRIMARY KEY, mana_cost TEXT, cmc, type TEXT, "
+			"colors TEXT, color_identity TEXT, power TEXT, toughness TEXT, loyalty TEXT)")
+		self.conn.commit()
+
+	"""
+	Parameters
+	-----------
+	 card_name: string
+
+	Returns
+	-----------
+	 tuple or None
+
+	Finds the card with exactly the name card_name. Returns None if the store doesn't have it.
+	"""
+	def lookup(self, card_name):
+		with self.lock:
+			row = self.conn.execute("SELECT * FROM cards WHERE name = ?", (card_name,)).fetchone()
+
+		if row == None:
+			return None
+
+		return (row[0], row[1], row[2], row[3], _unpack_colors(row[4]), _unpack_colors(row[5]), row[6], row[7], row[8])
+
+	"""
+	Parameters
+	-----------
+	 data: tuple
+
+	Saves one card tuple to the store, replacing any older row with the same name.
+	"""
+	def add(self, data):
+		self.add_many([data])
+
+	"""
+	Parameters
+	-----------
+	 cards: iterable of tuples
+
+	Saves many card tuples in one transaction. Returns the number of cards saved.
+	"""
+	def add_many(self, cards):
+		rows = [(d[0], d[1], d[2], d[3], _pack_colors(d[4]), _pack_colors(d[5]), d[6], d[7], d[8]) for d in cards]
+
+		with self.lock:
+			self.conn.executemany("INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+			self.conn.commit()
+
+		return len(rows)
+
+	"""
+	Returns
+	-----------
+	 [string]
+
+	Names of every card in the store.
+	"""
+	def names(self):
+		with self.lock:
+			return [row[0] for row in self.conn.execute("SELECT name FROM cards")]
+
+	"""
+	Returns
+	-----------
+	 int
+
+	Number of cards in the store.
+	"""
+	def count(self):
+		with self.lock:
+			return self.conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+	def close(self):
+		self.conn.close()
+
+
+"""
+Parameters
+-----------
+ filename: string
+
+Returns
+-----------
+ cards: generator of tuples
+
+Reads an MTGJSON "AtomicCards.json" bulk export (https://mtgjson.com/downloads/all-files/) and yields a card tuple for
+every card in it. Cards with more than one face are stored under each face name, since that is the name printed in
+the title box that text_detect() reads.
+"""
+def read_mtgjson(filename):
+	with open(filename, 'r', encoding = "utf-8") as file:
+		atomic = json.load(file)["data"]
+
+	for name in atomic:
+		for face in atomic[name]:
+			cmc = face.get("manaValue", face.get("convertedManaCost", 0))	# older exports call it convertedManaCost
+
+			yield (face.get("faceName", name), face.get("manaCost"), cmc, face.get("type"), face.get("colors") or None,
+				face.get("colorIdentity") or None, face.get("power"), face.get("toughness"), face.get("loyalty"))
+
+
+"""
+Running this file directly loads a bulk export into the card store:
+
+ python card_store.py AtomicCards.json [cards.db]
+"""
+if __name__ == "__main__":
+	if len(sys.argv) < 2:
+		print("Usage: python card_store.py AtomicCards.json [cards.db]")
+		sys.exit(1)
+
+	store = CardStore(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_PATH)
+	print("Imported " + str(store.add_many(read_mtgjson(sys.argv[1]))) + " cards into " + store.path)
+	store.close()
@@ -0,0 +1,263 @@
+import sys
+
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - compact card records and columnar card table
+"""
+
+# names of the fields of card data, in the order of the tuples returned by get_data()
+FIELDS = ("name", "mana_cost", "cmc", "type", "colors", "color_identity", "power", "toughness", "loyalty")
+
+# bit of each color, for both the letters used in color identities and the full names used in colors
+COLOR_BITS = {"W" : 1, "U" : 2, "B" : 4, "R" : 8, "G" : 16, "White" : 1, "Blue" : 2, "Black" : 4, "Red" : 8, "Green" : 16}
+
+# bit of each card type, found by the same substring checks create_deck() uses ("Enchant" also matches auras)
+CREATURE, ENCHANTMENT, ARTIFACT, PLANESWALKER, INSTANT, SORCERY, LAND = 1, 2, 4, 8, 16, 32, 64
+TYPE_BITS = [("Creature", CREATURE), ("Enchant", ENCHANTMENT), ("Artifact", ARTIFACT), ("Planeswalker", PLANESWALKER),
+	("Instant", INSTANT), ("Sorcery", SORCERY), ("Land", LAND)]
+
+_shared = {}	# one copy of every colors tuple, see share()
+
+
+"""
+Parameters
+-----------
+ value: string, list, or anything else
+
+Returns
+-----------
+ value
+
+Returns one shared copy of value, so the thousands of cards with the same type line or colors point at the same
+object instead of each holding their own. Strings are interned with sys.intern(); lists become shared tuples.
+"""
+def share(value):
+	if isinstance(value, str):
+		return sys.intern(value)
+	if isinstance(value, (list, tuple)):
+		value = tuple(share(v) for v in value)
+		return _shared.setdefault(value, value)
+	return value
+
+"""
+Parameters
+-----------
+ colors: iterable of strings, or None
+
+Returns
+-----------
+ bits: int
+"""
+def color_bits(colors):
+	bits = 0
+	for color in colors or ():
+		bits |= COLOR_BITS.get(color, 0)
+	return bits
+
+"""
+Parameters
+-----------
+ type_line: string
+
+Returns
+-----------
+ bits: int
+"""
+def type_bits(type_line):
+	bits = 0
+	for word, bit in TYPE_BITS:
+		if word in type_line:
+			bits |= bit
+	return bits
+
+def _number(value):	# power, toughness, and loyalty can be things like "*" or "1+*", which count as not a number
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return np.nan
+
+
+"""
+The CardRecord class holds the data of one card with named fields instead of tuple positions (card.type instead of
+data[3]). It uses __slots__, so a record has no per-instance dictionary, and its strings and color lists are shared
+between records (see share()).
+
+A record still behaves like the tuple it replaces: it can be indexed, unpacked, compared with a tuple, and turned
+into a list, so the checkpoint journal and lookup cache keep storing plain lists.
+"""
+class CardRecord:
+	__slots__ = FIELDS
+
+	def __init__(self, name, mana_cost, cmc, type, colors, color_identity, power, toughness, loyalty):
+		self.name = share(name)
+		self.mana_cost = share(mana_cost)
+		self.cmc = cmc
+		self.type = share(type)
+		self.colors = share(colors)
+		self.color_identity = share(color_identity)
+		self.power = share(power)
+		self.toughness = share(toughness)
+		self.loyalty = share(loyalty)
+
+	"""
+	Parameters
+	-----------
+	 data: tuple, list, or CardRecord
+
+	Returns
+	-----------
+	 record: CardRecord
+	"""
+	@classmethod
+	def of(cls, data):
+		if isinstance(data, cls):
+			return data
+		return cls(*data)
+
+	def __iter__(self):
+		return (getattr(self, field) for field in FIELDS)
+
+	def __len__(self):
+		return len(FIELDS)
+
+	def __getitem__(self, index):
+		return tuple(self)[index]
+
+	def __eq__(self, other):
+		try:
+			other = tuple(other)
+		except TypeError:	# not a sequence of fields (None, a number...), let Python compare it the other way
+			return NotImplemented
+		return tuple(self) == other
+
+	def __hash__(self):
+		return hash(tuple(self))
+
+	def __repr__(self):
+		return "CardRecord" + repr(tuple(self))
+
+
+"""
+The CardTable class stores many cards as columns of NumPy arrays instead of one object per card, for decks and
+collections of tens of thousands of cards:
+
+ cmc                           float64
+ power, toughness, loyalty     float32, NaN where the card has none or it isn't a number ("*")
+ colors, identity              uint8 color bitmasks (see COLOR_BITS)
+ kinds                         uint8 card type bitmask (see TYPE_BITS)
+ codes                         uint32, one column per field: position of the field's value in values
+
+Every distinct value (name, type line, mana cost, colors...) is kept once in values, so a card costs a row of numbers,
+around 60 bytes, however long its strings are. Arrays grow by doubling. Whole-table questions ("how many creatures",
+"average cost of instants") are answered with array operations on the first len(table) rows of these columns, and
+record() rebuilds a CardRecord for printing.
+"""
+class CardTable:
+
+	"""
+	Parameters
+	-----------
+	 capacity: int (rows allocated up front)
+	"""
+	def __init__(self, capacity = 256):
+		self.count = 0
+		self.values = []	# code -> value
+		self.lookup = {}	# (type, value) -> code
+		self.cmc = np.zeros(capacity, np.float64)
+		self.power = np.zeros(capacity, np.float32)
+		self.toughness = np.zeros(capacity, np.float32)
+		self.loyalty = np.zeros(capacity, np.float32)
+		self.colors = np.zeros(capacity, np.uint8)
+		self.identity = np.zeros(capacity, np.uint8)
+		self.kinds = np.zeros(capacity, np.uint8)
+		self.codes = np.zeros((capacity, len(FIELDS)), np.uint32)
+
+	def __len__(self):
+		return self.count
+
+	def _code(self, value):
+		value = share(value)
+		key = (type(value), value)	# keeps 1 and 1.0 apart, they print differently
+		code = self.lookup.get(key)
+		if code == None:
+			code = len(self.values)
+			self.values.append(value)
+			self.lookup[key] = code
+		return code
+
+	def _grow(self):
+		for column in ("cmc", "power", "toughness", "loyalty", "colors", "identity", "kinds", "codes"):
+			array = getattr(self, column)
+			bigger = np.zeros((2 * len(array),) + array.shape[1:], array.dtype)
+			bigger[:len(array)] = array
+			setattr(self, column, bigger)
+
+	"""
+	Parameters
+	-----------
+	 data: tuple or CardRecord
+
+	Returns
+	-----------
+	 row: int
+
+	Adds a card to the end of the table.
+	"""
+	def append(self, data):
+		if self.count == len(self.cmc):
+			self._grow()
+
+		record = CardRecord.of(data)
+		row = self.count
+		self.cmc[row] = record.cmc or 0
+		self.power[row] = _number(record.power)
+		self.toughness[row] = _number(record.toughness)
+		self.loyalty[row] = _number(record.loyalty)
+		self.colors[row] = color_bits(record.colors)
+		self.identity[row] = color_bits(record.color_identity)
+		self.kinds[row] = type_bits(record.type or "")
+		self.codes[row] = [self._code(value) for value in record]
+		self.count += 1
+		return row
+
+	"""
+	Parameters
+	-----------
+	 row: int
+
+	Returns
+	-----------
+	 record: CardRecord
+	"""
+	def record(self, row):
+		return CardRecord(*[self.values[code] for code in self.codes[row]])
+
+	"""
+	Parameters
+	-----------
+	 kind: int (bits from TYPE_BITS)
+
+	Returns
+	-----------
+	 rows: array of ints
+
+	Rows of every card with any of the type bits in kind, in the order they were added.
+	"""
+	def rows_of(self, kind):
+		return np.flatnonzero(self.kinds[:self.count] & kind)
+
+	"""
+	Returns
+	-----------
+	 rows: array of ints
+
+	Every row, with land cards moved after all other cards; otherwise in the order they were added. This is the order
+	cards are listed in deck and collection reports.
+	"""
+	def lands_last(self):
+		return np.argsort((self.kinds[:self.count] & LAND) != 0, kind = 'stable')
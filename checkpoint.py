@@ -0,0 +1,106 @@
+import json
+import os
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - checkpoint journal
+"""
+
+
+"""
+Parameters
+-----------
+ filename: string
+
+Returns
+-----------
+ stamp: [int, float] or None
+
+Size and modification time of an image file. A journal entry is only reused if the image still has the same stamp,
+so an image that was replaced by a different photo gets processed again. A frame of a video ("clip.mp4#120", see
+FinalProject.process_cards()) gets the stamp of the video.
+"""
+def file_stamp(filename):
+	if "#" in filename and not os.path.exists(filename):
+		filename = filename.rsplit("#", 1)[0]
+	try:
+		info = os.stat(filename)
+	except OSError:
+		return None
+	return [info.st_size, info.st_mtime]
+
+
+"""
+The Checkpoint class keeps a journal of cards that have already been resolved during a deck or collection run. The
+journal is a text file with one JSON object per line:
+
+ {"file": "card1.jpg", "stamp": [2048123, 1700000000.0], "data": ["Opt", "{U}", 1.0, "Instant", ...]}
+
+Every line is written and flushed as soon as its card is resolved (including cards the user typed in by hand), so
+if the run crashes or the user quits, a rerun with the same images can skip every card already in the journal.
+"""
+class Checkpoint:
+
+	"""
+	Parameters
+	-----------
+	 path: string
+
+	Opens the journal at path, loading any entries left by an earlier run.
+	"""
+	def __init__(self, path):
+		self.path = path
+		self.done = {}	# filename -> (stamp, data)
+
+		if os.path.exists(path):
+			with open(path, 'r') as journal:
+				for line in journal:
+					try:
+						entry = json.loads(line)
+					except ValueError:	# last line may be cut off if the earlier run crashed while writing it
+						continue
+					self.done[entry["file"]] = (entry["stamp"], tuple(entry["data"]))
+
+		self.journal = open(path, 'a')
+
+	"""
+	Parameters
+	-----------
+	 filename: string
+
+	Returns
+	-----------
+	 data: tuple or None
+
+	Returns the card data journaled for filename, or None if the image hasn't been resolved yet or has changed since.
+	"""
+	def lookup(self, filename):
+		entry = self.done.get(filename)
+		if entry == None or entry[0] != file_stamp(filename):
+			return None
+		return entry[1]
+
+	"""
+	Parameters
+	-----------
+	 filename: string
+	 data: tuple
+
+	Adds a resolved card to the journal.
+	"""
+	def record(self, filename, data):
+		stamp = file_stamp(filename)
+		self.done[filename] = (stamp, tuple(data))
+		self.journal.write(json.dumps({"file" : filename, "stamp" : stamp, "data" : list(data)}) + "\n")
+		self.journal.flush()
+
+	def close(self):
+		self.journal.close()
+
+	"""
+	Closes and deletes the journal once the run it belongs to has finished.
+	"""
+	def finish(self):
+		self.journal.close()
+		os.remove(self.path)
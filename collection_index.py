@@ -0,0 +1,136 @@
+import json
+import sqlite3
+import threading
+
+from checkpoint import file_stamp
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - incremental collection index
+"""
+
+
+"""
+The CollectionIndex class keeps a collection in an SQLite database so it can be updated a few cards at a time instead
+of being rebuilt from every image. It has two tables:
+
+ images   one row per scanned image: its path, size and modification time, content hash (see ocr_cache.image_key()),
+          and the name of the card it was resolved to
+ cards    one row per distinct card: its data and how many images of it are in the collection
+
+Adding or removing an image changes one row of each table, so an update costs the number of images that changed,
+not the size of the collection. lookup() has the same meaning as Checkpoint.lookup(), so the index can be passed to
+process_cards() as its checkpoint and images already in the collection are skipped.
+"""
+class CollectionIndex:
+
+	"""
+	Parameters
+	-----------
+	 path: string
+
+	Opens (or creates) the index at path. lookup() is called from the pipeline's threads, so every query holds
+	self.lock.
+	"""
+	def __init__(self, path):
+		self.path = path
+		self.lock = threading.Lock()
+		self.conn = sqlite3.connect(path, check_same_thread = False)
+		self.conn.execute("CREATE TABLE IF NOT EXISTS images (file TEXT PRIMARY KEY, stamp TEXT, hash TEXT, name TEXT)")
+		self.conn.execute("CREATE TABLE IF NOT EXISTS cards (name TEXT PRIMARY KEY, data TEXT, quantity INTEGER)")
+		self.conn.commit()
+
+	"""
+	Parameters
+	-----------
+	 filename: string
+
+	Returns
+	-----------
+	 data: tuple or None
+
+	Returns the card data of an image already in the collection, or None if the image is new or has changed since it
+	was added.
+	"""
+	def lookup(self, filename):
+		with self.lock:
+			row = self.conn.execute("SELECT images.stamp, cards.data FROM images JOIN cards ON images.name = cards.name "
+				"WHERE images.file = ?", (filename,)).fetchone()
+		if row == None or json.loads(row[0]) != file_stamp(filename):
+			return None
+		return tuple(json.loads(row[1]))
+
+	"""
+	Parameters
+	-----------
+	 filename: string
+	 image_hash: string or None
+	 data: tuple
+
+	Adds an image of a card to the collection. If the image was already in it (as a different photo, or read as a
+	different card) the old entry is replaced.
+	"""
+	def add(self, filename, image_hash, data):
+		with self.lock:
+			self._remove(filename)
+			self.conn.execute("INSERT INTO images VALUES (?, ?, ?, ?)", (filename, json.dumps(file_stamp(filename)), image_hash, data[0]))
+			self.conn.execute("INSERT INTO cards VALUES (?, ?, 1) ON CONFLICT (name) DO UPDATE SET quantity = quantity + 1, "
+				"data = excluded.data", (data[0], json.dumps(list(data))))
+			self.conn.commit()
+
+	"""
+	Parameters
+	-----------
+	 filename: string
+
+	Returns
+	-----------
+	 bool
+
+	Removes an image from the collection, taking one off the quantity of its card. Returns False if the image wasn't
+	in the collection.
+	"""
+	def remove(self, filename):
+		with self.lock:
+			removed = self._remove(filename)
+			self.conn.commit()
+		return removed
+
+	def _remove(self, filename):
+		row = self.conn.execute("SELECT name FROM images WHERE file = ?", (filename,)).fetchone()
+		if row == None:
+			return False
+
+		self.conn.execute("DELETE FROM images WHERE file = ?", (filename,))
+		self.conn.execute("UPDATE cards SET quantity = quantity - 1 WHERE name = ?", (row[0],))
+		self.conn.execute("DELETE FROM cards WHERE name = ? AND quantity <= 0", (row[0],))
+		return True
+
+	"""
+	Returns
+	-----------
+	 generator of (data, quantity): (tuple, int)
+
+	Every distinct card in the collection, in the order each was first added.
+	"""
+	def cards(self):
+		with self.lock:
+			rows = self.conn.execute("SELECT data, quantity FROM cards ORDER BY rowid").fetchall()
+		for row in rows:
+			yield (tuple(json.loads(row[0])), row[1])
+
+	"""
+	Returns
+	-----------
+	 (cards, images): (int, int)
+
+	Number of distinct cards and of images in the collection.
+	"""
+	def size(self):
+		with self.lock:
+			return (self.conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0],
+				self.conn.execute("SELECT COUNT(*) FROM images").fetchone()[0])
+
+	def close(self):
+		self.conn.close()
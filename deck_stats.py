@@ -0,0 +1,101 @@
+from card_table import ARTIFACT, COLOR_BITS, CREATURE, ENCHANTMENT, INSTANT, LAND, PLANESWALKER, SORCERY
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - deck statistics
+"""
+
+# card categories in the order they are checked: a card is counted once, under the first of its types found here
+# (an artifact creature is a creature, an enchantment land is an enchantment), the same as the original deck_comp tally
+CATEGORIES = [("Creature", CREATURE), ("Enchantment", ENCHANTMENT), ("Artifact", ARTIFACT), ("Planeswalker", PLANESWALKER),
+	("Instant", INSTANT), ("Sorcery", SORCERY), ("Land", LAND)]
+
+CURVE_MAX = 7	# mana curve buckets are 0 thru CURVE_MAX - 1, then CURVE_MAX or more
+
+COLORS = ["W", "U", "B", "R", "G"]
+
+
+"""
+Parameters
+-----------
+ table: CardTable
+
+Returns
+-----------
+ stats: dictionary
+
+Computes the statistics of every card in table with a handful of array operations over its columns, no matter how
+many cards it has (a million cards take well under a second):
+
+ total_cards, total_cost, average_cost     average_cost leaves out lands, which can't be cast
+ counts, average_costs                     {category: value} for each of CATEGORIES, plus "Other" for cards of none
+ curve                                     number of non-land cards of each mana value, see CURVE_MAX
+ colors                                    number of cards of each color, plus "Colorless" and "Multicolor"
+ land_ratio                                lands / total_cards
+"""
+def deck_statistics(table):
+	n = len(table)
+	kinds = table.kinds[:n]
+	cmc = table.cmc[:n]
+	colors = table.colors[:n]
+
+	category = np.full(n, len(CATEGORIES), np.int64)	# "Other" unless a type below is found
+	for k in reversed(range(len(CATEGORIES))):	# checked last to first, so the first match wins
+		category = np.where(kinds & CATEGORIES[k][1], k, category)
+
+	counts = np.bincount(category, minlength = len(CATEGORIES) + 1)
+	costs = np.bincount(category, weights = cmc, minlength = len(CATEGORIES) + 1)
+	names = [name for name, bit in CATEGORIES] + ["Other"]
+
+	lands = int(counts[names.index("Land")])
+	spells = cmc[category != names.index("Land")]
+	curve = np.bincount(np.minimum(spells, CURVE_MAX).astype(np.int64), minlength = CURVE_MAX + 1)
+
+	color_counts = dict((color, int(np.count_nonzero(colors & COLOR_BITS[color]))) for color in COLORS)
+	bits = np.unpackbits(colors[:, None], axis = 1).sum(axis = 1)	# number of colors of each card
+	color_counts["Colorless"] = int(np.count_nonzero(bits == 0))
+	color_counts["Multicolor"] = int(np.count_nonzero(bits > 1))
+
+	return {"total_cards" : n, "total_cost" : float(cmc.sum()),
+		"average_cost" : float(spells.mean()) if len(spells) else 0.0,
+		"counts" : dict((names[k], int(counts[k])) for k in range(len(names))),
+		"average_costs" : dict((names[k], float(costs[k] / counts[k]) if counts[k] else 0.0) for k in range(len(names))),
+		"curve" : [int(count) for count in curve],
+		"colors" : color_counts,
+		"land_ratio" : lands / n if n else 0.0}
+
+
+"""
+Parameters
+-----------
+ stats: dictionary from deck_statistics()
+
+Returns
+-----------
+ lines: [string]
+
+The statistics as lines of the Deck Statistics section of a deck file.
+"""
+def statistics_lines(stats):
+	lines = ["Total Cards: " + str(stats["total_cards"]),
+		"Total Mana Cost: " + str(stats["total_cost"]),
+		"Average Mana Cost: " + str(stats["average_cost"])]
+
+	for name in ["Creature", "Enchantment", "Instant", "Sorcery", "Artifact", "Planeswalker"]:
+		lines.append("Total " + name + " Count: " + str(stats["counts"][name]))
+		lines.append("Average " + name + " Cost: " + str(stats["average_costs"][name]))
+
+	lines.append("Total Lands: " + str(stats["counts"]["Land"]))
+	if stats["counts"]["Other"]:
+		lines.append("Total Other Cards: " + str(stats["counts"]["Other"]))
+	lines.append("Land Ratio: " + str(round(stats["land_ratio"], 3)))
+
+	curve = stats["curve"]
+	lines.append("Mana Curve: " + ", ".join(str(k) + ": " + str(curve[k]) for k in range(CURVE_MAX)) + ", " +
+		str(CURVE_MAX) + "+: " + str(curve[CURVE_MAX]))
+	lines.append("Colors: " + ", ".join(color + ": " + str(stats["colors"][color]) for color in stats["colors"]))
+	return lines
@@ -0,0 +1,550 @@
+import argparse
+import asyncio
+import ipaddress
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+from report_writer import check_formats
+from telemetry import Telemetry
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - catalog job server
+
+Runs deck and collection jobs for several scanning stations from one place. Jobs are sent to a small HTTP API on this
+computer and run in worker processes that stay up between jobs, so OpenCV, Tesseract and the card name index are
+loaded once per worker instead of once per run, and every job shares the same card store, lookup cache and OCR cache.
+
+ python job_server.py [--port 8380] [--processes 2] [--job-dir jobs]
+
+ POST   /uploads?name=card.jpg   body is an image; saves it and returns {"path": ...} to use in a job
+ POST   /jobs                    body is a job (see JobServer.submit()); returns the job
+ GET    /jobs                    every job
+ GET    /jobs/<id>               one job: its state, cards done so far, and cards per second
+ DELETE /jobs/<id>               cancels a job that hasn't started yet
+ GET    /metrics                 jobs in each state, queue length, and cards per second overall and lately
+
+Every answer is JSON. The server only listens on the loopback interface, so other computers can't reach it. Web
+pages open in a browser on this computer can send it requests, so it also only answers requests addressed to
+localhost (against DNS rebinding), refuses requests whose Origin is a page that isn't on localhost, and only takes
+jobs sent as application/json, which a page can't send to another site without the browser asking first. Jobs can
+only write their output, and read their answers, inside the job folder (job_dir, see JobServer).
+"""
+
+HOST = "127.0.0.1"
+PORT = 8380
+PROCESSES = 2	# jobs run at the same time, one per worker process
+MAX_BODY = 64 * 1024 * 1024		# largest upload or job accepted, in bytes
+RATE_WINDOW = 60	# seconds of recent cards the current cards per second is measured over
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
+JOB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs")	# the only folder jobs write to
+
+KINDS = ["deck", "collection", "update"]	# create_deck(), create_collection(), update_collection()
+LOCAL_NAMES = ["localhost", "127.0.0.1", "[::1]"]	# Host headers answered
+
+REASONS = {200 : "OK", 202 : "Accepted", 400 : "Bad Request", 403 : "Forbidden", 404 : "Not Found",
+	405 : "Method Not Allowed", 409 : "Conflict", 413 : "Payload Too Large", 415 : "Unsupported Media Type",
+	500 : "Internal Server Error"}
+
+
+"""
+Raised while handling a request to answer it with an error status and message.
+"""
+class RequestError(Exception):
+	def __init__(self, status, message):
+		Exception.__init__(self, message)
+		self.status = status
+
+
+"""
+Parameters
+-----------
+ value: anything
+
+Returns
+-----------
+ bool
+
+Whether value is a list of strings, as the images, removed, and formats of a job must be.
+"""
+def is_string_list(value):
+	return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+# the rest of this section runs in the worker processes
+
+_progress = None	# queue of messages to the server, set by start_worker()
+_job = None			# id of the job this worker is running
+
+
+"""
+Telemetry that also tells the server about every card finished, so it can show a job's progress while it runs.
+"""
+class ProgressTelemetry(Telemetry):
+	def record(self, span):
+		Telemetry.record(self, span)
+		_progress.put(("card", _job, time.time()))
+
+"""
+Parameters
+-----------
+ progress: multiprocessing queue
+ setup: function or None
+
+Starts a worker process: imports FinalProject and loads OpenCV, numpy, and the card name index ahead of the first
+job. The workers don't write the telemetry log, since several processes would be appending to it at once. setup,
+if given, is called before anything is loaded (to point FinalProject at other databases or a local mock API, for
+instance); it has to be a function at the top level of a module, so the worker can import it.
+"""
+def start_worker(progress, setup):
+	global _progress
+	_progress = progress
+
+	import FinalProject
+	FinalProject.telemetry = ProgressTelemetry(None)
+	if setup != None:
+		setup()
+
+	FinalProject.cv2.getVersionString()		# load the modules lazy_import() put off
+	FinalProject.np.zeros(1)
+	FinalProject.get_name_index()
+
+"""
+Parameters
+-----------
+ job: int
+ kind: string (one of KINDS)
+ args: list (arguments of the FinalProject function for kind)
+ options: dictionary (keyword arguments of it)
+
+Returns
+-----------
+ result: dictionary
+
+Runs one job in a worker process. Jobs never wait for input: cards that couldn't be found are saved for review in
+<output>.review/, and the result's "review" is the path of the list to fill in and send back as the job's answers.
+"""
+def run_job(job, kind, args, options):
+	global _job
+	import FinalProject
+	_job = job
+	_progress.put(("start", job, time.time()))
+
+	function = {"deck" : FinalProject.create_deck, "collection" : FinalProject.create_collection,
+		"update" : FinalProject.update_collection}[kind]
+	function(*args, interactive = False, **options)
+
+	review = os.path.join(args[1] + ".review", "review.txt")
+	return {"review" : review if os.path.exists(review) else None}
+
+
+"""
+The JobServer class keeps the job list, the worker processes, and the HTTP API. Jobs wait in the process pool's
+queue and are started in the order they were sent as workers become free. Workers send a message for each card
+they finish on a multiprocessing queue; a thread reads it and hands the messages to the event loop, which is the
+only thread that changes the job list.
+"""
+class JobServer:
+
+	"""
+	Parameters
+	-----------
+	 host: string (must be a loopback address)
+	 port: int (0 picks a free port, see self.port once started)
+	 processes: int
+	 workers: int (threads for each image stage of a job, see FinalProject.process_cards())
+	 upload_dir: string
+	 setup: function or None (see start_worker())
+	 job_dir: string (folder every job's output and answers file must be in)
+	"""
+	def __init__(self, host = HOST, port = PORT, processes = PROCESSES, workers = None, upload_dir = UPLOAD_DIR, setup = None,
+			job_dir = JOB_DIR):
+		if not ipaddress.ip_address(host).is_loopback:
+			raise ValueError("the job server only listens on this computer, not on " + host)
+
+		self.host = host
+		self.port = port
+		self.processes = processes
+		self.workers = workers or max(1, (os.cpu_count() or 1) // processes)
+		self.upload_dir = upload_dir
+		self.setup = setup
+		self.job_dir = os.path.realpath(job_dir)
+
+		self.jobs = {}		# id -> job dictionary (see view())
+		self.futures = {}	# id -> future of a job that hasn't finished
+		self.next_id = 1
+		self.started = time.time()
+		self.cards = 0
+		self.recent = deque()	# times of the cards finished in the last RATE_WINDOW seconds
+
+	"""
+	Starts the worker processes and the HTTP server. The workers are started with "spawn" on every system, so they
+	don't inherit the server's threads and event loop.
+	"""
+	async def start(self):
+		self.loop = asyncio.get_running_loop()
+		os.makedirs(self.job_dir, exist_ok = True)
+		self.context = multiprocessing.get_context("spawn")
+		self.progress = self.context.Queue()
+		self._start_pool()
+		threading.Thread(target = self._read_progress, daemon = True).start()
+
+		self.server = await asyncio.start_server(self.handle, self.host, self.port)
+		self.port = self.server.sockets[0].getsockname()[1]
+
+	async def serve_forever(self):
+		await self.start()
+		print("Job server listening on http://" + self.host + ":" + str(self.port) + " with " + str(self.processes) +
+			" worker processes")
+		try:
+			async with self.server:
+				await self.server.serve_forever()
+		finally:
+			self.close()	# waits for running jobs to finish
+
+	def _start_pool(self):
+		self.pool = ProcessPoolExecutor(self.processes, self.context, start_worker, (self.progress, self.setup))
+
+	def close(self):
+		self.server.close()
+		self.pool.shutdown(wait = True, cancel_futures = True)
+		self.progress.put(None)
+
+	def _read_progress(self):
+		while True:
+			message = self.progress.get()
+			if message == None:
+				return
+			self.loop.call_soon_threadsafe(self._on_progress, message)
+
+	def _on_progress(self, message):
+		kind, job_id, when = message
+		job = self.jobs[job_id]
+		if kind == "start":
+			job["state"] = "running"
+			job["started"] = when
+		else:
+			job["cards"] += 1
+			self.cards += 1
+			self.recent.append(when)
+
+	def _on_finished(self, job, future, pool):
+		self.futures.pop(job["id"], None)
+		job["finished"] = time.time()
+		if future.cancelled():
+			job["state"] = "cancelled"
+		elif future.exception() != None:
+			job["state"] = "failed"
+			job["error"] = type(future.exception()).__name__ + ": " + str(future.exception())
+			if isinstance(future.exception(), BrokenProcessPool) and pool is self.pool:	# a worker died; jobs sent later get new workers
+				self._start_pool()
+		else:
+			job["review"] = future.result()["review"]
+			job["state"] = "review" if job["review"] else "done"
+
+	"""
+	Parameters
+	-----------
+	 request: dictionary
+
+	Returns
+	-----------
+	 job: dictionary
+
+	Queues a job. request has the same fields as the command line (see FinalProject.argument_parser()):
+
+	 kind      "deck", "collection", or "update" (update_collection(), adding to the collection kept next to output)
+	 output    file to save the deck or collection to, in job_dir (a relative path is taken from job_dir)
+	 images    [image paths], as seen from the server; see /uploads for sending images
+	 name, summary, format (decks only), answers, removed (updates only), formats (report formats)
+	 ocr_batch title strips read per OCR call (see FinalProject.process_cards()); the server's default if left out
+
+	Raises RequestError if the request is missing something, has a field of the wrong type, has no images (an update
+	may have only removed instead), names images or an answers file that don't exist or report formats that aren't in
+	report_writer.FORMATS, has an output or answers file outside job_dir, or has the same output as a job that hasn't
+	finished. Everything a worker would fail on is checked here, so a bad job is answered with a 400 right away
+	instead of failing once it runs.
+	"""
+	def submit(self, request):
+		kind = request.get("kind")
+		if kind not in KINDS:
+			raise RequestError(400, "kind must be one of " + ", ".join(KINDS))
+		if not isinstance(request.get("output"), str) or not request["output"]:
+			raise RequestError(400, "output is required")
+		images = request.get("images", [])
+		if not is_string_list(images):
+			raise RequestError(400, "images must be a list of paths")
+		for field in ("name", "summary", "format", "answers"):
+			if request.get(field) != None and not isinstance(request[field], str):
+				raise RequestError(400, field + " must be a string")
+		removed = request.get("removed", [])
+		if not is_string_list(removed):
+			raise RequestError(400, "removed must be a list of paths")
+		formats = request.get("formats", ["text"])
+		if not is_string_list(formats) or not formats:
+			raise RequestError(400, "formats must be a list of report formats")
+		ocr_batch = request.get("ocr_batch")
+		if ocr_batch != None and (not isinstance(ocr_batch, int) or isinstance(ocr_batch, bool) or ocr_batch < 1):	# JSON true is an int to Python
+			raise RequestError(400, "ocr_batch must be a whole number of at least 1")
+
+		if not images and not (kind == "update" and removed):
+			raise RequestError(400, "images is empty")
+		missing = [image for image in images if not os.path.exists(image)]
+		if missing:
+			raise RequestError(400, "images not found: " + ", ".join(missing[:10]))
+
+		output = self.job_path(request["output"])
+		try:
+			check_formats(formats, output)
+		except ValueError as error:
+			raise RequestError(400, str(error))
+		answers = self.job_path(request["answers"]) if request.get("answers") else None
+		if answers and not os.path.exists(answers):
+			raise RequestError(400, "answers file not found: " + answers)
+		for job in self.jobs.values():
+			if job["output"] == output and job["state"] in ("queued", "running"):
+				raise RequestError(409, "job " + str(job["id"]) + " is already writing " + output)
+
+		args = [images, output, request.get("name") or "", request.get("summary") or ""]
+		if kind == "deck":
+			args.insert(3, request.get("format") or "")
+		options = {"workers" : self.workers, "answers" : answers, "formats" : formats, "ocr_batch" : ocr_batch}
+		if kind == "update":
+			options["removed"] = removed
+
+		job = {"id" : self.next_id, "kind" : kind, "output" : output, "images" : len(images), "state" : "queued",
+			"cards" : 0, "submitted" : time.time(), "started" : None, "finished" : None, "error" : None, "review" : None}
+		self.next_id += 1
+		self.jobs[job["id"]] = job
+
+		try:
+			future = self.pool.submit(run_job, job["id"], kind, args, options)
+		except BrokenProcessPool:	# a worker died since the last job finished
+			self._start_pool()
+			future = self.pool.submit(run_job, job["id"], kind, args, options)
+		pool = self.pool
+		self.futures[job["id"]] = future
+		asyncio.wrap_future(future).add_done_callback(lambda done: self._on_finished(job, done, pool))
+		return self.view(job)
+
+	"""
+	Parameters
+	-----------
+	 path: string (from a job request)
+
+	Returns
+	-----------
+	 path: string (absolute, with links followed)
+
+	Raises RequestError if path isn't inside job_dir, so a job can't overwrite files anywhere else.
+	"""
+	def job_path(self, path):
+		full = os.path.realpath(os.path.join(self.job_dir, path))
+		if os.path.commonpath([full, self.job_dir]) != self.job_dir or full == self.job_dir:
+			raise RequestError(400, path + " is not in the job folder, " + self.job_dir)
+		return full
+
+	"""
+	Parameters
+	-----------
+	 job: dictionary
+
+	Returns
+	-----------
+	 job: dictionary
+
+	A copy of a job for an answer, with its running time and cards per second so far.
+	"""
+	def view(self, job):
+		job = dict(job)
+		if job["started"]:
+			seconds = (job["finished"] or time.time()) - job["started"]
+			job["seconds"] = round(seconds, 2)
+			job["cards_per_second"] = round(job["cards"] / seconds, 2) if seconds > 0 else 0.0
+		return job
+
+	def metrics(self):
+		now = time.time()
+		while self.recent and self.recent[0] < now - RATE_WINDOW:
+			self.recent.popleft()
+
+		states = {}
+		for job in self.jobs.values():
+			states[job["state"]] = states.get(job["state"], 0) + 1
+
+		uptime = now - self.started
+		return {"uptime_seconds" : round(uptime, 1), "processes" : self.processes, "jobs" : states,
+			"queued" : states.get("queued", 0), "cards" : self.cards,
+			"cards_per_second" : round(self.cards / uptime, 2) if uptime > 0 else 0.0,
+			"recent_cards_per_second" : round(len(self.recent) / min(RATE_WINDOW, max(uptime, 1)), 2)}
+
+	def cancel(self, job):
+		if job["state"] != "queued" or not self.futures[job["id"]].cancel():
+			raise RequestError(409, "job " + str(job["id"]) + " has already started")
+		job["state"] = "cancelled"
+
+	"""
+	Parameters
+	-----------
+	 name: string
+	 body: bytes
+
+	Returns
+	-----------
+	 path: string
+
+	Saves an uploaded image under upload_dir, with a unique prefix so uploads with the same name don't overwrite each
+	other. The file is written in a separate thread so the server keeps answering other requests meanwhile.
+	"""
+	async def save_upload(self, name, body):
+		name = os.path.basename(name)
+		if not name or name.startswith("."):
+			raise RequestError(400, "upload needs a file name, e.g. /uploads?name=card.jpg")
+
+		os.makedirs(self.upload_dir, exist_ok = True)
+		path = os.path.join(self.upload_dir, uuid.uuid4().hex[:12] + "-" + name)
+
+		def write():
+			with open(path, 'wb') as file:
+				file.write(body)
+		await asyncio.to_thread(write)
+		return path
+
+	"""
+	Parameters
+	-----------
+	 method: string
+	 path: string
+	 query: dictionary (see urllib.parse.parse_qs())
+	 headers: dictionary (lower case names)
+	 body: bytes
+
+	Returns
+	-----------
+	 (status, answer): (int, dictionary)
+	"""
+	async def route(self, method, path, query, headers, body):
+		parts = [part for part in path.split("/") if part]
+
+		if parts == ["metrics"] and method == "GET":
+			return 200, self.metrics()
+
+		if parts == ["uploads"] and method == "POST":
+			return 200, {"path" : await self.save_upload(query.get("name", [""])[0], body)}
+
+		if parts == ["jobs"]:
+			if method == "GET":
+				return 200, {"jobs" : [self.view(job) for job in self.jobs.values()]}
+			if method == "POST":
+				if headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+					raise RequestError(415, "job must be sent with Content-Type: application/json")
+				try:
+					request = json.loads(body)
+				except ValueError:
+					raise RequestError(400, "job must be JSON")
+				if not isinstance(request, dict):
+					raise RequestError(400, "job must be a JSON object")
+				return 202, self.submit(request)
+
+		if len(parts) == 2 and parts[0] == "jobs":
+			job = self.jobs.get(int(parts[1])) if parts[1].isdigit() else None
+			if job == None:
+				raise RequestError(404, "no job " + parts[1])
+			if method == "GET":
+				return 200, self.view(job)
+			if method == "DELETE":
+				self.cancel(job)
+				return 200, self.view(job)
+
+		if parts in (["metrics"], ["uploads"], ["jobs"]) or (len(parts) == 2 and parts[0] == "jobs"):
+			raise RequestError(405, method + " is not allowed on " + path)
+		raise RequestError(404, "nothing at " + path)
+
+	"""
+	Parameters
+	-----------
+	 reader: asyncio.StreamReader
+	 writer: asyncio.StreamWriter
+
+	Answers one HTTP/1.1 request per connection.
+	"""
+	async def handle(self, reader, writer):
+		try:
+			try:
+				status, answer = await self.read_request(reader)
+			except RequestError as error:
+				status, answer = error.status, {"error" : str(error)}
+			except (ConnectionError, asyncio.IncompleteReadError):
+				raise
+			except Exception as error:	# a bug; answer it instead of dropping the connection, and keep serving
+				status, answer = 500, {"error" : type(error).__name__ + ": " + str(error)}
+
+			data = json.dumps(answer).encode('utf-8')
+			writer.write(("HTTP/1.1 " + str(status) + " " + REASONS[status] + "\r\nContent-Type: application/json\r\n"
+				"Content-Length: " + str(len(data)) + "\r\nConnection: close\r\n\r\n").encode('latin-1') + data)
+			await writer.drain()
+		except (ConnectionError, asyncio.IncompleteReadError):
+			pass	# the client went away
+		finally:
+			writer.close()
+
+	async def read_request(self, reader):
+		try:
+			method, target, version = (await reader.readline()).decode('latin-1').split()
+		except ValueError:
+			raise RequestError(400, "bad request line")
+
+		headers = {}
+		while True:
+			line = (await reader.readline()).decode('latin-1')
+			if line in ("\r\n", "\n", ""):
+				break
+			name, separator, value = line.partition(":")
+			headers[name.strip().lower()] = value.strip()
+
+		host = headers.get("host", "")
+		if host.rsplit(":", 1)[0] not in LOCAL_NAMES and host not in LOCAL_NAMES:	# keeps web pages from reaching the server thru DNS rebinding
+			raise RequestError(403, "requests must be addressed to localhost")
+		origin = headers.get("origin")
+		if origin != None and (urlsplit(origin).hostname or "") not in ("localhost", "127.0.0.1", "::1"):	# sent by a web page of another site
+			raise RequestError(403, "requests from web pages are only answered from localhost")
+
+		try:
+			length = int(headers.get("content-length") or 0)
+		except ValueError:
+			length = -1
+		if length < 0:
+			raise RequestError(400, "bad Content-Length")
+		if length > MAX_BODY:
+			raise RequestError(413, "body is larger than " + str(MAX_BODY) + " bytes")
+		body = await reader.readexactly(length) if length else b""
+
+		url = urlsplit(target)
+		return await self.route(method, url.path, parse_qs(url.query), headers, body)
+
+
+def main():
+	parser = argparse.ArgumentParser(description = "Local HTTP server for MTG Cataloger deck and collection jobs")
+	parser.add_argument("--host", default = HOST, help = "loopback address to listen on")
+	parser.add_argument("--port", type = int, default = PORT)
+	parser.add_argument("--processes", type = int, default = PROCESSES, help = "jobs run at the same time")
+	parser.add_argument("--job-dir", default = JOB_DIR, help = "folder jobs write their output to")
+	args = parser.parse_args()
+
+	server = JobServer(args.host, args.port, args.processes, job_dir = args.job_dir)
+	try:
+		asyncio.run(server.serve_forever())
+	except KeyboardInterrupt:
+		pass
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,73 @@
+import importlib.util
+import sys
+import threading
+import types
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - lazy imports
+"""
+
+_locks = {}			# name of each lazy module -> lock held while its code runs
+_running = set()	# names of the lazy modules whose code is running
+
+
+"""
+A module whose code hasn't run yet. The first time an attribute it doesn't have is used, its code runs and it
+becomes an ordinary module. importlib.util.LazyLoader does the same, but before Python 3.12 it isn't safe when two
+threads use the module at once: the second thread can see the module half run and get an AttributeError, which
+happened to the pipeline's load threads. Here the code runs under a lock of the module's own, and other threads wait
+for it to finish.
+"""
+class _LazyModule(types.ModuleType):
+
+	def __getattr__(self, name):
+		spec = self.__spec__
+		with _locks[spec.name]:
+			if self.__class__ is _LazyModule and spec.name not in _running:
+				_running.add(spec.name)	# the module's own code can use it while it runs, as with a usual import
+				try:
+					spec.loader.exec_module(self)
+				finally:
+					_running.discard(spec.name)
+				self.__class__ = types.ModuleType
+		if self.__class__ is _LazyModule:	# used by its own code before that code has set name
+			raise AttributeError("partially initialized module '" + spec.name + "' has no attribute '" + name + "'")
+		return getattr(self, name)
+
+
+"""
+Parameters
+-----------
+ name: string (full name of a module, e.g. "cv2" or "http.client")
+
+Returns
+-----------
+ module
+
+Imports a module without running it: the module object is made and registered in sys.modules right away, but its code
+only runs the first time one of its attributes is used (see _LazyModule). OpenCV, numpy and Tesseract together take
+about a fifth of a second to import, which is most of the startup time of a run that only looks up a card name. An
+"import name" statement elsewhere gets the same lazy module without running it.
+
+Raises ImportError if the module isn't installed, the same as import would, so optional modules can still be tried
+with try/except. A module that is already imported is returned as it is.
+"""
+def lazy_import(name):
+	if name in sys.modules:
+		return sys.modules[name]
+
+	spec = importlib.util.find_spec(name)
+	if spec == None:
+		raise ImportError("No module named '" + name + "'", name = name)
+
+	_locks[name] = threading.RLock()
+	module = importlib.util.module_from_spec(spec)
+	module.__class__ = _LazyModule
+	sys.modules[name] = module
+
+	if "." in name:	# "import a.b" expects b to be an attribute of a, which import only sets when it runs the module itself
+		parent, child = name.rsplit(".", 1)
+		setattr(sys.modules[parent], child, module)
+	return module
@@ -0,0 +1,241 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - card lookup cache
+"""
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lookup_cache.db")
+FLUSH_SIZE = 64	# new entries held back and then written to the persistent tier in one transaction
+
+_MISSING = object()	# returned by the tiers when a name isn't cached at all (None means "cached as not found")
+
+
+"""
+Parameters
+-----------
+ card_name: string
+
+Returns
+-----------
+ key: string
+
+Normalizes a card name into a cache key by trimming the ends and collapsing repeated spaces. Case is kept
+because get_data() matches names exactly.
+"""
+def normalize_name(card_name):
+	return " ".join(card_name.split())
+
+
+"""
+The LookupCache class memoizes get_data() results in two tiers:
+
+ 1. an in-process LRU dictionary holding up to max_size entries
+ 2. an SQLite table at path that survives restarts, holding up to disk_size entries
+
+Entries expire after ttl seconds. Names that returned nothing are cached too (negative caching), but
+expire after the shorter negative_ttl so a card added to the card store later will still be found.
+Counters for hits, misses, and negative hits are kept in the stats dictionary. The cache can be shared between
+threads; self.lock is held while either tier is read or written, but not while the lookup itself runs.
+
+New entries are written to the persistent tier FLUSH_SIZE at a time in one transaction, or when flush() is called
+(at the end of every run, see FinalProject.finish_run()) and when the program exits. The number of rows is kept in a
+row of the meta table, so the size limit is only enforced, and expired rows only dropped, once it is reached.
+"""
+class LookupCache:
+
+	"""
+	Parameters
+	-----------
+	 path: string, or None to keep the cache in memory only
+	 max_size: int
+	 disk_size: int
+	 ttl: float (seconds)
+	 negative_ttl: float (seconds)
+	"""
+	def __init__(self, path = DEFAULT_PATH, max_size = 4096, disk_size = 100000, ttl = 30 * 24 * 3600, negative_ttl = 24 * 3600):
+		self.max_size = max_size
+		self.disk_size = disk_size
+		self.ttl = ttl
+		self.negative_ttl = negative_ttl
+		self.memory = OrderedDict()	# key -> (expires, value)
+		self.stats = {"hits" : 0, "misses" : 0, "negative_hits" : 0}
+		self.lock = threading.RLock()
+		self.pending = {}	# key -> (expires, value) put but not written to the persistent tier yet
+
+		self.conn = None
+		if path:
+			self.conn = sqlite3.connect(path, check_same_thread = False)
+			self.conn.execute("CREATE TABLE IF NOT EXISTS lookups (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+			self.conn.execute("CREATE INDEX IF NOT EXISTS lookups_expires ON lookups (expires)")
+			self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+			if self.conn.execute("SELECT value FROM meta WHERE name = 'rows'").fetchone() == None:	# a cache made before the count was kept
+				self.conn.execute("INSERT INTO meta SELECT 'rows', COUNT(*) FROM lookups")
+			self.conn.commit()
+			atexit.register(self.flush)
+
+	"""
+	Parameters
+	-----------
+	 card_name: string
+
+	Returns
+	-----------
+	 value: tuple, None, or _MISSING
+
+	Checks the memory tier, then the entries not written yet, then the persistent tier. A persistent hit is copied
+	into memory.
+	"""
+	def _get(self, key):
+		now = time.time()
+
+		entry = self.memory.get(key)
+		if entry != None:
+			if entry[0] > now:
+				self.memory.move_to_end(key)	# mark as recently used
+				return entry[1]
+			del self.memory[key]
+
+		entry = self.pending.get(key)
+		if entry != None and entry[0] > now:
+			self._remember(key, entry[1], entry[0])
+			return entry[1]
+
+		if self.conn:
+			row = self.conn.execute("SELECT value, expires FROM lookups WHERE key = ?", (key,)).fetchone()
+			if row != None and row[1] > now:
+				value = json.loads(row[0])
+				if value != None:
+					value = tuple(value)	# JSON turns the tuple into a list
+				self._remember(key, value, row[1])
+				return value
+
+		return _MISSING
+
+	def _remember(self, key, value, expires):
+		self.memory[key] = (expires, value)
+		self.memory.move_to_end(key)
+
+		while len(self.memory) > self.max_size:	# evict least recently used
+			self.memory.popitem(last = False)
+
+	"""
+	Parameters
+	-----------
+	 card_name: string
+	 value: tuple or None
+
+	Stores the result of a lookup in both tiers (the persistent one FLUSH_SIZE entries at a time).
+	"""
+	def put(self, card_name, value):
+		key = normalize_name(card_name)
+		expires = time.time() + (self.ttl if value != None else self.negative_ttl)
+
+		with self.lock:
+			self._remember(key, value, expires)
+
+			if self.conn:
+				self.pending[key] = (expires, value)
+				if len(self.pending) >= FLUSH_SIZE:
+					self._write_pending()
+
+	def _write_pending(self):
+		if not self.pending:
+			return
+
+		added = 0
+		for key in self.pending:
+			if self.conn.execute("SELECT 1 FROM lookups WHERE key = ?", (key,)).fetchone() == None:
+				added += 1
+			self.conn.execute("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?)", (key, json.dumps(self.pending[key][1]), self.pending[key][0]))
+		self.pending.clear()
+
+		self.conn.execute("UPDATE meta SET value = value + ? WHERE name = 'rows'", (added,))
+		rows = self.conn.execute("SELECT value FROM meta WHERE name = 'rows'").fetchone()[0]
+		if rows > self.disk_size:	# drop expired rows, then the soonest-to-expire rows
+			rows -= self.conn.execute("DELETE FROM lookups WHERE expires <= ?", (time.time(),)).rowcount
+			if rows > self.disk_size:
+				rows -= self.conn.execute("DELETE FROM lookups WHERE key IN (SELECT key FROM lookups ORDER BY expires LIMIT ?)",
+					(rows - self.disk_size,)).rowcount
+			self.conn.execute("UPDATE meta SET value = ? WHERE name = 'rows'", (rows,))
+		self.conn.commit()
+
+	"""
+	Writes the entries held back by put() to the persistent tier in one transaction.
+	"""
+	def flush(self):
+		with self.lock:
+			if self.conn:
+				self._write_pending()
+
+	"""
+	Parameters
+	-----------
+	 card_name: string
+	 lookup: function taking a card name and returning a tuple or None
+
+	Returns
+	-----------
+	 tuple or None
+
+	Returns the cached result for card_name, calling lookup and caching its result on a miss. lookup is called with the
+	normalized name, the same string the result is cached under, so a misread like "Lightning  Bolt" is looked up as
+	"Lightning Bolt" instead of caching "not found" for the real card.
+	"""
+	def get(self, card_name, lookup):
+		key = normalize_name(card_name)
+		with self.lock:
+			value = self._get(key)
+
+			if value is _MISSING:
+				self.stats["misses"] += 1
+			elif value == None:
+				self.stats["negative_hits"] += 1
+			else:
+				self.stats["hits"] += 1
+
+		if value is _MISSING:
+			value = lookup(key)
+			self.put(key, value)
+
+		return value
+
+	"""
+	Parameters
+	-----------
+	 card_name: string
+
+	Returns
+	-----------
+	 bool
+
+	Whether card_name is cached, found or not. Doesn't count towards stats.
+	"""
+	def cached(self, card_name):
+		with self.lock:
+			return self._get(normalize_name(card_name)) is not _MISSING
+
+	"""
+	Removes every entry from both tiers.
+	"""
+	def clear(self):
+		with self.lock:
+			self.memory.clear()
+			self.pending.clear()
+			if self.conn:
+				self.conn.execute("DELETE FROM lookups")
+				self.conn.execute("UPDATE meta SET value = 0 WHERE name = 'rows'")
+				self.conn.commit()
+
+	def close(self):
+		if self.conn:
+			self.flush()
+			atexit.unregister(self.flush)
+			self.conn.close()
@@ -0,0 +1,208 @@
+import threading
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - fuzzy card name index
+"""
+
+PREFIX_LENGTH = 7	# only this many leading characters of each name are indexed by deletes
+MAX_DELETES = 2		# most characters deleted from a prefix when indexing and searching
+
+
+"""
+Parameters
+-----------
+ text: string
+
+Returns
+-----------
+ key: string
+
+Lower cases text and collapses runs of spaces, so differences in case and spacing don't count as OCR errors.
+"""
+def normalize(text):
+	return " ".join(text.lower().split())
+
+
+"""
+Parameters
+-----------
+ word: string
+ depth: int
+
+Returns
+-----------
+ deletes: set of strings
+
+Every string that can be made by deleting up to depth characters from word, including word itself.
+"""
+def deletes(word, depth = MAX_DELETES):
+	found = set([word])
+	edge = [word]
+	for k in range(depth):
+		edge = [w[:i] + w[i + 1:] for w in edge for i in range(len(w))]
+		found.update(edge)
+	return found
+
+
+"""
+Parameters
+-----------
+ a: string
+ b: string
+ limit: int
+
+Returns
+-----------
+ distance: int
+
+Levenshtein edit distance between a and b (insertions, deletions, and substitutions), or limit + 1 if it is more than
+limit. Uses Myers' bit-parallel algorithm (as described by Hyyro, "Explaining and extending the bit-parallel approximate
+string matching algorithm of Myers", 2001): each column of the usual distance table is held as bits of a Python int,
+so a whole column is updated with a handful of integer operations instead of one min() per cell.
+"""
+def edit_distance(a, b, limit):
+	if abs(len(a) - len(b)) > limit:
+		return limit + 1
+	if not a:
+		return len(b)
+
+	peq = {}	# character -> bit mask of where it appears in a
+	for i in range(len(a)):
+		peq[a[i]] = peq.get(a[i], 0) | (1 << i)
+
+	mask = (1 << len(a)) - 1
+	last = 1 << (len(a) - 1)
+	pv = mask	# vertical differences of +1
+	mv = 0		# vertical differences of -1
+	score = len(a)
+
+	for j in range(len(b)):
+		eq = peq.get(b[j], 0)
+		xv = eq | mv
+		xh = (((eq & pv) + pv) ^ pv) | eq
+		ph = mv | ~(xh | pv)
+		mh = pv & xh
+
+		if ph & last:
+			score += 1
+		elif mh & last:
+			score -= 1
+
+		if score - (len(b) - j - 1) > limit:	# can't get back under limit with the characters left
+			return limit + 1
+
+		ph = ((ph << 1) | 1) & mask
+		mh = (mh << 1) & mask
+		pv = (mh | ~(xv | ph)) & mask
+		mv = ph & xv
+
+	return score if score <= limit else limit + 1
+
+
+"""
+The NameIndex class finds the known card name closest to a noisy OCR string. It is a SymSpell style deletion index
+(https://github.com/wolfgarbe/SymSpell): every prefix of up to PREFIX_LENGTH characters, with up to MAX_DELETES
+characters deleted, points at the names it came from. A query generates the same deletes of its own prefix, which
+gives a short list of candidates in a few dictionary lookups; only those candidates are compared with the full query
+by edit distance, and the distance limit tightens as close matches are found. A lookup takes around a millisecond or
+less, even with every card name ever printed in the index.
+
+Confidence is 1 - distance / length of the longer name, so 1.0 is an exact match (ignoring case and spacing).
+"""
+class NameIndex:
+
+	"""
+	Parameters
+	-----------
+	 names: iterable of strings
+	"""
+	def __init__(self, names = ()):
+		self.lock = threading.Lock()
+		self.names = {}		# normalized name -> card name
+		self.prefixes = {}	# delete of a normalized prefix -> [normalized names]
+
+		for name in names:
+			self.add(name)
+
+	"""
+	Parameters
+	-----------
+	 name: string
+
+	Adds a card name to the index.
+	"""
+	def add(self, name):
+		key = normalize(name)
+		with self.lock:
+			if key in self.names:
+				return
+			self.names[key] = name
+			for delete in deletes(key[:PREFIX_LENGTH]):
+				self.prefixes.setdefault(delete, []).append(key)
+
+	def __len__(self):
+		return len(self.names)
+
+	"""
+	Parameters
+	-----------
+	 text: string
+	 count: int
+
+	Returns
+	-----------
+	 matches: [(string, float)]
+
+	Up to count (card name, confidence) pairs closest to text, best first.
+	"""
+	def search(self, text, count = 3):
+		key = normalize(text)
+		if not key:
+			return []
+
+		if key in self.names:	# exact match apart from case and spacing
+			return [(self.names[key], 1.0)]
+
+		with self.lock:
+			candidates = set()
+			for delete in deletes(key[:PREFIX_LENGTH]):
+				candidates.update(self.prefixes.get(delete, ()))
+
+		limit = max(MAX_DELETES, len(key) // 3)	# longer names are allowed more errors
+		scored = []
+		for candidate in candidates:
+			if abs(len(candidate) - len(key)) > limit:	# cheaper than letting edit_distance() check it
+				continue
+			distance = edit_distance(key, candidate, limit)
+			if distance <= limit:
+				scored.append((distance, candidate))
+				if len(scored) >= count:	# only names at least as close as the count best so far can still make the list
+					scored.sort()
+					limit = scored[count - 1][0]
+					while scored[-1][0] > limit:
+						scored.pop()
+
+		matches = [(distance, -len(candidate), self.names[candidate]) for distance, candidate in scored]
+		matches.sort()	# closest first; of names equally close, the longer one is the closer relative match
+		return [(name, 1 - distance / max(len(key), -length)) for distance, length, name in matches[:count]]
+
+	"""
+	Parameters
+	-----------
+	 text: string
+
+	Returns
+	-----------
+	 (name, confidence): (string, float), or (None, 0.0) if nothing is close
+	"""
+	def best(self, text):
+		matches = self.search(text, 2)
+		if not matches:
+			return (None, 0.0)
+
+		name, confidence = matches[0]
+		if len(matches) > 1 and matches[1][1] == confidence:	# two names equally close, can't tell which was meant
+			confidence /= 2
+		return (name, confidence)
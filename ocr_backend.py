@@ -0,0 +1,174 @@
+import os
+import threading
+
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+shutil = lazy_import("shutil")
+pytesseract = lazy_import("pytesseract")	# loaded the first time a card is read with it
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - OCR backend
+"""
+
+# tesserocr is an optional in-process binding to the Tesseract library (https://github.com/sirfz/tesserocr).
+# When it is installed, the language model is loaded once per thread and reused for every card. Otherwise every
+# card falls back to pytesseract, which starts a new tesseract executable each time. It is imported right away, not
+# with lazy_import(), so one that is installed but can't load (built against another libtesseract, say) falls back
+# here too, before BACKEND goes into the OCR cache key, instead of failing at the first card.
+try:
+	import tesserocr
+except ImportError:
+	tesserocr = None
+
+BACKEND = "tesserocr" if tesserocr else "pytesseract"
+
+WINDOWS_PATH = "C:\\Program Files\\Tesseract-OCR\\tesseract.exe"	# default install location on Windows
+
+PAGE_GAP = 20	# rows of white between title strips stacked into one page by images_to_strings()
+
+
+"""
+Returns
+-----------
+ path: string
+
+Finds the tesseract executable used by pytesseract. The TESSERACT_CMD environment variable wins if it is set,
+then whatever "tesseract" is on the PATH, then the default Windows install location.
+"""
+def tesseract_command():
+	if os.environ.get("TESSERACT_CMD"):
+		return os.environ["TESSERACT_CMD"]
+
+	found = shutil.which("tesseract")
+	if found:
+		return found
+
+	return WINDOWS_PATH
+
+"""
+Returns
+-----------
+ pytesseract module
+
+Returns pytesseract, pointing it at the tesseract executable (see tesseract_command()) the first time.
+"""
+def _pytesseract():
+	global _command
+	if _command == None:
+		_command = tesseract_command()
+		pytesseract.pytesseract.tesseract_cmd = _command	# initialize the pytesseract OCR tool
+	return pytesseract
+
+_command = None	# tesseract executable pytesseract was pointed at, once it has been
+
+_local = threading.local()	# each thread keeps its own recognizer, since one can't be shared between threads
+
+
+"""
+Returns
+-----------
+ api: tesserocr.PyTessBaseAPI
+
+Returns this thread's recognizer, creating it (and loading the language model) the first time it is needed.
+"""
+def _api():
+	if not hasattr(_local, "api"):
+		_local.api = tesserocr.PyTessBaseAPI()	# finds its language data the same way the tesseract executable does
+	return _local.api
+
+
+"""
+Parameters
+-----------
+ image: Image (BGR, as loaded by OpenCV)
+
+Returns
+-----------
+ text: string
+
+Reads the text in image with whichever backend is available. Both backends end the text with one extra
+character (a line break or page break), which text_detect() removes.
+"""
+def image_to_string(image):
+	if tesserocr == None:
+		return _pytesseract().image_to_string(image)
+
+	api = _set_image(image, tesserocr.PSM.AUTO)
+	return api.GetUTF8Text()
+
+def _set_image(image, mode):
+	rgb = image[:, :, ::-1].copy()	# same channel order pytesseract hands to Tesseract
+	api = _api()
+	api.SetPageSegMode(mode)
+	api.SetImageBytes(rgb.tobytes(), rgb.shape[1], rgb.shape[0], 3, rgb.shape[1] * 3)
+	return api
+
+
+"""
+Parameters
+-----------
+ page: Image
+
+Returns
+-----------
+ words: [(string, int, int)]
+
+Reads every word on page as a single block of text and returns each word with the top and bottom of its bounding box.
+"""
+def _page_words(page):
+	words = []
+
+	if tesserocr == None:
+		found = _pytesseract().image_to_data(page, config = "--psm 6", output_type = pytesseract.Output.DICT)
+		for k in range(len(found["text"])):
+			if found["text"][k].strip():
+				words.append((found["text"][k], found["top"][k], found["top"][k] + found["height"][k]))
+		return words
+
+	api = _set_image(page, tesserocr.PSM.SINGLE_BLOCK)
+	api.Recognize()
+	level = tesserocr.RIL.WORD
+	for result in tesserocr.iterate_level(api.GetIterator(), level):
+		text = result.GetUTF8Text(level)
+		if text and text.strip():
+			box = result.BoundingBox(level)	# (left, top, right, bottom)
+			words.append((text, box[1], box[3]))
+	return words
+
+
+"""
+Parameters
+-----------
+ images: [Image]
+
+Returns
+-----------
+ texts: [string]
+
+Batch version of image_to_string() for small images such as card title strips. The images are stacked on top of each
+other, PAGE_GAP rows apart, into one page that is read with a single OCR call. Each recognized word is given back to the
+image its bounding box sits on, so texts[k] is the text of images[k] (an empty string if nothing was read there). This
+spreads the cost of starting Tesseract over every image in the batch.
+"""
+def images_to_strings(images):
+	if not images:
+		return []
+
+	height = max(image.shape[0] for image in images)
+	width = max(image.shape[1] for image in images)
+	pitch = height + PAGE_GAP
+
+	page = np.full((PAGE_GAP + pitch * len(images), width, 3), 255, np.uint8)	# white page with a margin on top
+	for k in range(len(images)):
+		top = PAGE_GAP + k * pitch
+		page[top:top + images[k].shape[0], :images[k].shape[1]] = images[k]
+
+	lines = [[] for image in images]
+	for text, top, bottom in _page_words(page):
+		k = int(((top + bottom) / 2 - PAGE_GAP) // pitch)	# strip the middle of the word falls on
+		lines[min(max(k, 0), len(images) - 1)].append(text)
+
+	return [" ".join(line) for line in lines]
@@ -0,0 +1,182 @@
+import atexit
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from lazy_import import lazy_import
+
+hashlib = lazy_import("hashlib")	# only loaded when an image is hashed
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - OCR result cache
+"""
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_cache.db")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024	# total size of stored title images before old entries are evicted
+FLUSH_SIZE = 1000	# cache hits whose last-used times are held back and then written in one transaction
+
+
+"""
+Parameters
+-----------
+ image_bytes: bytes
+ params: string
+
+Returns
+-----------
+ key: string
+
+Hashes the contents of an image file together with a string describing the crop and OCR settings. The same photo
+read with different settings gets a different key, so changing those settings never returns a stale name.
+"""
+def image_key(image_bytes, params):
+	digest = hashlib.blake2b(image_bytes, digest_size = 20)
+	digest.update(params.encode("utf-8"))
+	return digest.hexdigest()
+
+
+"""
+The OCRCache class remembers what text_detect() read from each photo. Entries are keyed by image_key() and hold the
+card name that was read and the cropped title strip (as PNG bytes). When an image is seen again with the same settings,
+the name comes straight from the cache and the image is never decoded, cropped, or sent to Tesseract.
+
+The cache is an SQLite file at path. Once the stored title images add up to more than max_bytes, the least recently
+used entries are evicted. The total is kept in a row of the meta table, updated with every entry added or evicted,
+so adding an entry never has to add up the whole table.
+
+A rerun of an unchanged folder is nearly all cache hits, so hits don't write anything: the time each entry was used
+is held back and written for up to FLUSH_SIZE entries at once, when flush() is called (at the end of every run, see
+FinalProject.finish_run()), before entries are evicted, and when the program exits.
+"""
+class OCRCache:
+
+	"""
+	Parameters
+	-----------
+	 path: string
+	 max_bytes: int
+	"""
+	def __init__(self, path = DEFAULT_PATH, max_bytes = DEFAULT_MAX_BYTES):
+		self.path = path
+		self.max_bytes = max_bytes
+		self.lock = threading.Lock()
+		self.conn = sqlite3.connect(path, check_same_thread = False)
+		self.conn.execute("CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, name TEXT, title BLOB, size INTEGER, used REAL)")
+		self.conn.execute("CREATE INDEX IF NOT EXISTS ocr_used ON ocr (used)")
+		self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+		if self.conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone() == None:	# a cache made before the total was kept
+			self.conn.execute("INSERT INTO meta SELECT 'bytes', COALESCE(SUM(size), 0) FROM ocr")
+		self.conn.commit()
+
+		self.used = {}	# key -> time of a hit whose last-used time hasn't been written yet
+		atexit.register(self.flush)
+
+	"""
+	Parameters
+	-----------
+	 key: string
+
+	Returns
+	-----------
+	 (name, title): (string, bytes) or None
+	"""
+	def get(self, key):
+		with self.lock:
+			row = self.conn.execute("SELECT name, title FROM ocr WHERE key = ?", (key,)).fetchone()
+			if row == None:
+				return None
+
+			self.used[key] = time.time()	# mark as recently used, written later by flush()
+			if len(self.used) >= FLUSH_SIZE:
+				self._write_used()
+
+		return (row[0], row[1])
+
+	"""
+	Parameters
+	-----------
+	 key: string
+	 name: string
+	 title: bytes
+
+	Stores the name read from an image and its title strip, then evicts old entries if the cache is over max_bytes.
+	"""
+	def put(self, key, name, title):
+		with self.lock:
+			old = self.conn.execute("SELECT size FROM ocr WHERE key = ?", (key,)).fetchone()
+			self.conn.execute("INSERT OR REPLACE INTO ocr VALUES (?, ?, ?, ?, ?)", (key, name, title, len(title), time.time()))
+			self.conn.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'", (len(title) - (old[0] if old else 0),))
+
+			total = self.conn.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+			if total > self.max_bytes:
+				self._write_used()	# so entries used this run aren't taken for the least recently used
+				while total > self.max_bytes:
+					row = self.conn.execute("SELECT key, size FROM ocr ORDER BY used LIMIT 1").fetchone()
+					self.conn.execute("DELETE FROM ocr WHERE key = ?", (row[0],))
+					total -= row[1]
+				self.conn.execute("UPDATE meta SET value = ? WHERE name = 'bytes'", (total,))
+
+			self.conn.commit()
+
+	def _write_used(self):
+		if self.used:
+			self.conn.executemany("UPDATE ocr SET used = ? WHERE key = ?", [(self.used[key], key) for key in self.used])
+			self.conn.commit()
+			self.used.clear()
+
+	"""
+	Writes the last-used times held back by get() in one transaction.
+	"""
+	def flush(self):
+		with self.lock:
+			self._write_used()
+
+	"""
+	Returns
+	-----------
+	 (entries, bytes): (int, int)
+	"""
+	def size(self):
+		with self.lock:
+			return self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr").fetchone()
+
+	"""
+	Removes every entry, so every image is read again on the next run.
+	"""
+	def clear(self):
+		with self.lock:
+			self.used.clear()
+			self.conn.execute("DELETE FROM ocr")
+			self.conn.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+			self.conn.commit()
+			self.conn.execute("VACUUM")	# give the space back to the file system
+
+	def close(self):
+		self.flush()
+		atexit.unregister(self.flush)
+		self.conn.close()
+
+
+"""
+Running this file directly shows or clears the OCR cache:
+
+ python ocr_cache.py stats
+ python ocr_cache.py clear
+"""
+if __name__ == "__main__":
+	if len(sys.argv) != 2 or sys.argv[1] not in ("stats", "clear"):
+		print("Usage: python ocr_cache.py stats|clear")
+		sys.exit(1)
+
+	cache = OCRCache()
+	if sys.argv[1] == "clear":
+		cache.clear()
+		print("Cleared OCR cache at " + cache.path)
+	else:
+		entries, total = cache.size()
+		print(str(entries) + " images cached, " + str(round(total / 1024 / 1024, 1)) + " MB of title images in " + cache.path)
+	cache.close()
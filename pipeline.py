@@ -0,0 +1,150 @@
+import queue
+import threading
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - streaming pipeline
+"""
+
+_DONE = object()	# put on a queue when the stage before it has finished
+
+
+"""
+A Stage is one step of the pipeline: a name, a function that takes one item and returns the processed item,
+and the number of threads that run the function at the same time.
+
+If batch_size is more than 1, the function instead takes a list of up to batch_size items and returns a list of
+processed items in the same order. A thread waits at most batch_wait seconds for more items before running a
+partial batch.
+"""
+class Stage:
+	def __init__(self, name, function, workers = 1, batch_size = 1, batch_wait = 0.05):
+		self.name = name
+		self.function = function
+		self.workers = workers
+		self.batch_size = batch_size
+		self.batch_wait = batch_wait
+
+
+"""
+Holds an exception raised inside a stage so it can be raised again in the thread reading the results.
+"""
+class _Failure:
+	def __init__(self, error):
+		self.error = error
+
+
+"""
+Parameters
+-----------
+ items: iterable
+ stages: [Stage]
+ queue_size: int
+
+Returns
+-----------
+ generator of processed items, in the same order as items
+
+Runs every item thru each stage in turn. Each stage has its own threads, and stages are connected by queues that
+hold at most queue_size items, so a slow stage makes the stages before it wait instead of piling up work. items is
+read lazily, and no more than window items (read but not yet returned) exist at once, so memory use does not depend
+on how many items there are. Results are returned as soon as they and every item before them are done.
+
+If a stage raises an exception, it is raised again here. If the caller stops reading early, the pipeline threads
+stop after their current item.
+"""
+def run_pipeline(items, stages, queue_size = 16):
+	queues = [queue.Queue(queue_size) for k in range(len(stages) + 1)]
+	window = threading.Semaphore(queue_size * (len(stages) + 1))	# bounds items in flight, including ones waiting to be put back in order
+	stop = threading.Event()
+
+	def put(q, item):	# put that gives up if the pipeline has been stopped
+		while not stop.is_set():
+			try:
+				q.put(item, timeout = 0.1)
+				return
+			except queue.Full:
+				pass
+
+	def feed():
+		try:
+			for index, item in enumerate(items):
+				while not window.acquire(timeout = 0.1):
+					if stop.is_set():
+						return
+				put(queues[0], (index, item))
+		except Exception as error:
+			put(queues[-1], (-1, _Failure(error)))
+		finally:
+			put(queues[0], _DONE)
+
+	def run(stage, batch):	# runs the stage function on a batch of (index, item) entries
+		todo = [k for k in range(len(batch)) if not isinstance(batch[k][1], _Failure)]
+		try:
+			if stage.batch_size == 1:
+				results = [stage.function(batch[k][1]) for k in todo]
+			else:
+				results = stage.function([batch[k][1] for k in todo]) if todo else []
+		except Exception as error:
+			results = [_Failure(error)] * len(todo)
+
+		for k, item in zip(todo, results):
+			batch[k] = (batch[k][0], item)
+		return batch
+
+	def work(stage, inbox, outbox, remaining):
+		done = False
+		while not stop.is_set() and not done:
+			batch = []
+			while len(batch) < stage.batch_size:
+				try:
+					entry = inbox.get(timeout = stage.batch_wait if batch else 0.1)
+				except queue.Empty:
+					if batch or stop.is_set():	# run a partial batch rather than wait longer
+						break
+					continue
+
+				if entry is _DONE:
+					done = True
+					break
+				batch.append(entry)
+
+			for entry in run(stage, batch):
+				put(outbox, entry)
+
+		if done:
+			inbox.put(_DONE)	# let the other threads of this stage see it too
+			with remaining[1]:
+				remaining[0] -= 1
+				if remaining[0] == 0:	# last thread of the stage tells the next stage
+					put(outbox, _DONE)
+
+	threads = [threading.Thread(target = feed, daemon = True)]
+	for k in range(len(stages)):
+		remaining = [stages[k].workers, threading.Lock()]
+		for j in range(stages[k].workers):
+			threads.append(threading.Thread(target = work, args = (stages[k], queues[k], queues[k + 1], remaining), daemon = True))
+
+	for thread in threads:
+		thread.start()
+
+	finished = {}	# results that came out ahead of an earlier item
+	next_index = 0
+	try:
+		while True:
+			entry = queues[-1].get()
+			if entry is _DONE:
+				break
+
+			index, item = entry
+			if isinstance(item, _Failure):
+				raise item.error
+
+			finished[index] = item
+			while next_index in finished:
+				yield finished.pop(next_index)
+				next_index += 1
+				window.release()
+	finally:
+		stop.set()
@@ -0,0 +1,236 @@
+import io
+import json
+import os
+
+from card_table import FIELDS
+from lazy_import import lazy_import
+
+csv = lazy_import("csv")		# only loaded when a report is written
+tempfile = lazy_import("tempfile")
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - report writer
+"""
+
+FORMATS = ["text", "json", "csv"]
+EXTENSIONS = {"text" : ".txt", "json" : ".json", "csv" : ".csv"}
+
+RULE = "============================="
+
+
+"""
+The AtomicFile class writes a file so that it is either fully written or not changed at all. Text goes to a
+temporary file in the same folder (so the final rename never crosses file systems) thru a large write buffer;
+commit() flushes it to disk and renames it over path in one step, and discard() deletes it. Used as a context
+manager, the file is committed if the block finishes and discarded if it raises.
+"""
+class AtomicFile:
+
+	"""
+	Parameters
+	-----------
+	 path: string
+	 newline: passed to open(); use '' for CSV
+	"""
+	def __init__(self, path, newline = None):
+		self.path = path
+		handle, self.temp = tempfile.mkstemp(prefix = os.path.basename(path) + ".", suffix = ".partial",
+			dir = os.path.dirname(os.path.abspath(path)))
+		self.file = os.fdopen(handle, 'w', encoding = 'utf-8', newline = newline, buffering = 1 << 16)
+
+		umask = os.umask(0)		# mkstemp() makes the file private; give it the permissions open() would have
+		os.umask(umask)
+		os.chmod(self.temp, 0o666 & ~umask)
+
+	def write(self, text):
+		self.file.write(text)
+
+	def commit(self):
+		self.file.flush()
+		os.fsync(self.file.fileno())
+		self.file.close()
+		os.replace(self.temp, self.path)
+
+	def discard(self):
+		self.file.close()
+		os.remove(self.temp)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, kind, error, trace):
+		if kind == None:
+			self.commit()
+		else:
+			self.discard()
+
+
+"""
+Parameters
+-----------
+ path: string
+ report_format: string (one of FORMATS)
+
+Returns
+-----------
+ path: string
+
+File name for a report in report_format: path itself for text, otherwise path with its extension swapped for the
+format's (deck.txt -> deck.json).
+"""
+def report_path(path, report_format):
+	if report_format == "text":
+		return path
+	return os.path.splitext(path)[0] + EXTENSIONS[report_format]
+
+
+"""
+Parameters
+-----------
+ kind: string ("Deck" or "Collection")
+ info: [(string, string)] (label and value of each line of the information section)
+ card_lines: [string]
+ statistics: [string] or None
+
+Returns
+-----------
+ text: string
+
+The text report, in the layout deck and collection files have always had, built as one string.
+"""
+def text_report(kind, info, card_lines, statistics = None):
+	lines = [RULE, kind + " Information", RULE]
+	lines += [label + ": " + value for label, value in info]
+	lines += ["", RULE, "Cards", RULE]
+	lines += card_lines
+
+	if statistics != None:
+		lines += ["", RULE, kind + " Statistics ", RULE]
+		lines += statistics
+
+	return "\n".join(lines) + "\n"
+
+"""
+Parameters
+-----------
+ record: CardRecord
+ quantity: int or None
+
+Returns
+-----------
+ card: dictionary
+
+One card as a dictionary of its fields, for the JSON and CSV reports.
+"""
+def card_fields(record, quantity = None):
+	card = dict(zip(FIELDS, record))
+	for field in ("colors", "color_identity"):	# tuples in the record, lists in JSON
+		if card[field] != None:
+			card[field] = list(card[field])
+	if quantity != None:
+		card["quantity"] = quantity
+	return card
+
+"""
+Parameters
+-----------
+ kind: string
+ info: [(string, string)]
+ cards: [(CardRecord, int or None)]
+ statistics: dictionary (see deck_stats.deck_statistics()) or None
+
+Returns
+-----------
+ text: string
+"""
+def json_report(kind, info, cards, statistics = None):
+	report = {"kind" : kind.lower(), "info" : dict(info), "cards" : [card_fields(record, quantity) for record, quantity in cards]}
+	if statistics != None:
+		report["statistics"] = statistics
+	return json.dumps(report, indent = 1, ensure_ascii = False) + "\n"
+
+"""
+Parameters
+-----------
+ cards: [(CardRecord, int or None)]
+
+Returns
+-----------
+ text: string
+
+One row per card with a column per field (and quantity, if any card has one). Colors are joined with '/', the same
+as in the text report.
+"""
+def csv_report(cards):
+	columns = list(FIELDS)
+	if any(quantity != None for record, quantity in cards):
+		columns.append("quantity")
+
+	text = io.StringIO()
+	writer = csv.DictWriter(text, columns, extrasaction = 'ignore')
+	writer.writeheader()
+	for record, quantity in cards:
+		card = card_fields(record, quantity)
+		for field in ("colors", "color_identity"):
+			card[field] = "/".join(card[field]) if card[field] else ""
+		writer.writerow(card)
+	return text.getvalue()
+
+
+"""
+Parameters
+-----------
+ formats: [string]
+ path: string or None (the report's path, see report_path())
+
+Raises ValueError if any of formats isn't one of FORMATS, or if two of them would be written to the same file (a
+text report at deck.json along with a JSON report), so a bad format is caught before a run starts instead of after
+it ends.
+"""
+def check_formats(formats, path = None):
+	for report_format in formats:
+		if report_format not in FORMATS:
+			raise ValueError("unknown report format: " + report_format + " (use " + ", ".join(FORMATS) + ")")
+
+	if path != None and "text" in formats:	# every other format has its own extension, only the text report's can match one
+		for report_format in formats:
+			if report_format != "text" and report_path(path, report_format) == path:
+				raise ValueError("the text and " + report_format + " reports would both be written to " + path +
+					"; give the text report another extension")
+
+"""
+Parameters
+-----------
+ path: string
+ formats: [string] (from FORMATS)
+ kind: string ("Deck" or "Collection")
+ info: [(string, string)]
+ cards: [(CardRecord, int or None)], in the order they are listed
+ card_lines: [string] (the text line of each card)
+ statistics: (dictionary, [string]) or None (statistics and their text lines)
+
+Returns
+-----------
+ paths: [string]
+
+Writes the report in every format in formats (see report_path() for the file names), each atomically: a file is
+only replaced once its new contents are completely written.
+"""
+def write_report(path, formats, kind, info, cards, card_lines, statistics = None):
+	check_formats(formats, path)
+
+	paths = []
+	for report_format in dict.fromkeys(formats):	# each format once
+		if report_format == "text":
+			text = text_report(kind, info, card_lines, statistics[1] if statistics else None)
+		elif report_format == "json":
+			text = json_report(kind, info, cards, statistics[0] if statistics else None)
+		else:
+			text = csv_report(cards)
+
+		paths.append(report_path(path, report_format))
+		with AtomicFile(paths[-1], '' if report_format == "csv" else None) as file:
+			file.write(text)
+	return paths
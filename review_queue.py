@@ -0,0 +1,125 @@
+import os
+
+from lazy_import import lazy_import
+
+shutil = lazy_import("shutil")	# only loaded when the review folder is deleted
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - deferred review queue
+"""
+
+"""
+Parameters
+-----------
+ path: string
+
+Returns
+-----------
+ answers: {string: string}
+
+Reads an answers file: one card per line, the image file path and the card name separated by a tab. Blank lines,
+lines starting with '#', and lines with no name after the tab are skipped, so the review list written by
+ReviewQueue.write() can be filled in and used as it is.
+"""
+def read_answers(path):
+	answers = {}
+	with open(path, 'r', encoding = 'utf-8') as file:
+		for line in file:
+			line = line.rstrip("\n")
+			if not line or line.startswith("#") or "\t" not in line:
+				continue
+			filename, name = line.split("\t", 1)
+			if name.strip():
+				answers[filename] = name.strip()
+	return answers
+
+
+"""
+The ReviewQueue class holds the cards of a deck or collection run that couldn't be resolved, so the run can go on
+without waiting for someone to type their names. Each card is kept with the text OCR read, the closest known names
+(see name_index.py), and a thumbnail of its title strip saved as a PNG in the folder at path, which is much quicker to
+look thru than the full photos.
+
+write() saves the queue as review.txt in the same folder, in the format read_answers() reads:
+
+ # read "Grizly Bears", title image 0.png, suggestions: Grizzly Bears, Grizzled Bears
+ photos/card7.jpg
+
+Typing the card names after the tabs turns the list into an answers file for the next run. Once that run has
+resolved every card, finish() deletes the folder but keeps the list, answers and all, next to it as path + ".txt".
+"""
+class ReviewQueue:
+
+	"""
+	Parameters
+	-----------
+	 path: string (folder, created when the first card is added)
+	"""
+	def __init__(self, path):
+		self.path = path
+		self.cards = []
+
+	def __len__(self):
+		return len(self.cards)
+
+	def __iter__(self):
+		return iter(self.cards)
+
+	"""
+	Parameters
+	-----------
+	 card: dictionary (see FinalProject.process_cards())
+	 title: bytes (PNG of the title strip) or None
+
+	Adds a card to the queue, saving its title strip as card["thumbnail"].
+	"""
+	def add(self, card, title = None):
+		if title:
+			os.makedirs(self.path, exist_ok = True)
+			card["thumbnail"] = os.path.join(self.path, str(len(self.cards)) + ".png")
+			with open(card["thumbnail"], 'wb') as file:
+				file.write(title)
+		self.cards.append(card)
+
+	"""
+	Returns
+	-----------
+	 review_file: string
+
+	Writes the review list of every queued card to review.txt and returns its path.
+	"""
+	def write(self):
+		os.makedirs(self.path, exist_ok = True)
+		review_file = os.path.join(self.path, "review.txt")
+
+		with open(review_file, 'w', encoding = 'utf-8') as file:
+			file.write("# Type the name of each card after the tab on its line, then run again with this file as the answers file.\n")
+			for card in self.cards:
+				note = "# read \"" + card["name"] + "\""
+				if card.get("thumbnail"):
+					note += ", title image " + os.path.basename(card["thumbnail"])
+				if card.get("candidates"):
+					note += ", suggestions: " + ", ".join(card["candidates"])
+				file.write(note + "\n")
+				file.write(card["filename"] + "\t\n")
+
+		return review_file
+
+	"""
+	Returns
+	-----------
+	 answers_file: string or None
+
+	Deletes the folder at path once every card in it has been resolved. Its review.txt is usually the answers file the
+	run was given, so it is moved out to path + ".txt" first, and its path is returned.
+	"""
+	def finish(self):
+		review_file = os.path.join(self.path, "review.txt")
+		answers_file = None
+		if os.path.exists(review_file):
+			answers_file = self.path + ".txt"
+			os.replace(review_file, answers_file)
+		shutil.rmtree(self.path, ignore_errors = True)
+		return answers_file
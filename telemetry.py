@@ -0,0 +1,259 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - timing telemetry
+"""
+
+SAMPLE_SIZE = 10000		# stage times kept per stage for percentiles; longer runs keep a random sample of this size
+
+
+"""
+The Telemetry class records a span for every card processed during a deck or collection run: how long each stage
+took, whether caches were hit, how many API requests and retries were needed, and the size of the image. Each span is
+written as one JSON line to the log file at path as soon as the card is finished, and a summary of the whole run is
+kept in memory for summary().
+
+Code inside a stage doesn't need to be passed the span: stage() marks the span as active for the current thread, and
+count() and note() add to whatever span is active. When there is no active span they do nothing, so instrumented code
+costs next to nothing when it runs outside of the pipeline. Recording a span is a few dictionary updates and one
+buffered write, cheap enough to leave on for every run.
+
+A span looks like:
+
+ {"run": "1700000000-deck", "file": "card1.jpg", "ms": {"load": 12.1, "crop": 4.0, ...}, "total_ms": 250.3,
+  "image_bytes": 2048123, "image_shape": [756, 1008], "ocr_cached": false, "lookup": "api", "api_requests": 1,
+  "api_retries": 0}
+"""
+class Telemetry:
+
+	"""
+	Parameters
+	-----------
+	 path: string, or None to not write a log
+	"""
+	def __init__(self, path = None):
+		self.path = path
+		self.lock = threading.Lock()
+		self.local = threading.local()
+		self.log = None
+		self.run = None
+		self._reset()
+
+	def _reset(self):
+		self.cards = 0
+		self.totals = {}	# stage -> [count, seconds]
+		self.samples = {}	# stage -> sample of durations in seconds
+		self.counts = {}	# counter name -> total over the run
+		self.started = time.time()
+
+	"""
+	Parameters
+	-----------
+	 kind: string ("deck" or "collection")
+	 output: string
+
+	Starts a new run, opening the log file and clearing the summary.
+	"""
+	def start_run(self, kind, output):
+		with self.lock:
+			self._reset()
+			self.run = str(int(self.started)) + "-" + kind
+			if self.path:
+				self.log = open(self.path, 'a')
+				self.log.write(json.dumps({"run" : self.run, "start" : kind, "output" : output}) + "\n")
+
+	"""
+	Parameters
+	-----------
+	 filename: string
+
+	Returns
+	-----------
+	 span: dictionary
+	"""
+	def new_span(self, filename):
+		return {"run" : self.run, "file" : filename, "ms" : {}, "start" : time.perf_counter()}
+
+	"""
+	Parameters
+	-----------
+	 span: dictionary
+	 name: string
+
+	Context manager that times the code inside it as stage name of span, and makes span the active span of this
+	thread while it runs.
+	"""
+	@contextmanager
+	def stage(self, span, name):
+		previous = getattr(self.local, "span", None)
+		self.local.span = span
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			span["ms"][name] = span["ms"].get(name, 0) + 1000 * (time.perf_counter() - start)
+			self.local.span = previous
+
+	"""
+	Parameters
+	-----------
+	 span: dictionary
+
+	Context manager that makes span the active span of this thread while the code inside it runs, without timing it.
+	"""
+	@contextmanager
+	def active(self, span):
+		previous = getattr(self.local, "span", None)
+		self.local.span = span
+		try:
+			yield
+		finally:
+			self.local.span = previous
+
+	"""
+	Parameters
+	-----------
+	 name: string
+	 function: stage function taking and returning a card dictionary
+
+	Returns
+	-----------
+	 stage function
+
+	Wraps a pipeline stage so each card's time in it is recorded in card["span"].
+	"""
+	def timed(self, name, function):
+		def stage(card):
+			with self.stage(card["span"], name):
+				return function(card)
+		return stage
+
+	"""
+	Same as timed(), for a batch stage taking a list of cards. The time of the whole batch is split evenly between
+	its cards. No span is active while the batch runs, since it is for many cards at once; a batch function whose
+	code calls count() or note() makes each card's span active with active() while it works on that card.
+	"""
+	def timed_batch(self, name, function):
+		def stage(cards):
+			start = time.perf_counter()
+			cards = function(cards)
+			share = 1000 * (time.perf_counter() - start) / max(len(cards), 1)
+			for card in cards:
+				card["span"]["ms"][name] = card["span"]["ms"].get(name, 0) + share
+			return cards
+		return stage
+
+	"""
+	Parameters
+	-----------
+	 name: string
+	 amount: int
+
+	Adds amount to counter name of this thread's active span.
+	"""
+	def count(self, name, amount = 1):
+		span = getattr(self.local, "span", None)
+		if span != None:
+			span[name] = span.get(name, 0) + amount
+
+	"""
+	Parameters
+	-----------
+	 name: string
+	 value: anything JSON can store
+
+	Sets field name of this thread's active span.
+	"""
+	def note(self, name, value):
+		span = getattr(self.local, "span", None)
+		if span != None:
+			span[name] = value
+
+	"""
+	Parameters
+	-----------
+	 span: dictionary
+
+	Finishes a span, writing it to the log and adding it to the run summary.
+	"""
+	def record(self, span):
+		span["total_ms"] = 1000 * (time.perf_counter() - span.pop("start"))
+
+		with self.lock:
+			self.cards += 1
+			for name in span["ms"]:
+				seconds = span["ms"][name] / 1000
+				total = self.totals.setdefault(name, [0, 0.0])
+				total[0] += 1
+				total[1] += seconds
+
+				sample = self.samples.setdefault(name, [])
+				if len(sample) < SAMPLE_SIZE:
+					sample.append(seconds)
+				else:	# reservoir sampling keeps the sample fair without keeping every time
+					k = random.randrange(total[0])
+					if k < SAMPLE_SIZE:
+						sample[k] = seconds
+
+			for name in span:
+				if isinstance(span[name], bool) and span[name]:
+					self.counts[name] = self.counts.get(name, 0) + 1
+				elif isinstance(span[name], int) and not isinstance(span[name], bool):
+					self.counts[name] = self.counts.get(name, 0) + span[name]
+				elif name == "lookup":
+					self.counts["lookup_" + span[name]] = self.counts.get("lookup_" + span[name], 0) + 1
+
+			if self.log:
+				self.log.write(json.dumps(span) + "\n")
+
+	"""
+	Returns
+	-----------
+	 table: string
+
+	Summary of the run so far: time spent in each stage, and the totals of every counter.
+	"""
+	def summary(self):
+		with self.lock:
+			elapsed = time.time() - self.started
+			lines = ["stage".ljust(10) + "cards".rjust(8) + "mean ms".rjust(10) + "p50 ms".rjust(10) + "p95 ms".rjust(10) +
+				"total s".rjust(10)]
+
+			for name in self.totals:
+				count, seconds = self.totals[name]
+				sample = sorted(self.samples[name])
+				lines.append(name.ljust(10) + str(count).rjust(8) + str(round(1000 * seconds / count, 1)).rjust(10) +
+					str(round(1000 * sample[len(sample) // 2], 1)).rjust(10) +
+					str(round(1000 * sample[min(len(sample) - 1, int(len(sample) * 0.95))], 1)).rjust(10) + str(round(seconds, 2)).rjust(10))
+
+			lines.append(str(self.cards) + " cards in " + str(round(elapsed, 1)) + " s (" +
+				str(round(self.cards / elapsed, 2) if elapsed else 0) + " cards/s)")
+			for name in sorted(self.counts):
+				lines.append(name + ": " + str(self.counts[name]))
+
+		return "\n".join(lines)
+
+	"""
+	Returns
+	-----------
+	 table: string
+
+	Ends the run, writing its summary to the log and closing it. Returns the same table as summary().
+	"""
+	def finish_run(self):
+		table = self.summary()
+
+		with self.lock:
+			if self.log:
+				self.log.write(json.dumps({"run" : self.run, "end" : True, "cards" : self.cards, "counts" : self.counts,
+					"seconds" : dict((name, round(self.totals[name][1], 3)) for name in self.totals)}) + "\n")
+				self.log.close()
+				self.log = None
+
+		return table
@@ -0,0 +1,16 @@
+import os
+import sys
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT)		# import modules from the project folder
+sys.path.insert(0, os.path.join(PROJECT, "benchmarks"))	# and the mock API and corpus from the benchmarks
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - test setup
+
+The tests run with pytest from the project folder:
+
+ python -m pytest tests
+"""
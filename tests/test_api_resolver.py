@@ -0,0 +1,80 @@
+import pytest
+
+from api_resolver import APIError, CardResolver, NAMES_PER_QUERY
+from corpus import CARDS
+from mock_api import MockAPI
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - batched resolver tests
+
+CardResolver is run against the local mock API (benchmarks/mock_api.py) with the rate limit and retry waits turned
+down, so the tests count requests and retries without a network connection.
+"""
+
+NAMES = [data[0] for data in CARDS]
+
+
+"""
+Gives a function that starts a MockAPI with the given printings and fail_every, and a CardResolver pointed at it with
+the given retries, and returns both. Everything it started is closed after the test.
+"""
+@pytest.fixture
+def api():
+	servers = []
+	def start(printings = 3, fail_every = 0, retries = 5):
+		mock = MockAPI(CARDS, printings = printings, fail_every = fail_every)
+		resolver = CardResolver(mock.url, rate = 1000, burst = 1000, retries = retries, backoff = 0)
+		servers.append((mock, resolver))
+		return mock, resolver
+	yield start
+	for mock, resolver in servers:
+		resolver.close()
+		mock.close()
+
+def test_names_are_resolved_in_one_request(api):
+	mock, resolver = api()
+	found = resolver.resolve(NAMES[:5] + ["Bogus Card", NAMES[0]])
+	assert list(found) == NAMES[:5] + ["Bogus Card"]	# repeats dropped, order kept
+	assert [found[name] for name in NAMES[:5]] == CARDS[:5]
+	assert found["Bogus Card"] == None
+	assert mock.requests == 1
+	assert resolver.stats == {"requests" : 1, "retries" : 0}
+
+def test_names_are_split_into_groups(api):
+	mock, resolver = api()
+	names = NAMES[:3] + ["Made Up " + str(k) for k in range(2 * NAMES_PER_QUERY)]
+	found = resolver.resolve(names)
+	assert mock.requests == 3
+	assert [found[name] for name in NAMES[:3]] == CARDS[:3]
+	assert sum(1 for name in names if found[name] == None) == 2 * NAMES_PER_QUERY
+
+def test_pages_are_read_until_every_name_is_found(api):
+	mock, resolver = api(printings = 40)	# 5 names have 200 printings, two pages of 100
+	found = resolver.resolve(NAMES[:5])
+	assert [found[name] for name in NAMES[:5]] == CARDS[:5]
+	assert mock.requests == 2
+
+def test_failed_requests_are_retried(api):
+	mock, resolver = api(fail_every = 2, retries = 20)	# every other request gets a 503; threads can keep drawing the failing ones
+	names = NAMES[:2] + ["Made Up " + str(k) for k in range(3 * NAMES_PER_QUERY)]
+	found = resolver.resolve(names)
+	assert [found[name] for name in NAMES[:2]] == CARDS[:2]
+	assert resolver.stats["retries"] > 0
+	assert resolver.stats["requests"] == mock.requests
+
+def test_api_error_after_every_retry(api):
+	mock, resolver = api(fail_every = 1, retries = 2)
+	with pytest.raises(APIError):
+		resolver.resolve(NAMES[:1])
+	assert mock.requests == 3
+	assert resolver.stats == {"requests" : 3, "retries" : 2}
+
+def test_empty_names_are_not_sent(api):
+	mock, resolver = api()
+	assert resolver.resolve(["", "  "]) == {"" : None, "  " : None}
+	assert mock.requests == 0
+	found = resolver.resolve(["", NAMES[0]])
+	assert found == {"" : None, NAMES[0] : CARDS[0]}
+	assert mock.requests == 1
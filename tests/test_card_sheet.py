@@ -0,0 +1,72 @@
+import numpy as np
+
+from card_sheet import CARD_SIZE, find_cards, order_corners, reading_order, warp_card
+from corpus import CARDS, draw_sheet
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - card sheet tests
+
+Pages of cards are drawn with benchmarks/corpus.py's draw_sheet(), which lays them out in reading order, so the k-th
+card found must be centered in the k-th cell of the page.
+"""
+
+SIZE = (1200, 900)	# height x width
+
+
+"""
+Parameters
+-----------
+ count: int (cards on the page, filled in reading order)
+ seed: int
+
+Returns
+-----------
+ cards: [float32 array of 4 (x, y) points] (as found by find_cards())
+ cells: [(float, float)] (center of the cell each card was drawn in)
+ photo: Image
+"""
+def page(count, seed):
+	photo = draw_sheet([CARDS[k][0] for k in range(count)], seed, 3, 3, SIZE)
+	height, width = SIZE
+	cells = [((k % 3 + 0.5) * width / 3, (k // 3 + 0.5) * height / 3) for k in range(count)]
+	return find_cards(photo), cells, photo
+
+def assert_in_cells(cards, cells):
+	assert len(cards) == len(cells)
+	height, width = SIZE
+	for corners, cell in zip(cards, cells):
+		center = corners.mean(axis = 0)
+		assert abs(center[0] - cell[0]) < width / 12 and abs(center[1] - cell[1]) < height / 12
+
+def test_full_page_in_reading_order():
+	for seed in range(3):
+		cards, cells, photo = page(9, seed)
+		assert_in_cells(cards, cells)
+
+def test_partly_filled_page():
+	cards, cells, photo = page(7, 5)
+	assert_in_cells(cards, cells)
+
+def test_reading_order_of_shuffled_cards():
+	cards, cells, photo = page(9, 1)
+	shuffled = [cards[k] for k in (8, 2, 4, 0, 6, 1, 7, 3, 5)]
+	assert [corners.tolist() for corners in reading_order(shuffled)] == [corners.tolist() for corners in cards]
+
+def test_order_corners():
+	square = [[10, 10], [110, 12], [108, 150], [8, 148]]	# top left, top right, bottom right, bottom left
+	for start in range(4):
+		assert order_corners(square[start:] + square[:start]).tolist() == square
+
+def test_warped_card_is_upright():
+	cards, cells, photo = page(9, 2)
+	card = warp_card(photo, cards[0])
+	assert card.shape == (CARD_SIZE[1], CARD_SIZE[0], 3)
+	assert card[60:90, 100:600].mean() > 150	# the light title bar is at the top
+	assert card[300:900, 100:600].mean() < 60	# the rest is the dark card
+
+def test_no_cards():
+	rng = np.random.default_rng(0)
+	table = rng.integers(185, 235, SIZE + (3,), dtype = np.uint8)
+	assert find_cards(table) == []
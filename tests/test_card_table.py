@@ -0,0 +1,65 @@
+import math
+
+from card_table import CREATURE, INSTANT, LAND, CardRecord, CardTable
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - card record and card table tests
+"""
+
+BOLT = ("Lightning Bolt", "{R}", 1.0, "Instant", ("R",), ("R",), None, None, None)
+BEAR = ("Grizzly Bears", "{1}{G}", 2.0, "Creature — Bear", ("G",), ("G",), "2", "2", None)
+TARMOGOYF = ("Tarmogoyf", "{1}{G}", 2.0, "Creature — Lhurgoyf", ("G",), ("G",), "*", "1+*", None)
+ARBOR = ("Dryad Arbor", None, 0.0, "Land Creature — Forest Dryad", ("G",), ("G",), "1", "1", None)
+FOREST = ("Forest", None, 0.0, "Basic Land — Forest", (), ("G",), None, None, None)
+
+def test_record_behaves_like_tuple():
+	record = CardRecord(*BOLT)
+	assert record == BOLT and record == list(BOLT)	# colors are kept as tuples, see share()
+	assert record[0] == "Lightning Bolt" and record[-1] == None and len(record) == 9
+	name, mana_cost, cmc, type_line = record[:4]
+	assert (name, cmc, type_line) == ("Lightning Bolt", 1.0, "Instant")
+	assert list(record) == list(BOLT)
+	assert CardRecord(*BEAR[:4], ["G"], ["G"], "2", "2", None).colors == ("G",)
+	assert hash(record) == hash(CardRecord.of(list(BOLT)))
+	assert CardRecord.of(record) is record
+
+def test_record_compared_with_other_types():
+	record = CardRecord(*BOLT)
+	assert record != None and not (record == None)
+	assert record != 1
+	assert record != BEAR
+	assert None in [record, None]
+
+def test_records_share_values():
+	first, second = CardRecord(*BEAR), CardRecord(*list(BEAR))
+	assert first.type is second.type
+	assert first.colors is second.colors
+
+def test_table_round_trip_and_growth():
+	table = CardTable(capacity = 2)
+	cards = [BOLT, BEAR, TARMOGOYF, ARBOR, FOREST]
+	for card in cards:
+		table.append(card)
+	assert len(table) == 5 and len(table.cmc) >= 5
+	assert [table.record(row) for row in range(len(table))] == cards
+
+def test_table_columns():
+	table = CardTable()
+	for card in (BOLT, BEAR, TARMOGOYF, ARBOR, FOREST):
+		table.append(card)
+	assert list(table.rows_of(CREATURE)) == [1, 2, 3]
+	assert list(table.rows_of(INSTANT | LAND)) == [0, 3, 4]
+	assert table.power[1] == 2 and math.isnan(table.power[2]) and math.isnan(table.toughness[2])
+	assert table.cmc[:len(table)].sum() == 5.0
+	assert list(table.lands_last()) == [0, 1, 2, 3, 4]
+
+	table.append(BOLT)
+	assert list(table.lands_last()) == [0, 1, 2, 5, 3, 4]	# lands move after everything else, in the order added
+
+def test_table_keeps_number_types_apart():
+	table = CardTable()
+	table.append(("X", None, 1.0, "Instant", (), (), None, None, 1))
+	table.append(("Y", None, 1.0, "Instant", (), (), None, None, 1.0))
+	assert repr(table.record(0).loyalty) == "1" and repr(table.record(1).loyalty) == "1.0"
@@ -0,0 +1,107 @@
+import os
+
+import FinalProject
+from checkpoint import Checkpoint, file_stamp
+from corpus import CARDS
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - checkpoint journal tests
+
+A run is cut short after some of its cards are journaled, and the rerun is checked to pick up only the rest.
+"""
+
+
+"""
+Parameters
+-----------
+ folder: pathlib path
+ count: int
+
+Returns
+-----------
+ filenames: list of strings
+
+Makes count small files standing in for card photos; only their size and modification time matter to the journal.
+"""
+def images(folder, count):
+	filenames = []
+	for number in range(count):
+		filename = str(folder / ("card" + str(number) + ".jpg"))
+		with open(filename, 'wb') as image:
+			image.write(b"photo " + str(number).encode())
+		filenames.append(filename)
+	return filenames
+
+def test_journal_is_reloaded(tmp_path):
+	filenames = images(tmp_path, 2)
+	checkpoint = Checkpoint(str(tmp_path / "deck.txt.journal"))
+	checkpoint.record(filenames[0], CARDS[0])
+	checkpoint.close()
+
+	checkpoint = Checkpoint(str(tmp_path / "deck.txt.journal"))
+	assert checkpoint.lookup(filenames[0]) == tuple(CARDS[0])
+	assert checkpoint.lookup(filenames[1]) == None
+	checkpoint.close()
+
+def test_cut_off_line_is_skipped(tmp_path):
+	filenames = images(tmp_path, 2)
+	path = str(tmp_path / "deck.txt.journal")
+	checkpoint = Checkpoint(path)
+	checkpoint.record(filenames[0], CARDS[0])
+	checkpoint.close()
+	with open(path, 'a') as journal:
+		journal.write('{"file": "' + filenames[1] + '", "sta')	# crashed while writing the second card
+
+	checkpoint = Checkpoint(path)
+	assert checkpoint.lookup(filenames[0]) == tuple(CARDS[0])
+	assert checkpoint.lookup(filenames[1]) == None
+	checkpoint.close()
+
+def test_replaced_image_is_redone(tmp_path):
+	filename = images(tmp_path, 1)[0]
+	checkpoint = Checkpoint(str(tmp_path / "deck.txt.journal"))
+	checkpoint.record(filename, CARDS[0])
+	with open(filename, 'ab') as image:
+		image.write(b" retaken")
+	assert checkpoint.lookup(filename) == None
+	checkpoint.close()
+
+def test_video_frame_stamp(tmp_path):
+	video = str(tmp_path / "clip.mp4")
+	with open(video, 'wb') as clip:
+		clip.write(b"frames")
+	assert file_stamp(video + "#120") == file_stamp(video)
+	assert file_stamp(str(tmp_path / "missing.jpg")) == None
+
+def test_finish_removes_journal(tmp_path):
+	path = str(tmp_path / "deck.txt.journal")
+	checkpoint = Checkpoint(path)
+	checkpoint.record(images(tmp_path, 1)[0], CARDS[0])
+	checkpoint.finish()
+	assert not os.path.exists(path)
+
+def test_resume_after_partial_run(monkeypatch, tmp_path):
+	filenames = images(tmp_path, 5)
+	path = str(tmp_path / "deck.txt.journal")
+	checkpoint = Checkpoint(path)
+	for filename, card in zip(filenames[:3], CARDS):	# the first run quit after three cards
+		checkpoint.record(filename, card)
+	checkpoint.close()
+
+	loaded = []
+	def load_stage(card):	# stands in for reading, cropping and looking up the photo
+		loaded.append(card["filename"])
+		card["data"] = tuple(CARDS[filenames.index(card["filename"])])
+		return card
+	monkeypatch.setattr(FinalProject, "load_stage", load_stage)
+
+	checkpoint = Checkpoint(path)
+	cards = list(FinalProject.process_cards(filenames, checkpoint = checkpoint))
+	checkpoint.close()
+
+	assert loaded == filenames[3:]
+	assert [card["filename"] for card in cards] == filenames
+	assert [bool(card.get("resumed")) for card in cards] == [True, True, True, False, False]
+	assert [card["data"] for card in cards] == [tuple(card) for card in CARDS[:5]]
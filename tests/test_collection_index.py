@@ -0,0 +1,95 @@
+import csv
+
+import FinalProject
+from collection_index import CollectionIndex
+from corpus import CARDS
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - collection index tests
+
+Images are added to and removed from an index, and the quantity of each card is checked after every change.
+"""
+
+
+"""
+Parameters
+-----------
+ folder: pathlib path
+ count: int
+
+Returns
+-----------
+ filenames: list of strings
+
+Makes count small files standing in for card photos; only their size and modification time matter to the index.
+"""
+def images(folder, count):
+	filenames = []
+	for number in range(count):
+		filename = str(folder / ("card" + str(number) + ".jpg"))
+		with open(filename, 'wb') as image:
+			image.write(b"photo " + str(number).encode())
+		filenames.append(filename)
+	return filenames
+
+def quantities(index):
+	return [(data[0], quantity) for data, quantity in index.cards()]
+
+def test_add_and_remove_quantities(tmp_path):
+	filenames = images(tmp_path, 3)
+	index = CollectionIndex(str(tmp_path / "binder.txt.index.db"))
+	index.add(filenames[0], "a", CARDS[0])
+	index.add(filenames[1], "b", CARDS[1])
+	index.add(filenames[2], "c", CARDS[0])	# a second copy
+	assert quantities(index) == [(CARDS[0][0], 2), (CARDS[1][0], 1)]
+	assert index.size() == (2, 3)
+
+	assert index.remove(filenames[0])
+	assert quantities(index) == [(CARDS[0][0], 1), (CARDS[1][0], 1)]
+	assert index.remove(filenames[2])
+	assert quantities(index) == [(CARDS[1][0], 1)]	# the last copy takes the card with it
+	assert not index.remove(filenames[2])	# already gone
+	assert index.size() == (1, 1)
+	index.close()
+
+def test_readding_an_image_replaces_it(tmp_path):
+	filename = images(tmp_path, 1)[0]
+	index = CollectionIndex(str(tmp_path / "binder.txt.index.db"))
+	index.add(filename, "a", CARDS[0])
+	index.add(filename, "a", CARDS[0])
+	assert quantities(index) == [(CARDS[0][0], 1)]
+
+	index.add(filename, "a", CARDS[1])	# read as a different card this time
+	assert quantities(index) == [(CARDS[1][0], 1)]
+	index.close()
+
+def test_lookup_and_reopen(tmp_path):
+	filenames = images(tmp_path, 2)
+	path = str(tmp_path / "binder.txt.index.db")
+	index = CollectionIndex(path)
+	index.add(filenames[0], "a", CARDS[0])
+	index.add(filenames[1], "b", CARDS[0])
+	index.close()
+
+	index = CollectionIndex(path)
+	assert index.lookup(filenames[0]) == tuple(CARDS[0])
+	with open(filenames[1], 'ab') as image:
+		image.write(b" retaken")
+	assert index.lookup(filenames[1]) == None	# changed since it was added
+	assert index.lookup(str(tmp_path / "new.jpg")) == None
+	assert quantities(index) == [(CARDS[0][0], 2)]
+	index.close()
+
+def test_collection_report_quantities(tmp_path):
+	filenames = images(tmp_path, 3)
+	index = CollectionIndex(str(tmp_path / "binder.txt.index.db"))
+	for filename, card in zip(filenames, [CARDS[0], CARDS[1], CARDS[0]]):
+		index.add(filename, None, card)
+	index.remove(filenames[1])
+
+	FinalProject.write_collection_report(index, str(tmp_path / "binder.txt"), "Binder", "Spares", ["csv"])
+	rows = list(csv.DictReader(open(str(tmp_path / "binder.csv"), newline = '', encoding = 'utf-8')))
+	assert [(row["name"], row["quantity"]) for row in rows] == [(CARDS[0][0], "2")]
+	index.close()
@@ -0,0 +1,63 @@
+import pytest
+
+import FinalProject
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - command line tests
+
+command_line() is run with create_deck() and the others replaced by stand-ins that record how they were called, so
+the tests check which options reach them without reading any images.
+"""
+
+
+"""
+Parameters
+-----------
+ monkeypatch: pytest fixture
+ argv: [string]
+ finished: bool (what the stand-ins return)
+ status: int (exit status command_line() has to return)
+
+Returns
+-----------
+ calls: [(string, tuple, dictionary)] (name, arguments, and keyword arguments of each call)
+"""
+def run(monkeypatch, argv, finished = True, status = 0):
+	calls = []
+	for name in ("create_deck", "create_collection", "update_collection"):
+		monkeypatch.setattr(FinalProject, name, lambda *args, name = name, **options: calls.append((name, args, options)) or finished)
+	monkeypatch.setattr(FinalProject, "lookup_cache", FinalProject.LookupCache(None))
+	assert FinalProject.command_line(argv) == status
+	return calls
+
+def test_default_ocr_batch(monkeypatch, tmp_path):
+	calls = run(monkeypatch, ["deck", str(tmp_path / "deck.txt"), "--batch"])
+	assert calls[0][0] == "create_deck"
+	assert calls[0][2]["ocr_batch"] == FinalProject.OCR_BATCH
+	assert calls[0][2]["interactive"] == False
+
+def test_ocr_batch_reaches_every_command(monkeypatch, tmp_path):
+	output = str(tmp_path / "binder.txt")
+	for argv, name in [(["deck", output], "create_deck"), (["collection", output], "create_collection"),
+			(["collection", output, "--update"], "update_collection")]:
+		calls = run(monkeypatch, argv + ["--ocr-batch", "16"])
+		assert calls[0][0] == name
+		assert calls[0][2]["ocr_batch"] == 16
+
+def test_unfinished_batch_run_fails(monkeypatch, tmp_path):
+	calls = run(monkeypatch, ["collection", str(tmp_path / "binder.txt"), "--batch"], False, FinalProject.REVIEW_STATUS)
+	assert calls[0][0] == "create_collection"
+
+def test_standard_input_needs_batch(monkeypatch, tmp_path, capsys):
+	with pytest.raises(SystemExit) as exit:
+		run(monkeypatch, ["deck", str(tmp_path / "deck.txt"), "-"])
+	assert exit.value.code == 2
+	assert "--batch" in capsys.readouterr().err
+	assert run(monkeypatch, ["deck", str(tmp_path / "deck.txt"), "-", "--batch"])[0][0] == "create_deck"
+
+def test_reports_with_the_same_path_are_refused(monkeypatch, tmp_path, capsys):
+	with pytest.raises(SystemExit):
+		run(monkeypatch, ["deck", str(tmp_path / "deck.json"), "--report", "text", "--report", "json"])
+	assert "deck.json" in capsys.readouterr().err
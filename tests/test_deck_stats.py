@@ -0,0 +1,83 @@
+import pytest
+
+from card_table import CardTable
+from deck_stats import deck_statistics, statistics_lines
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - deck statistics tests
+
+A small deck with every card type, whose totals are worked out by hand below. Every card counts once, under the first
+of its types in deck_stats.CATEGORIES.
+"""
+
+DECK = [
+	("Lightning Bolt", "{R}", 1.0, "Instant", ["R"], ["R"], None, None, None),
+	("Lightning Bolt", "{R}", 1.0, "Instant", ["R"], ["R"], None, None, None),
+	("Forest", None, 0.0, "Basic Land — Forest", None, ["G"], None, None, None),
+	("Llanowar Elves", "{G}", 1.0, "Creature — Elf Druid", ["G"], ["G"], "1", "1", None),
+	("Serra Angel", "{3}{W}{W}", 5.0, "Creature — Angel", ["W"], ["W"], "4", "4", None),
+	("Colossus", "{8}", 8.0, "Artifact Creature — Golem", None, None, "8", "8", None),	# a creature, colorless, curve 7+
+	("Sol Ring", "{1}", 1.0, "Artifact", None, None, None, None, None),
+	("Forest", None, 0.0, "Basic Land — Forest", None, ["G"], None, None, None),
+	("Boros Charm", "{R}{W}", 2.0, "Instant", ["R", "W"], ["R", "W"], None, None, None),
+	("Dryad Arbor", None, 0.0, "Land Creature — Forest Dryad", ["G"], ["G"], "1", "1", None),	# a creature, not a land
+	("Wrath of God", "{2}{W}{W}", 4.0, "Sorcery", ["W"], ["W"], None, None, None),
+	("Pacifism", "{1}{W}", 2.0, "Enchantment — Aura", ["W"], ["W"], None, None, None)]
+
+
+def table_of(cards):
+	table = CardTable(4)	# small, so it has to grow
+	for data in cards:
+		table.append(data)
+	return table
+
+def test_totals():
+	stats = deck_statistics(table_of(DECK))
+	assert stats["total_cards"] == 12
+	assert stats["total_cost"] == 25.0
+	assert stats["average_cost"] == 2.5	# 25 over the 10 cards that aren't lands
+	assert stats["land_ratio"] == pytest.approx(2 / 12)
+
+def test_counts_and_averages_by_type():
+	stats = deck_statistics(table_of(DECK))
+	assert stats["counts"] == {"Creature" : 4, "Enchantment" : 1, "Artifact" : 1, "Planeswalker" : 0, "Instant" : 3,
+		"Sorcery" : 1, "Land" : 2, "Other" : 0}
+	assert stats["average_costs"]["Creature"] == 3.5
+	assert stats["average_costs"]["Instant"] == pytest.approx(4 / 3)
+	assert stats["average_costs"]["Artifact"] == 1.0
+	assert stats["average_costs"]["Planeswalker"] == 0.0	# none, not a division by zero
+	assert stats["average_costs"]["Land"] == 0.0
+
+def test_curve_and_colors():
+	stats = deck_statistics(table_of(DECK))
+	assert stats["curve"] == [1, 4, 2, 0, 1, 1, 0, 1]
+	assert stats["colors"] == {"W" : 4, "U" : 0, "B" : 0, "R" : 3, "G" : 2, "Colorless" : 4, "Multicolor" : 1}
+
+def test_all_lands():
+	stats = deck_statistics(table_of([DECK[2]] * 3))
+	assert stats["average_cost"] == 0.0
+	assert stats["curve"] == [0] * 8
+	assert stats["land_ratio"] == 1.0
+	assert stats["counts"]["Land"] == 3
+	assert "Average Mana Cost: 0.0" in statistics_lines(stats)
+
+def test_empty_deck():
+	stats = deck_statistics(CardTable())
+	assert stats["total_cards"] == 0 and stats["land_ratio"] == 0.0
+
+def test_lands_sort_last():
+	table = table_of(DECK)
+	names = [table.record(row).name for row in table.lands_last()]
+	lands = [data[0] for data in DECK if "Land" in data[3]]	# Dryad Arbor is listed with the lands, as the report always has
+	assert names == [data[0] for data in DECK if "Land" not in data[3]] + lands
+	assert lands == ["Forest", "Forest", "Dryad Arbor"]
+
+def test_statistics_lines():
+	lines = statistics_lines(deck_statistics(table_of(DECK)))
+	assert "Total Cards: 12" in lines
+	assert "Total Creature Count: 4" in lines
+	assert "Land Ratio: 0.167" in lines
+	assert "Mana Curve: 0: 1, 1: 4, 2: 2, 3: 0, 4: 1, 5: 1, 6: 0, 7+: 1" in lines
+	assert "Total Other Cards: 0" not in "\n".join(lines)
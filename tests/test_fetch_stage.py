@@ -0,0 +1,61 @@
+import pytest
+
+import FinalProject
+from api_resolver import CardResolver
+from card_store import CardStore
+from corpus import CARDS
+from lookup_cache import LookupCache
+from mock_api import MockAPI
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - fetch and resolve stage tests
+
+fetch_stage() and resolve_stage() are run against a card store holding the corpus cards and the local mock API, to
+count which names still cost an API request.
+"""
+
+
+"""
+Points FinalProject at a card store of the corpus cards in tmp_path, an empty lookup cache, and the mock API, and
+gives the mock.
+"""
+@pytest.fixture
+def mock(monkeypatch, tmp_path):
+	mock = MockAPI(CARDS + [("Lightning Helix", "{R}{W}", 2.0, "Instant", ["R", "W"], ["R", "W"], None, None, None)])
+	store = CardStore(str(tmp_path / "cards.db"))
+	store.add_many(CARDS)
+	monkeypatch.setattr(FinalProject, "card_store", store)
+	monkeypatch.setattr(FinalProject, "lookup_cache", LookupCache(None))
+	monkeypatch.setattr(FinalProject, "name_index", None)
+	monkeypatch.setattr(FinalProject, "api", CardResolver(mock.url, rate = 1000, burst = 1000))
+	yield mock
+	FinalProject.api.close()
+	mock.close()
+	store.close()
+
+def run(names):
+	cards = [{"name" : name, "span" : {}} for name in names]
+	return [FinalProject.resolve_stage(card) for card in FinalProject.fetch_stage(cards)]
+
+def test_misreads_of_known_cards_skip_the_api(mock):
+	cards = run(["Lightnig Bolt", "Counterspel", "Serra Angle", "lightning bolt", "Lightning Bolt"])
+	assert mock.requests == 0
+	assert [card["name"] for card in cards] == ["Lightning Bolt", "Counterspell", "Serra Angel", "Lightning Bolt", "Lightning Bolt"]
+	assert [card["data"][0] for card in cards] == [card["name"] for card in cards]
+
+def test_new_cards_are_fetched_together(mock):
+	cards = run(["Lightning Helix", "Bogus Card", "Lightnig Bolt"])
+	assert mock.requests == 1
+	assert cards[0]["data"][0] == "Lightning Helix"
+	assert cards[1]["data"] == None
+	assert cards[2]["data"][0] == "Lightning Bolt"
+
+def test_empty_read_is_not_looked_up(mock):
+	cards = run(["", " "])
+	assert [card["data"] for card in cards] == [None, None]
+	assert mock.requests == 0
+	assert not FinalProject.lookup_cache.cached("")
+	assert FinalProject.get_data("") == None
+	assert FinalProject.lookup_cache.stats["misses"] == 0
@@ -0,0 +1,240 @@
+import asyncio
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import job_server
+from corpus import CARDS
+from mock_api import MockAPI
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - job server tests
+
+Runs a JobServer with two worker processes against the mock API. The workers read each card's name from its shade
+(see read_shade()) instead of with Tesseract, so the tests need neither Tesseract nor a network connection.
+"""
+
+NAMES = ["Lightning Bolt", "Forest", "Counterspell", "Sol Ring", "Bogus Card"]	# the last one isn't a card
+
+
+"""
+Stand-in for text_detect() in the workers: the card drawn by draw_card(k) is named NAMES[k].
+"""
+def read_shade(image, first = None):
+	return NAMES[int(image[500, 350, 0]) - 20]
+
+"""
+Setup hook of the workers (see job_server.start_worker()): points FinalProject at databases in the test's folder and
+at the mock API. Batched OCR reads nothing, so every card is read by read_shade().
+"""
+def setup_station():
+	import FinalProject
+	import ocr_backend
+	from api_resolver import CardResolver
+	from card_store import CardStore
+	from lookup_cache import LookupCache
+	from ocr_cache import OCRCache
+
+	folder = os.environ["JOB_SERVER_TEST_DIR"]
+	FinalProject.card_store = CardStore(os.path.join(folder, "cards.db"))
+	FinalProject.lookup_cache = LookupCache(None)
+	FinalProject.ocr_cache = OCRCache(os.path.join(folder, "ocr.db"))
+	FinalProject.api = CardResolver(os.environ["JOB_SERVER_TEST_API"], rate = 1000, burst = 1000)
+	FinalProject.text_detect = read_shade
+	ocr_backend.images_to_strings = lambda images: [""] * len(images)
+
+def draw_card(folder, k):
+	img = np.full((1200, 900, 3), 230, np.uint8)
+	cv2.rectangle(img, (100, 100), (800, 1100), (20 + k,) * 3, -1)
+	path = os.path.join(folder, str(k) + ".png")
+	cv2.imwrite(path, img)
+	return path
+
+
+"""
+The server, running on its own event loop in a thread, shared by every test of this file since starting the workers
+takes a few seconds.
+"""
+@pytest.fixture(scope = "module")
+def server(tmp_path_factory):
+	folder = str(tmp_path_factory.mktemp("jobs"))
+	mock = MockAPI(CARDS)
+	os.environ["JOB_SERVER_TEST_DIR"] = folder
+	os.environ["JOB_SERVER_TEST_API"] = mock.url
+
+	server = job_server.JobServer(port = 0, processes = 2, workers = 1, upload_dir = os.path.join(folder, "uploads"),
+		setup = setup_station, job_dir = folder)
+	server.folder = folder
+	server.images = [draw_card(folder, k) for k in range(len(NAMES))]
+
+	loop = asyncio.new_event_loop()
+	ready = threading.Event()
+	async def run():
+		await server.start()
+		ready.set()
+		try:
+			async with server.server:
+				await server.server.serve_forever()
+		except asyncio.CancelledError:	# server.close() stops it
+			pass
+	threading.Thread(target = lambda: loop.run_until_complete(run()), daemon = True).start()
+	ready.wait()
+
+	yield server
+
+	loop.call_soon_threadsafe(server.close)
+	mock.close()
+
+def call(server, method, path, body = None, host = None, headers = {}):
+	connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout = 60)
+	connection.request(method, path, body, dict(headers, **({"Host" : host} if host else {})))
+	response = connection.getresponse()
+	return response.status, json.loads(response.read())
+
+def submit(server, **request):
+	return call(server, "POST", "/jobs", json.dumps(request), headers = {"Content-Type" : "application/json"})
+
+def wait(server, job_id, seconds = 120):
+	deadline = time.time() + seconds
+	while time.time() < deadline:
+		status, job = call(server, "GET", "/jobs/" + str(job_id))
+		if job["state"] not in ("queued", "running"):
+			return job
+		time.sleep(0.1)
+	raise AssertionError("job " + str(job_id) + " didn't finish")
+
+def raw_request(server, data):
+	with socket.create_connection(("127.0.0.1", server.port), timeout = 60) as connection:
+		connection.sendall(data)
+		answer = connection.makefile('rb').read()
+	return int(answer.split(b" ", 2)[1])
+
+
+def test_only_localhost_is_answered(server):
+	assert call(server, "GET", "/metrics", host = "evil.example.com")[0] == 403
+	assert call(server, "GET", "/metrics", host = "localhost:" + str(server.port))[0] == 200
+
+@pytest.mark.parametrize("origin, status", [("http://evil.example.com", 403), ("null", 403),
+	("http://localhost.evil.example.com", 403), ("http://localhost:3000", 200), ("http://127.0.0.1", 200)])
+def test_only_local_web_pages_are_answered(server, origin, status):
+	assert call(server, "GET", "/metrics", headers = {"Origin" : origin})[0] == status
+
+def test_jobs_must_be_json(server):
+	job = json.dumps({"kind" : "deck", "output" : "form.txt", "images" : server.images[:1]})
+	for content_type in ("text/plain", "application/x-www-form-urlencoded", "multipart/form-data; boundary=x"):	# what a form or fetch() can send anywhere
+		assert call(server, "POST", "/jobs", job, headers = {"Content-Type" : content_type})[0] == 415
+	assert call(server, "POST", "/jobs", job)[0] == 415
+	assert not os.path.exists(os.path.join(server.folder, "form.txt"))
+
+def test_jobs_only_write_in_job_folder(server):
+	outside = os.path.join(os.path.dirname(server.folder), "outside.txt")
+	for output in (outside, "../outside.txt", server.folder, "uploads/../../outside.txt"):
+		status, answer = submit(server, kind = "deck", output = output, images = server.images[:1])
+		assert status == 400, answer
+	os.symlink(os.path.dirname(server.folder), os.path.join(server.folder, "link"))
+	assert submit(server, kind = "deck", output = "link/outside.txt", images = server.images[:1])[0] == 400
+	assert submit(server, kind = "deck", output = "x.txt", images = server.images[:1], answers = __file__)[0] == 400
+	assert not os.path.exists(outside)
+
+def test_unknown_paths_and_methods(server):
+	assert call(server, "GET", "/nothing")[0] == 404
+	assert call(server, "GET", "/jobs/999")[0] == 404
+	assert call(server, "PUT", "/jobs")[0] == 405
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_bad_content_length(server, length):
+	assert raw_request(server, b"POST /jobs HTTP/1.1\r\nHost: localhost\r\nContent-Length: " + length + b"\r\n\r\n") == 400
+
+@pytest.mark.parametrize("request_fields", [
+	{"kind" : "nope"},
+	{"kind" : "deck"},
+	{"kind" : "deck", "output" : "x.txt", "images" : "0.png"},
+	{"kind" : "deck", "output" : "x.txt", "images" : ["/no/such/card.jpg"]},
+	{"kind" : "deck", "output" : "x.txt", "name" : 5},
+	{"kind" : "deck", "output" : "x.txt", "summary" : ["s"]},
+	{"kind" : "deck", "output" : "x.txt", "format" : 1},
+	{"kind" : "deck", "output" : "x.txt", "formats" : ["pdf"]},
+	{"kind" : "deck", "output" : "x.txt", "formats" : "text"},
+	{"kind" : "deck", "output" : "x.json", "formats" : ["text", "json"]},
+	{"kind" : "deck", "output" : "x.txt", "answers" : "no_such_answers.txt"},
+	{"kind" : "deck", "output" : "x.txt", "images" : []},
+	{"kind" : "update", "output" : "x.txt", "images" : [], "removed" : []},
+	{"kind" : "deck", "output" : "x.txt", "ocr_batch" : 0},
+	{"kind" : "deck", "output" : "x.txt", "ocr_batch" : "16"},
+	{"kind" : "deck", "output" : "x.txt", "ocr_batch" : True},
+	{"kind" : "update", "output" : "x.txt", "removed" : "0.png"}])
+def test_bad_jobs_are_refused(server, request_fields):
+	if "output" in request_fields and "images" not in request_fields:	# so it's refused for the field being tested
+		request_fields = dict(request_fields, images = server.images[:1])
+	status, answer = submit(server, **request_fields)
+	assert status == 400, answer
+
+def test_deck_job(server):
+	status, upload = call(server, "POST", "/uploads?name=card.png", open(server.images[2], 'rb').read())
+	assert status == 200 and os.path.exists(upload["path"])
+
+	output = os.path.join(server.folder, "deck.txt")
+	images = [server.images[0], server.images[1], upload["path"]] * 4
+	status, job = submit(server, kind = "deck", output = output, images = images, name = "Mono Red", format = "Modern",
+		formats = ["text", "json"])
+	assert status == 202
+	assert submit(server, kind = "deck", output = output, images = images)[0] == 409	# same output, still running
+
+	job = wait(server, job["id"])
+	assert job["state"] == "done", job
+	assert job["cards"] == len(images)
+	deck = open(output).read()
+	assert "Deck Name: Mono Red" in deck and "Counterspell" in deck
+	assert os.path.exists(os.path.join(server.folder, "deck.json"))
+
+def test_batched_ocr_job(server):
+	output = os.path.join(server.folder, "batched.txt")
+	status, job = submit(server, kind = "collection", output = output, images = server.images[:4] * 3, ocr_batch = 4)
+	assert status == 202
+	job = wait(server, job["id"])
+	assert job["state"] == "done", job
+	assert job["cards"] == 12
+	assert "Sol Ring" in open(output).read()
+
+def test_unknown_card_goes_to_review(server):
+	status, job = submit(server, kind = "collection", output = os.path.join(server.folder, "binder.txt"),
+		images = server.images)
+	job = wait(server, job["id"])
+	assert job["state"] == "review"
+	assert os.path.exists(job["review"])
+
+def test_cancel(server):
+	images = server.images[:4] * 10
+	jobs = [submit(server, kind = "collection", output = os.path.join(server.folder, "c" + str(k) + ".txt"),
+		images = images)[1] for k in range(6)]
+
+	# two jobs run and three more wait in the process pool's call queue, so the last one hasn't been handed to a worker
+	assert call(server, "DELETE", "/jobs/" + str(jobs[0]["id"]))[0] == 409
+	status, job = call(server, "DELETE", "/jobs/" + str(jobs[-1]["id"]))
+	assert status == 200 and job["state"] == "cancelled"
+	for job in jobs[:-1]:
+		assert wait(server, job["id"])["state"] == "done"
+
+def test_worker_crash(server):
+	server.pool.submit(os._exit, 1)
+	deadline = time.time() + 30
+	while not server.pool._broken and time.time() < deadline:
+		time.sleep(0.05)
+
+	status, job = submit(server, kind = "deck", output = os.path.join(server.folder, "after.txt"), images = server.images[:4])
+	assert status == 202
+	job = wait(server, job["id"])
+	assert job["state"] == "done", job
+	assert job["cards"] == 4
+
+	metrics = call(server, "GET", "/metrics")[1]
+	assert metrics["cards"] > 0 and metrics["queued"] == 0
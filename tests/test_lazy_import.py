@@ -0,0 +1,48 @@
+import sys
+import threading
+
+from lazy_import import lazy_import
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - lazy import tests
+"""
+
+
+def write_module(monkeypatch, folder, name, code):
+	(folder / (name + ".py")).write_text(code)
+	monkeypatch.syspath_prepend(str(folder))
+
+def test_runs_on_first_use(monkeypatch, tmp_path):
+	write_module(monkeypatch, tmp_path, "lazy_first_use", "import sys\nsys.lazy_first_use_ran = True\nvalue = 1\n")
+	module = lazy_import("lazy_first_use")
+	assert not hasattr(sys, "lazy_first_use_ran")
+	import lazy_first_use	# an import statement doesn't run it either
+	assert not hasattr(sys, "lazy_first_use_ran")
+	assert module.value == 1 and sys.lazy_first_use_ran
+
+def test_threads_wait_for_the_module(monkeypatch, tmp_path):
+	# the module takes a while to run; every thread must see it whole, not half run
+	write_module(monkeypatch, tmp_path, "lazy_slow", "import time\ntime.sleep(0.2)\nvalue = 1\n")
+	module = lazy_import("lazy_slow")
+	values = []
+	def use():
+		try:
+			values.append(module.value)
+		except AttributeError as error:
+			values.append(error)
+	threads = [threading.Thread(target = use) for k in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	assert values == [1] * 8
+
+def test_missing_module():
+	try:
+		lazy_import("no_such_module_here")
+	except ImportError as error:
+		assert error.name == "no_such_module_here"
+	else:
+		raise AssertionError("no ImportError")
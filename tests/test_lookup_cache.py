@@ -0,0 +1,102 @@
+import sqlite3
+import time
+
+from lookup_cache import LookupCache, normalize_name
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - lookup cache tests
+"""
+
+BOLT = ("Lightning Bolt", "{R}", 1.0, "Instant", ["R"], ["R"], None, None, None)
+
+
+"""
+Stand-in for lookup_card(): knows one card and remembers every name it was asked for.
+"""
+class FakeLookup:
+
+	def __init__(self):
+		self.calls = []
+
+	def __call__(self, card_name):
+		self.calls.append(card_name)
+		return BOLT if card_name == "Lightning Bolt" else None
+
+
+def test_normalize_name():
+	assert normalize_name("  Lightning   Bolt ") == "Lightning Bolt"
+	assert normalize_name("lightning bolt") == "lightning bolt"	# case is kept
+
+def test_hit_after_miss():
+	cache = LookupCache(None)
+	lookup = FakeLookup()
+	assert cache.get("Lightning Bolt", lookup) == BOLT
+	assert cache.get("Lightning Bolt", lookup) == BOLT
+	assert lookup.calls == ["Lightning Bolt"]
+	assert cache.stats == {"hits" : 1, "misses" : 1, "negative_hits" : 0}
+
+def test_misread_spacing_finds_the_card():
+	# a misread with extra spaces is looked up as the normalized name, and doesn't cache "not found" for the real card
+	cache = LookupCache(None)
+	lookup = FakeLookup()
+	assert cache.get("Lightning  Bolt", lookup) == BOLT
+	assert cache.get("Lightning Bolt", lookup) == BOLT
+	assert lookup.calls == ["Lightning Bolt"]
+	assert cache.stats == {"hits" : 1, "misses" : 1, "negative_hits" : 0}
+
+def test_negative_entries_expire():
+	cache = LookupCache(None, negative_ttl = 0.05)
+	lookup = FakeLookup()
+	assert cache.get("Lightnig Bolt", lookup) == None
+	assert cache.get("Lightnig Bolt", lookup) == None
+	assert cache.stats["negative_hits"] == 1
+	time.sleep(0.1)
+	cache.get("Lightnig Bolt", lookup)
+	assert len(lookup.calls) == 2
+
+def test_lru_eviction():
+	cache = LookupCache(None, max_size = 2)
+	for name in ["a", "b", "c"]:
+		cache.put(name, None)
+	assert not cache.cached("a")
+	assert cache.cached("b") and cache.cached("c")
+
+def test_persistent_tier(tmp_path):
+	path = str(tmp_path / "lookup_cache.db")
+	cache = LookupCache(path)
+	cache.get("Lightning Bolt", FakeLookup())
+	cache.close()
+
+	cache = LookupCache(path)	# a new process starts with an empty memory tier
+	lookup = FakeLookup()
+	assert cache.get("Lightning Bolt", lookup) == BOLT	# the JSON list comes back as a tuple
+	assert lookup.calls == []
+	cache.close()
+
+def test_puts_are_written_together(tmp_path):
+	path = str(tmp_path / "lookup_cache.db")
+	cache = LookupCache(path, max_size = 1)
+	for name in ["a", "b", "c"]:
+		cache.put(name, None)
+	assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM lookups").fetchone()[0] == 0	# held back
+	assert cache.cached("a")	# still found, though the memory tier only holds c
+	cache.flush()
+	assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM lookups").fetchone()[0] == 3
+	cache.close()
+
+def test_persistent_size_limit(tmp_path):
+	path = str(tmp_path / "lookup_cache.db")
+	cache = LookupCache(path, max_size = 1, disk_size = 3)
+	for name in ["a", "b", "c", "d", "a"]:	# "a" put again isn't a new row
+		cache.put(name, None)
+		time.sleep(0.01)	# each expires after the one before
+	cache.close()
+
+	cache = LookupCache(path, max_size = 1, disk_size = 3)
+	assert [name for name in "abcd" if cache.cached(name)] == ["a", "c", "d"]	# b expires soonest
+	cache.put("e", None)
+	cache.flush()
+	assert [name for name in "abcde" if cache.cached(name)] == ["a", "d", "e"]
+	cache.close()
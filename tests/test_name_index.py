@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from name_index import NameIndex, edit_distance, normalize
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - fuzzy name index tests
+
+edit_distance() is checked against the usual row by row distance table on random strings, and NameIndex against
+misreads of a few card names.
+"""
+
+NAMES = ["Lightning Bolt", "Lightning Helix", "Counterspell", "Llanowar Elves", "Serra Angel", "Sol Ring"]
+
+
+"""
+Parameters
+-----------
+ a: string
+ b: string
+
+Returns
+-----------
+ distance: int
+
+Levenshtein distance the slow way, one cell of the table at a time.
+"""
+def table_distance(a, b):
+	row = list(range(len(b) + 1))
+	for i in range(len(a)):
+		last = row
+		row = [i + 1]
+		for j in range(len(b)):
+			row.append(min(last[j + 1] + 1, row[j] + 1, last[j] + (a[i] != b[j])))
+	return row[-1]
+
+@pytest.mark.parametrize("a, b, distance", [
+	("", "", 0), ("", "abc", 3), ("abc", "", 3), ("bolt", "bolt", 0), ("bolt", "blot", 2), ("kitten", "sitting", 3),
+	("lightning bolt", "lghtn1ng b0lt", 3)])
+def test_known_distances(a, b, distance):
+	assert edit_distance(a, b, 10) == distance
+
+def test_matches_distance_table():
+	rng = random.Random(380)
+	for k in range(2000):
+		a = "".join(rng.choice("abcd ") for i in range(rng.randrange(0, 90)))	# past 64 characters too
+		b = "".join(rng.choice("abcd ") for i in range(rng.randrange(0, 90)))
+		limit = rng.randrange(0, 40)
+		distance = table_distance(a, b)
+		assert edit_distance(a, b, limit) == (distance if distance <= limit else limit + 1), (a, b, limit)
+
+def test_normalize():
+	assert normalize("  Lightning   BOLT ") == "lightning bolt"
+
+def test_search_orders_closest_first():
+	index = NameIndex(NAMES)
+	matches = index.search("Lightning Bot")
+	assert matches[0][0] == "Lightning Bolt"
+	assert [confidence for name, confidence in matches] == sorted([confidence for name, confidence in matches], reverse = True)
+
+def test_exact_match_ignores_case_and_spacing():
+	index = NameIndex(NAMES)
+	assert index.search("  COUNTERSPELL ") == [("Counterspell", 1.0)]
+	assert index.best("sol   ring") == ("Sol Ring", 1.0)
+
+def test_best_of_misreads():
+	index = NameIndex(NAMES)
+	name, confidence = index.best("Llanowar Elvcs")
+	assert name == "Llanowar Elves"
+	assert confidence == pytest.approx(1 - 1 / 14)
+	assert index.best("") == (None, 0.0)
+	assert index.best("Xyzzy Plugh Quux") == (None, 0.0)
+
+def test_equally_close_names_halve_confidence():
+	index = NameIndex(["Bolt", "Colt"])
+	name, confidence = index.best("Dolt")
+	assert confidence == pytest.approx((1 - 1 / 4) / 2)
+
+def test_names_are_added_once():
+	index = NameIndex(NAMES + ["lightning bolt"])
+	assert len(index) == len(NAMES)
@@ -0,0 +1,45 @@
+import importlib
+import sys
+
+import pytest
+
+import ocr_backend
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - OCR backend tests
+
+ocr_backend is imported again with a stand-in for tesserocr, to check which backend it picks without either Tesseract
+binding being installed.
+"""
+
+
+"""
+Gives a function that imports ocr_backend again with a stand-in tesserocr module whose code is source, found ahead of
+any installed one. ocr_backend is put back as it was after the test.
+"""
+@pytest.fixture
+def reload_with(monkeypatch, tmp_path):
+	def reload(source):
+		(tmp_path / "tesserocr.py").write_text(source)
+		monkeypatch.syspath_prepend(str(tmp_path))
+		monkeypatch.delitem(sys.modules, "tesserocr", raising = False)
+		return importlib.reload(ocr_backend)
+	yield reload
+	monkeypatch.undo()
+	sys.modules.pop("tesserocr", None)
+	importlib.reload(ocr_backend)
+
+def test_tesserocr_that_fails_to_load_falls_back(reload_with):
+	backend = reload_with("raise ImportError('libtesseract.so.4: cannot open shared object file')\n")
+	assert backend.tesserocr == None
+	assert backend.BACKEND == "pytesseract"
+
+def test_tesserocr_is_used_when_it_loads(reload_with):
+	backend = reload_with("PSM = None\n")
+	assert backend.BACKEND == "tesserocr"
+
+def test_tesseract_command(monkeypatch):
+	monkeypatch.setenv("TESSERACT_CMD", "/opt/tesseract")
+	assert ocr_backend.tesseract_command() == "/opt/tesseract"
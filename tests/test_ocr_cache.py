@@ -0,0 +1,91 @@
+import sqlite3
+import time
+
+from ocr_cache import OCRCache, image_key
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - OCR cache tests
+"""
+
+PARAMS = "crop:reduced4;title:1;pytesseract"
+
+
+def test_key_changes_with_image_and_settings():
+	key = image_key(b"photo", PARAMS)
+	assert image_key(b"photo", PARAMS) == key
+	assert image_key(b"photo!", PARAMS) != key	# the file changed
+	assert image_key(b"photo", PARAMS.replace("pytesseract", "tesserocr")) != key	# the settings changed
+	assert len(key) == 40
+
+def test_put_and_get(tmp_path):
+	cache = OCRCache(str(tmp_path / "ocr.db"))
+	assert cache.get("a") == None
+	cache.put("a", "Lightning Bolt", b"png")
+	assert cache.get("a") == ("Lightning Bolt", b"png")
+	cache.put("a", "Counterspell", b"png2")	# read again, replaces the entry
+	assert cache.get("a") == ("Counterspell", b"png2")
+	assert cache.size() == (1, 4)
+	cache.close()
+
+	cache = OCRCache(str(tmp_path / "ocr.db"))
+	assert cache.get("a") == ("Counterspell", b"png2")
+	cache.close()
+
+def test_hits_are_written_on_flush(tmp_path):
+	path = str(tmp_path / "ocr.db")
+	cache = OCRCache(path)
+	cache.put("a", "Forest", b"x")
+	written = sqlite3.connect(path).execute("SELECT used FROM ocr").fetchone()[0]
+
+	time.sleep(0.01)
+	cache.get("a")
+	assert sqlite3.connect(path).execute("SELECT used FROM ocr").fetchone()[0] == written	# nothing written per hit
+	cache.flush()
+	assert sqlite3.connect(path).execute("SELECT used FROM ocr").fetchone()[0] > written
+	cache.close()
+
+def test_least_recently_used_is_evicted(tmp_path):
+	cache = OCRCache(str(tmp_path / "ocr.db"), max_bytes = 10)
+	cache.put("a", "A", b"1234")
+	cache.put("b", "B", b"1234")
+	cache.get("a")	# a is now used more recently than b, though that isn't written yet
+	cache.put("c", "C", b"1234")
+	assert cache.get("b") == None
+	assert cache.get("a") != None and cache.get("c") != None
+	assert cache.size() == (2, 8)
+	cache.close()
+
+def test_total_is_kept_across_opens(tmp_path):
+	path = str(tmp_path / "ocr.db")
+	cache = OCRCache(path, max_bytes = 10)
+	cache.put("a", "A", b"1234")
+	cache.put("b", "B", b"1234")
+	cache.close()
+
+	cache = OCRCache(path, max_bytes = 10)	# knows the cache holds 8 bytes without adding them up
+	cache.put("c", "C", b"1234")
+	assert cache.size() == (2, 8)
+	assert cache.get("a") == None
+	cache.clear()
+	assert cache.size() == (0, 0)
+	cache.put("d", "D", b"123456789")
+	assert cache.size() == (1, 9)
+	cache.close()
+
+def test_cache_made_before_the_total_was_kept(tmp_path):
+	path = str(tmp_path / "ocr.db")
+	conn = sqlite3.connect(path)
+	conn.execute("CREATE TABLE ocr (key TEXT PRIMARY KEY, name TEXT, title BLOB, size INTEGER, used REAL)")
+	conn.execute("INSERT INTO ocr VALUES ('a', 'A', x'01020304', 4, 0)")
+	conn.commit()
+	conn.close()
+
+	cache = OCRCache(path, max_bytes = 6)
+	cache.put("b", "B", b"12")
+	assert cache.size() == (2, 6)	# still fits
+	cache.put("c", "C", b"1")
+	assert cache.size() == (2, 3)	# a, the oldest, made room
+	assert cache.get("a") == None
+	cache.close()
@@ -0,0 +1,79 @@
+import itertools
+import random
+import threading
+import time
+
+import pytest
+
+from pipeline import Stage, run_pipeline
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - pipeline tests
+
+Stages with several threads and random delays finish items out of order; run_pipeline() has to give them back in
+order, raise a stage's exception in the reader, and read its input no further ahead than its queues allow.
+"""
+
+
+"""
+Parameters
+-----------
+ function: function
+ seed: int
+
+Returns
+-----------
+ function that sleeps up to 2 ms, then runs function
+"""
+def jittered(function, seed):
+	rng = random.Random(seed)
+	lock = threading.Lock()
+	def run(item):
+		with lock:
+			delay = rng.random() * 0.002
+		time.sleep(delay)
+		return function(item)
+	return run
+
+def test_order_is_kept():
+	stages = [Stage("double", jittered(lambda x: x * 2, 1), 4), Stage("add", jittered(lambda x: x + 1, 2), 3)]
+	assert list(run_pipeline(range(300), stages, 8)) == [x * 2 + 1 for x in range(300)]
+
+def test_batches_keep_order():
+	sizes = []
+	def batch(items):
+		sizes.append(len(items))
+		time.sleep(random.random() * 0.002)
+		return [x * 10 for x in items]
+	stages = [Stage("one", jittered(lambda x: x + 1, 3), 4), Stage("batch", batch, 2, 5)]
+	assert list(run_pipeline(range(200), stages, 8)) == [(x + 1) * 10 for x in range(200)]
+	assert max(sizes) <= 5
+
+def test_no_items():
+	assert list(run_pipeline([], [Stage("same", lambda x: x, 2)])) == []
+
+def test_stage_error_is_raised():
+	def fail(x):
+		if x == 37:
+			raise ValueError("card 37")
+		return x
+	results = []
+	with pytest.raises(ValueError, match = "card 37"):
+		for x in run_pipeline(range(100), [Stage("fail", fail, 3)], 4):
+			results.append(x)
+	assert results == list(range(len(results))) and len(results) <= 37	# raised as soon as it comes out, in order until then
+
+def test_input_is_read_lazily():
+	read = []
+	def items():
+		for x in itertools.count():
+			read.append(x)
+			yield x
+	stages = [Stage("a", lambda x: x, 2), Stage("b", lambda x: x, 2)]
+	results = run_pipeline(items(), stages, 4)
+	assert [next(results) for k in range(10)] == list(range(10))
+	time.sleep(0.2)
+	assert len(read) <= 10 + 4 * (len(stages) + 1) + 1	# the window: returned items plus queue_size per queue
+	results.close()
@@ -0,0 +1,90 @@
+import csv
+import json
+import os
+
+import pytest
+
+from card_table import CardRecord
+from report_writer import AtomicFile, check_formats, report_path, write_report
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - report writer tests
+"""
+
+BOLT = CardRecord("Lightning Bolt", "{R}", 1.0, "Instant", ["R"], ["R"], None, None, None)
+CHARM = CardRecord("Boros Charm", "{R}{W}", 2.0, "Instant", ["R", "W"], ["R", "W"], None, None, None)
+INFO = [("Deck Name", "Burn"), ("Summary", "Fast")]
+
+
+def write(path, formats, quantities = (None, None), statistics = None):
+	cards = [(BOLT, quantities[0]), (CHARM, quantities[1])]
+	return write_report(path, formats, "Deck", INFO, cards, ["Lightning Bolt", "Boros Charm"], statistics)
+
+def test_report_path():
+	assert report_path("decks/red.txt", "text") == "decks/red.txt"
+	assert report_path("decks/red.txt", "json") == "decks/red.json"
+	assert report_path("decks/red", "csv") == "decks/red.csv"
+
+def test_text_report(tmp_path):
+	path = str(tmp_path / "deck.txt")
+	assert write(path, ["text"], statistics = ({}, ["Total Cards: 2"])) == [path]
+	lines = open(path, encoding = 'utf-8').read().split("\n")
+	assert lines[:5] == ["=============================", "Deck Information", "=============================",
+		"Deck Name: Burn", "Summary: Fast"]
+	assert "Boros Charm" in lines and lines[-2] == "Total Cards: 2"
+
+def test_json_report(tmp_path):
+	path = str(tmp_path / "deck.txt")
+	write(path, ["json"], statistics = ({"total_cards" : 2}, []))
+	report = json.load(open(str(tmp_path / "deck.json"), encoding = 'utf-8'))
+	assert report["kind"] == "deck"
+	assert report["info"] == {"Deck Name" : "Burn", "Summary" : "Fast"}
+	assert report["cards"][1]["name"] == "Boros Charm" and report["cards"][1]["colors"] == ["R", "W"]
+	assert report["statistics"] == {"total_cards" : 2}
+	assert not os.path.exists(path)	# only the formats asked for
+
+def test_csv_report(tmp_path):
+	path = str(tmp_path / "binder.txt")
+	write(path, ["csv"], quantities = (4, 1))
+	rows = list(csv.DictReader(open(str(tmp_path / "binder.csv"), newline = '', encoding = 'utf-8')))
+	assert [row["name"] for row in rows] == ["Lightning Bolt", "Boros Charm"]
+	assert rows[1]["colors"] == "R/W" and rows[0]["quantity"] == "4"
+	assert rows[0]["power"] == ""
+
+def test_text_report_on_json_path_is_refused(tmp_path):
+	path = str(tmp_path / "deck.json")
+	with pytest.raises(ValueError):
+		check_formats(["text", "json"], path)
+	with pytest.raises(ValueError):
+		write(path, ["text", "json"])
+	assert os.listdir(tmp_path) == []
+	check_formats(["json"], path)	# only one report at that path
+	check_formats(["text", "csv"], path)
+
+def test_unknown_format():
+	with pytest.raises(ValueError):
+		check_formats(["pdf"])
+
+def test_atomic_file_replaces_or_keeps(tmp_path):
+	path = str(tmp_path / "deck.txt")
+	with AtomicFile(path) as file:
+		file.write("first")
+	assert open(path).read() == "first"
+
+	with pytest.raises(RuntimeError):
+		with AtomicFile(path) as file:
+			file.write("second, half")
+			assert open(path).read() == "first"	# not replaced until it's finished
+			raise RuntimeError("crashed while writing")
+	assert open(path).read() == "first"
+	assert os.listdir(tmp_path) == ["deck.txt"]	# the partial file is gone
+
+def test_atomic_file_permissions(tmp_path):
+	path = str(tmp_path / "deck.txt")
+	with AtomicFile(path) as file:
+		file.write("x")
+	umask = os.umask(0)
+	os.umask(umask)
+	assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
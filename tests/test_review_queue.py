@@ -0,0 +1,57 @@
+import os
+
+from review_queue import ReviewQueue, read_answers
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - review queue tests
+
+A review list is written, filled in the way a user would, read back as answers, and kept once the run is finished.
+"""
+
+
+"""
+Parameters
+-----------
+ path: string
+
+Returns
+-----------
+ queue: ReviewQueue with two cards, one of them with a title thumbnail
+"""
+def two_cards(path):
+	queue = ReviewQueue(path)
+	queue.add({"filename" : "photos/1.jpg", "name" : "Grizly Bears", "candidates" : ["Grizzly Bears"]}, b"png")
+	queue.add({"filename" : "photos/2.jpg", "name" : ""})
+	return queue
+
+def fill_in(review_file, names):
+	lines = open(review_file, encoding = 'utf-8').read().split("\n")
+	lines = [line + names.get(line[:-1], "") if line.endswith("\t") else line for line in lines]
+	open(review_file, 'w', encoding = 'utf-8').write("\n".join(lines))
+
+def test_written_list_reads_back_as_answers(tmp_path):
+	queue = two_cards(str(tmp_path / "deck.txt.review"))
+	review_file = queue.write()
+	assert os.path.exists(os.path.join(queue.path, "0.png"))
+	assert "suggestions: Grizzly Bears" in open(review_file, encoding = 'utf-8').read()
+	assert read_answers(review_file) == {}	# nothing typed in yet
+
+	fill_in(review_file, {"photos/1.jpg" : "Grizzly Bears"})
+	assert read_answers(review_file) == {"photos/1.jpg" : "Grizzly Bears"}	# a card left blank is skipped
+
+def test_finish_keeps_the_answers(tmp_path):
+	queue = two_cards(str(tmp_path / "deck.txt.review"))
+	review_file = queue.write()
+	fill_in(review_file, {"photos/1.jpg" : "Grizzly Bears", "photos/2.jpg" : "Forest"})
+
+	answers_file = queue.finish()
+	assert answers_file == str(tmp_path / "deck.txt.review.txt")
+	assert not os.path.exists(queue.path)
+	assert read_answers(answers_file) == {"photos/1.jpg" : "Grizzly Bears", "photos/2.jpg" : "Forest"}
+
+def test_finish_without_review(tmp_path):
+	queue = ReviewQueue(str(tmp_path / "deck.txt.review"))
+	assert queue.finish() == None
+	assert os.listdir(tmp_path) == []
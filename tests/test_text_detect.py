@@ -0,0 +1,110 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+import FinalProject
+import ocr_backend
+from name_index import NameIndex
+from ocr_cache import OCRCache
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - OCR attempt tests
+
+text_detect() is run on a blank card with the OCR backend replaced by a list of answers, one per call, so the tests
+count how many OCR calls each card takes without Tesseract being installed.
+"""
+
+CROP = np.zeros((1000, 715, 3), np.uint8)	# a cropped card, see crop_image()
+NAMES = ["Lightning Bolt", "Counterspell", "Llanowar Elves"]
+
+
+"""
+Parameters
+-----------
+ monkeypatch: pytest fixture
+ reads: [string] (what each OCR call reads, in order)
+ names: [string] (known card names)
+
+Returns
+-----------
+ calls: [Image] (the strips passed to the backend)
+"""
+def fake_ocr(monkeypatch, reads, names):
+	calls = []
+	def image_to_string(image):
+		calls.append(image)
+		return reads[len(calls) - 1] + "\n"	# the backend ends its text with a new line
+	monkeypatch.setattr(ocr_backend, "image_to_string", image_to_string)
+	monkeypatch.setattr(FinalProject, "name_index", NameIndex(names))
+	return calls
+
+def read(first = None):
+	with contextlib.redirect_stdout(io.StringIO()):	# text_detect() prints every name
+		return FinalProject.text_detect(CROP, first)
+
+@pytest.fixture
+def trusted(monkeypatch):
+	monkeypatch.setattr(FinalProject, "TRUSTED_INDEX_SIZE", len(NAMES))
+
+def test_small_index_keeps_first_read(monkeypatch):
+	# a card name_index doesn't know yet costs one call, not one per attempt
+	calls = fake_ocr(monkeypatch, ["Shivan Dragon", "Shivan Dragon"], NAMES)
+	assert read() == "Shivan Dragon"
+	assert len(calls) == 1
+
+def test_small_index_retries_empty_read(monkeypatch):
+	calls = fake_ocr(monkeypatch, ["", "Shivan Dragon", "Shivan Dragon"], [])
+	assert read() == "Shivan Dragon"
+	assert len(calls) == 2
+
+def test_known_name_stops_at_first_attempt(monkeypatch, trusted):
+	calls = fake_ocr(monkeypatch, ["Lightning Bolt"], NAMES)
+	assert read() == "Lightning Bolt"
+	assert len(calls) == 1
+
+def test_misread_escalates_to_known_name(monkeypatch, trusted):
+	calls = fake_ocr(monkeypatch, ["Lghtn~g B", "Counterspell"], NAMES)
+	assert read() == "Counterspell"
+	assert len(calls) == 2
+
+def test_agreeing_reads_stop(monkeypatch, trusted):
+	calls = fake_ocr(monkeypatch, ["Shivan Dragon", "Shivan Dragon", "unused"], NAMES)
+	assert read() == "Shivan Dragon"
+	assert len(calls) == 2
+
+def test_untrusted_reads_return_closest(monkeypatch, trusted):
+	calls = fake_ocr(monkeypatch, ["Countrspl", "Lightnig Bo", "zzzz"], NAMES)
+	assert read() == "Lightnig Bo"
+	assert len(calls) == len(FinalProject.OCR_ATTEMPTS)
+
+def test_batch_read_is_not_repeated(monkeypatch, trusted):
+	calls = fake_ocr(monkeypatch, [], NAMES)
+	assert read("Lightning Bolt") == "Lightning Bolt"	# already read by ocr_batch_stage()
+	assert calls == []
+
+def test_misread_comes_back_as_known_name(monkeypatch, trusted):
+	calls = fake_ocr(monkeypatch, ["Lightnig Bolt"], NAMES)
+	assert read() == "Lightning Bolt"
+	assert len(calls) == 1
+
+def test_small_index_still_spells_known_names(monkeypatch):
+	calls = fake_ocr(monkeypatch, ["lightning  bolt"], NAMES)
+	assert read() == "Lightning Bolt"
+	assert len(calls) == 1
+
+def test_batch_notes_attempts_in_each_span(monkeypatch, trusted, tmp_path):
+	calls = fake_ocr(monkeypatch, ["Counterspell"], NAMES)
+	monkeypatch.setattr(ocr_backend, "images_to_strings", lambda images: ["Lightning Bolt", "Lghtn~g B"])
+	monkeypatch.setattr(FinalProject, "ocr_cache", OCRCache(str(tmp_path / "ocr.db")))
+	cards = [{"crop" : CROP, "key" : str(k), "span" : FinalProject.telemetry.new_span(str(k))} for k in range(2)]
+
+	stage = FinalProject.telemetry.timed_batch("ocr", FinalProject.ocr_batch_stage)
+	with contextlib.redirect_stdout(io.StringIO()):
+		cards = stage(cards)
+	assert [card["name"] for card in cards] == ["Lightning Bolt", "Counterspell"]
+	assert [card["span"]["ocr_attempts"] for card in cards] == [1, 2]	# the second went on to one more attempt
+	assert len(calls) == 1
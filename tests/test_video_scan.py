@@ -0,0 +1,96 @@
+import cv2
+import numpy as np
+
+from corpus import CARDS, draw_photo
+from video_scan import STILL_FRAMES, card_frames, frame_hash, hash_distance, is_video
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - video scanning tests
+
+card_frames() is given frames of cards being dealt under a fixed camera, drawn in memory the same way
+benchmarks/bench_video.py records them, and must pick one frame of each card.
+"""
+
+SIZE = (480, 360)	# frame size after read_frames() shrinks it, height x width
+
+
+"""
+Parameters
+-----------
+ names: [string]
+ clear: [bool] (whether the table is emptied after each card)
+
+Returns
+-----------
+ frames: [(int, Image)]
+ stills: [Image] (one still frame of each card, in the order they were dealt)
+
+Each card slides in from the right over the table, sits still for a while with camera noise, and is either left for
+the next card to slide over or taken away so the camera sees the empty table. Copies of a card are drawn the same.
+"""
+def deal(names, clear):
+	rng = np.random.default_rng(0)
+	height, width = SIZE
+	table = rng.integers(185, 235, (height, width, 3), dtype = np.uint8)
+	frames, stills = [], []
+
+	def write(frame, count):
+		for k in range(count):
+			noise = rng.integers(-3, 4, frame.shape, dtype = np.int16)
+			frames.append((len(frames), np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)))
+
+	write(table, 6)
+	for k in range(len(names)):
+		card = draw_photo(names[k], 1000 + names.index(names[k]), SIZE)	# copies of a card land in the same place
+		stills.append(card)
+		for step in range(4, 0, -1):
+			shift = np.float32([[1, 0, step * width / 5], [0, 1, 0]])
+			write(cv2.warpAffine(card, shift, (width, height), table.copy(), borderMode = cv2.BORDER_TRANSPARENT), 1)
+		write(card, 3 * STILL_FRAMES)
+		if clear[k]:
+			write(table, 2 * STILL_FRAMES)
+	return frames, stills
+
+"""
+Parameters
+-----------
+ picked: [(int, Image)]
+ stills: [Image]
+
+Returns
+-----------
+ cards: [int] (position in stills of the card each picked frame shows)
+"""
+def shown(picked, stills):
+	hashes = [frame_hash(still) for still in stills]
+	return [min(range(len(stills)), key = lambda k: hash_distance(frame_hash(frame), hashes[k])) for number, frame in picked]
+
+def test_one_pick_per_card():
+	names = [CARDS[k * 2][0] for k in range(6)]
+	frames, stills = deal(names, [False, False, True, False, True, False])
+	picked = list(card_frames(iter(frames)))
+	assert shown(picked, stills) == list(range(6))
+
+def test_picked_frame_is_settled():
+	frames, stills = deal([CARDS[0][0]], [True])
+	number, frame = list(card_frames(iter(frames)))[0]
+	assert number >= 6 + 4 + STILL_FRAMES - 1	# after the table, the slide, and STILL_FRAMES still frames
+	assert hash_distance(frame_hash(frame), frame_hash(stills[0])) <= 4
+
+def test_same_card_twice():
+	name = CARDS[3][0]
+	frames, stills = deal([name, name], [True, False])	# taken away in between: two copies
+	assert len(list(card_frames(iter(frames)))) == 2
+
+	frames, stills = deal([name, name], [False, False])	# slid over without the table showing: looks like one
+	assert len(list(card_frames(iter(frames)))) == 1
+
+def test_empty_table():
+	frames, stills = deal([], [])
+	assert list(card_frames(iter(frames))) == []
+
+def test_is_video():
+	assert is_video("deck/Clip.MP4") and is_video("cards.webm")
+	assert not is_video("card1.jpg") and not is_video("clip.mp4#120")
@@ -0,0 +1,155 @@
+from lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+"""
+William Dacey
+ENAE 380 0203
+Final Project - video scanning
+"""
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+
+FRAME_STEP = 2		# only every FRAME_STEP-th frame is decoded and checked; the others are skipped with grab()
+STILL_FRAMES = 4	# checked frames in a row that must look the same before the card counts as settled
+HASH_SIZE = 16		# frames are hashed as HASH_SIZE x HASH_SIZE gray pixels, two bits per pixel
+HASH_MARGIN = 2		# a pixel must be brighter than its neighbour by more than this for its bit to be set
+MOTION_BITS = 4		# frames whose hashes differ by more bits than this are moving
+NEW_CARD_BITS = 8	# a settled frame must differ from the last card by more bits than this to be a new card
+MIN_FILL = 0.05		# a frame with less than this fraction of dark pixels has no card in it
+
+
+"""
+Parameters
+-----------
+ filename: string
+
+Returns
+-----------
+ bool
+
+Whether filename is a video (by its extension) rather than a photo of a card.
+"""
+def is_video(filename):
+	return filename.lower().endswith(VIDEO_EXTENSIONS)
+
+"""
+Parameters
+-----------
+ image: Image
+
+Returns
+-----------
+ hash: int (2 * HASH_SIZE * HASH_SIZE bits)
+
+Difference hash (dHash) of an image: it is shrunk to HASH_SIZE rows of HASH_SIZE + 1 gray pixels and each bit records
+whether a pixel is brighter than its right neighbour by more than HASH_MARGIN, and a second whether it is darker by
+more than that (so the left and right edges of a dark card both show). The margin keeps flat parts of the picture
+(the table, the body of a card) from flipping bits with camera noise, so the same picture hashes the same from frame
+to frame and a different card flips many bits; two frames are compared by the number of bits that differ (see
+hash_distance()). It costs one resize of the frame.
+"""
+def frame_hash(image):
+	small = cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), (HASH_SIZE + 1, HASH_SIZE), interpolation = cv2.INTER_AREA)
+	small = small.astype(np.int16)
+	brighter = small[:, 1:] > small[:, :-1] + HASH_MARGIN
+	darker = small[:, :-1] > small[:, 1:] + HASH_MARGIN
+	bits = np.packbits(np.concatenate((brighter, darker)).flatten())
+	return int.from_bytes(bits.tobytes(), "big")
+
+def hash_distance(a, b):
+	return bin(a ^ b).count("1")
+
+"""
+Parameters
+-----------
+ image: Image
+
+Returns
+-----------
+ bool
+
+Whether a card is in the image: enough of it is as dark as crop_image() expects a card to be.
+"""
+def has_card(image):
+	small = cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), (64, 48), interpolation = cv2.INTER_AREA)
+	return np.count_nonzero(small < 100) >= MIN_FILL * small.size
+
+
+"""
+Parameters
+-----------
+ frames: iterable of (int, Image) (frame number and frame)
+
+Returns
+-----------
+ generator of (int, Image): one frame for each card shown
+
+Picks one frame per card out of a stream of frames of cards being put under a fixed camera one after another. A
+frame is kept when the picture has stopped moving (STILL_FRAMES checked frames in a row within MOTION_BITS of the
+first of them), there is a card in it, and it doesn't look like the last card kept (more than NEW_CARD_BITS away). Frames of
+a hand moving, of the same card sitting still, and of an empty table are all dropped after a hash and a comparison,
+so only one frame per card goes on to be cropped and read.
+
+Two copies of the same card put down one right after the other look like one card; take the first one away (so the
+camera sees the empty table) before putting down the second.
+"""
+def card_frames(frames):
+	settled = None		# hash of the first frame since the picture last moved
+	still = 0			# frames since then that haven't moved away from it
+	last_card = None	# hash of the last frame kept, or None if the table has been empty since
+
+	for number, frame in frames:
+		current = frame_hash(frame)
+		if settled != None and hash_distance(current, settled) <= MOTION_BITS:
+			still += 1
+		else:
+			settled = current
+			still = 0
+
+		if still != STILL_FRAMES - 1:	# not settled yet, or already looked at this settled picture
+			continue
+
+		if not has_card(frame):
+			last_card = None
+		elif last_card == None or hash_distance(current, last_card) > NEW_CARD_BITS:
+			last_card = current
+			yield number, frame
+
+
+"""
+Parameters
+-----------
+ filename: string
+ step: int
+ scale: float
+
+Returns
+-----------
+ generator of (int, Image)
+
+Reads every step-th frame of the video at filename, shrunk by scale (frames are decoded full size, so this brings
+them to about the size load_image() gives for photos). Skipped frames are grabbed but not decoded into images.
+"""
+def read_frames(filename, step = FRAME_STEP, scale = 0.5):
+	video = cv2.VideoCapture(filename)
+	if not video.isOpened():
+		raise IOError("could not open video " + filename)
+
+	number = 0
+	try:
+		while True:
+			if number % step:
+				if not video.grab():
+					break
+			else:
+				ok, frame = video.read()
+				if not ok:
+					break
+				if scale != 1:
+					frame = cv2.resize(frame, None, fx = scale, fy = scale, interpolation = cv2.INTER_AREA)
+				yield number, frame
+			number += 1
+	finally:
+		video.release()